@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Synthetic yum/dnf executable for benchmarks.
+Generates a deterministic repository of FAKE_YUM_PACKAGES packages and answers
+'list', 'search' and 'install' with output formatted like yum does.
+Environment:
+FAKE_YUM_PACKAGES - number of packages in the repository, 10000 by default
+FAKE_YUM_INSTALLED_EVERY - every N-th package is installed, 4 by default
+FAKE_YUM_COLUMNS - terminal width, long lines are wrapped like yum wraps them; no wrapping if 0 (default)
+FAKE_YUM_INSTALL_DELAY - seconds spent by every install transaction, 0 by default
+'list extras', 'list updates' and 'list obsoletes' report some of the installed packages
+as missing from repositories, having a newer version, or obsoleted by a '-ng' package
+With --installroot, installed package names are appended to fake_yum_installed file in the root
+"""
+import os
+import sys
+import time
+import fnmatch
+
+PREFIXES = ['', 'lib', 'python3-', 'perl-', 'golang-github-', 'rubygem-', 'texlive-', 'ghc-']
+STEMS = ['samba', 'xml', 'http', 'crypto', 'yaml', 'gtk', 'qt5', 'boost', 'curl', 'ssh',
+         'json', 'zlib', 'png', 'sql', 'fonts', 'kernel', 'audio', 'mesa', 'vim', 'tcl']
+SUFFIXES = ['', '-devel', '-libs', '-doc', '-common', '-tools']
+ARCHES = ['x86_64', 'x86_64', 'noarch', 'i686']
+REPOS = ['base', 'updates', 'epel', 'extras', 'centos-sclo-rh']
+HEADER = ['Loaded plugins: fastestmirror, langpacks',
+          'Loading mirror speeds from cached hostfile',
+          ' * base: mirror.example.com',
+          ' * epel: mirror.example.com',
+          ' * updates: mirror.example.com']
+# Width of name.arch and version columns, when lines are not wrapped
+NAME_WIDTH = 60
+VERSION_WIDTH = 40
+# Selections of 'list' and their section headers
+LIST_SELECTIONS = {
+    'installed': 'Installed Packages',
+    'available': 'Available Packages',
+    'extras': 'Extra Packages',
+    'updates': 'Updated Packages',
+    'obsoletes': 'Obsoleting Packages',
+}
+# Every N-th installed package is not in repositories, has a newer version, is obsoleted
+EXTRA_EVERY = 5
+UPDATE_EVERY = 3
+OBSOLETE_EVERY = 7
+
+
+def generate_packages(count: int, installed_every: int = 4) -> list:
+    """
+    Deterministic package set
+    :param count: number of packages
+    :param installed_every: every N-th package is installed
+    :return: list of tuples (name, arch, version, repo, summary, installed)
+    """
+    packages = []
+    for i in range(count):
+        stem = STEMS[i % len(STEMS)]
+        name = f"{PREFIXES[i // 7 % len(PREFIXES)]}{stem}{i}{SUFFIXES[i // 3 % len(SUFFIXES)]}"
+        epoch = f"{i % 3}:" if i % 10 == 0 and i % 3 else ''
+        version = f"{epoch}{i % 17}.{i % 7}.{i % 11}-{i % 5 + 1}.el7"
+        summary = (f"{stem.capitalize()} {SUFFIXES[i // 3 % len(SUFFIXES)].strip('-') or 'runtime'} "
+                   f"components for {STEMS[i // 20 % len(STEMS)]} applications" + (" and utilities" * (i % 4)))
+        installed = installed_every > 0 and i % installed_every == 0
+        packages.append((name, ARCHES[i % len(ARCHES)], version, REPOS[i % len(REPOS)], summary, installed))
+    return packages
+
+
+def format_list_line(name_arch: str, version: str, repo: str, columns: int = 0) -> list:
+    """
+    Format 'yum list' row, name.arch longer than its column is printed on a line of its own
+    :return: list of output lines
+    """
+    if columns:
+        name_width = columns * 2 // 5
+        if len(name_arch) >= name_width:
+            return [name_arch, f"{' ' * name_width}{version:<{columns // 3}}{repo}"]
+        return [f"{name_arch:<{name_width}}{version:<{columns // 3}}{repo}"]
+    return [f"{name_arch:<{NAME_WIDTH}}{version:<{VERSION_WIDTH}}{repo}"]
+
+
+def newer_version(version: str) -> str:
+    """
+    :return: version with the next release, e.g. 1.2.3-5.el7 for 1.2.3-4.el7
+    """
+    version_part, _, release = version.rpartition('-')
+    number, dot, dist = release.partition('.')
+    return f"{version_part}-{int(number) + 1}{dot}{dist}"
+
+
+def selection_lines(packages: list, selection: str, patterns: list, columns: int = 0) -> list:
+    """
+    Lines of a single 'yum list' section, without its header
+    :param packages: generated packages
+    :param selection: key of LIST_SELECTIONS
+    :param patterns: package name patterns, all packages if empty
+    :return: list of output lines
+    """
+    lines = []
+    installed_number = 0
+    for name, arch, version, repo, _, is_installed in packages:
+        if is_installed:
+            installed_number += 1
+        if patterns and not any(fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(f"{name}.{arch}", pattern)
+                                for pattern in patterns):
+            continue
+        number = installed_number - 1
+        if selection == 'installed' and is_installed:
+            lines += format_list_line(f"{name}.{arch}", version, f"@{repo}", columns)
+        elif selection == 'available' and not is_installed:
+            lines += format_list_line(f"{name}.{arch}", version, repo, columns)
+        elif not is_installed:
+            continue
+        elif selection == 'extras' and number % EXTRA_EVERY == 0:
+            lines += format_list_line(f"{name}.{arch}", version, f"@{repo}", columns)
+        elif selection == 'updates' and number % UPDATE_EVERY == 0 and number % EXTRA_EVERY != 0:
+            lines += format_list_line(f"{name}.{arch}", newer_version(version), repo, columns)
+        elif selection == 'obsoletes' and number % OBSOLETE_EVERY == 0:
+            # Obsoleting package, followed by the indented installed package it obsoletes
+            lines += format_list_line(f"{name}-ng.{arch}", newer_version(version), repo, columns)
+            lines += format_list_line(f"    {name}.{arch}", version, f"@{repo}", columns)
+    return lines
+
+
+def format_search_line(name_arch: str, summary: str, columns: int = 0) -> list:
+    """
+    Format 'yum search' row, long summary is wrapped to lines started with ':'
+    :return: list of output lines
+    """
+    line = f"{name_arch} : {summary}"
+    if not columns or len(line) <= columns:
+        return [line]
+    lines = []
+    while len(line) > columns:
+        split = line.rfind(' ', 0, columns)
+        if split <= 0:
+            break
+        lines.append(line[:split])
+        line = f"{' ' * (len(name_arch) - 1)}: {line[split + 1:]}"
+    lines.append(line)
+    return lines
+
+
+def list_output(packages: list, args: list, columns: int = 0) -> (int, list):
+    """
+    :param packages: generated packages
+    :param args: 'yum list' arguments: optional selection and patterns
+    :return: tuple of return code and output lines
+    """
+    selection = 'all'
+    if args and args[0] in ('all',) + tuple(LIST_SELECTIONS):
+        selection, args = args[0], args[1:]
+    selections = ['installed', 'available'] if selection == 'all' else [selection]
+    lines = list(HEADER)
+    for selection in selections:
+        section = selection_lines(packages, selection, args, columns)
+        if section:
+            lines += [LIST_SELECTIONS[selection]] + section
+    if len(lines) == len(HEADER):
+        return 1, lines + ['Error: No matching Packages to list']
+    return 0, lines
+
+
+def search_output(packages: list, args: list, columns: int = 0) -> (int, list):
+    """
+    :param packages: generated packages
+    :param args: search terms
+    :return: tuple of return code and output lines
+    """
+    terms = [term.lower() for term in args]
+    name_matches = []
+    summary_matches = []
+    for name, arch, _, _, summary, _ in packages:
+        if any(term in name.lower() for term in terms):
+            name_matches += format_search_line(f"{name}.{arch}", summary, columns)
+        elif any(term in summary.lower() for term in terms):
+            summary_matches += format_search_line(f"{name}.{arch}", summary, columns)
+    if not name_matches and not summary_matches:
+        return 0, HEADER + [f"Warning: No matches found for: {' '.join(args)}", 'No matches found']
+    lines = list(HEADER)
+    if name_matches:
+        lines += [f"{'=' * 20} N/S matched: {' '.join(args)} {'=' * 20}"] + name_matches
+    if summary_matches:
+        lines += [f"{'=' * 20} Summary Matched: {' '.join(args)} {'=' * 20}"] + summary_matches
+    lines += ['', '  Name and summary matches only, use "search all" for everything.']
+    return 0, lines
+
+
+def install_output(packages: list, args: list, installroot: str = None) -> (int, list):
+    """
+    :param packages: generated packages
+    :param args: packages to install, options are ignored
+    :param installroot: root directory, where the list of installed packages is saved
+    :return: tuple of return code and output lines
+    """
+    by_name = {}
+    for package in packages:
+        by_name[package[0]] = package
+        by_name[f"{package[0]}.{package[1]}"] = package
+    lines = list(HEADER)
+    to_install = []
+    for arg in args:
+        if arg.startswith('-'):
+            continue
+        package = by_name.get(arg)
+        if package is None:
+            lines.append(f"No package {arg} available.")
+        elif package[5]:
+            lines.append(f"Package {package[0]}-{package[2]}.{package[1]} already installed and latest version")
+        else:
+            to_install.append(package)
+    if not to_install:
+        return 1, lines + ['Error: Nothing to do']
+    time.sleep(float(os.environ.get('FAKE_YUM_INSTALL_DELAY', '0')))
+    if installroot:
+        with open(os.path.join(installroot, 'fake_yum_installed'), 'a') as f:
+            f.writelines(f"{package[0]}\n" for package in to_install)
+    for number, (name, arch, version, _, _, _) in enumerate(to_install, 1):
+        lines.append(f"  Installing : {name}-{version}.{arch}    {number}/{len(to_install)}")
+    return 0, lines + ['Complete!']
+
+
+def main():
+    """
+    Answer yum command, options starting with '-' before the command are ignored
+    :return: system exit code
+    """
+    args = [arg for arg in sys.argv[1:]]
+    installroot = None
+    while args and args[0].startswith('-'):
+        if args.pop(0) == '--installroot' and args:
+            installroot = args.pop(0)
+    if not args:
+        print("You need to give some command")
+        return 1
+    command, args = args[0], args[1:]
+    packages = generate_packages(int(os.environ.get('FAKE_YUM_PACKAGES', '10000')),
+                                 int(os.environ.get('FAKE_YUM_INSTALLED_EVERY', '4')))
+    columns = int(os.environ.get('FAKE_YUM_COLUMNS', '0'))
+    if command == 'list':
+        ret_code, lines = list_output(packages, args, columns)
+    elif command == 'search':
+        ret_code, lines = search_output(packages, args, columns)
+    elif command == 'install':
+        ret_code, lines = install_output(packages, args, installroot)
+    else:
+        ret_code, lines = 1, [f"No such command: {command}. Please use {sys.argv[0]} --help"]
+    sys.stdout.write('\n'.join(lines) + '\n')
+    return ret_code
+
+
+###########################################################################
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Benchmarks of RpmInstaller against the synthetic fake_yum executable.
+Measures parse throughput, list() and search() latency, native search index latency,
+dependency closure of repository metadata, install_list() wall time and peak memory
+for every repository size, results are saved as JSON and may be compared with a previous run:
+python benchmark/run_benchmarks.py --sizes 1000 10000 --output new.json --compare old.json
+"""
+import os
+import sys
+import json
+import time
+import stat
+import argparse
+import sqlite3
+import platform
+import resource
+import tempfile
+import tracemalloc
+import statistics
+from collections import deque
+from contextlib import contextmanager
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from yum_wrapper.version import VERSION
+from yum_wrapper.package import Package
+from yum_wrapper.package_table import PackageTable
+from yum_wrapper.rpm_installer import RpmInstaller
+from yum_wrapper.yum_output import parse_list
+from yum_wrapper.repodata import RepodataReader
+from yum_wrapper.search_index import SearchIndex
+from yum_wrapper.dependency_resolver import DependencyIndex, DependencyResolver
+from fake_yum import HEADER, generate_packages, list_output
+
+FAKE_YUM = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fake_yum.py')
+DEFAULT_SIZES = [1000, 10000, 50000]
+# Queries of the native search index: rare name, short term, common term, several terms
+SEARCH_QUERIES = {'search_index': 'samba', 'search_index_short': 'sa', 'search_index_common': 'lib',
+                  'search_index_terms': 'http applications'}
+
+
+def write_script(path: str, content: str):
+    """
+    Write executable shell script
+    """
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+@contextmanager
+def fake_environment(packages: int, columns: int = 0):
+    """
+    Put fake 'yum', 'dnf', pass-through 'sudo' and 'rpm' with empty rpmdb in front of PATH
+    :param packages: number of packages in the fake repository
+    :param columns: terminal width of the fake yum output, no wrapping if 0
+    """
+    saved = dict(os.environ)
+    with tempfile.TemporaryDirectory() as bin_dir:
+        for tool in ('yum', 'dnf'):
+            write_script(os.path.join(bin_dir, tool), f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_YUM}" "$@"\n')
+        write_script(os.path.join(bin_dir, 'sudo'), '#!/bin/sh\nexec "$@"\n')
+        write_script(os.path.join(bin_dir, 'rpm'), '#!/bin/sh\nexit 0\n')
+        os.environ['PATH'] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+        os.environ['FAKE_YUM_PACKAGES'] = str(packages)
+        os.environ['FAKE_YUM_COLUMNS'] = str(columns)
+        try:
+            yield bin_dir
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+
+
+def create_dependency_repo(repo_dir: str, packages: list):
+    """
+    Create yum-like repository cache with primary sqlite database, where every package provides a library,
+    requires libraries of two other packages and /bin/sh, provided by the first package
+    :param repo_dir: repository cache directory
+    :param packages: list of tuples returned by generate_packages()
+    """
+    os.makedirs(repo_dir)
+    with open(os.path.join(repo_dir, 'repomd.xml'), 'w') as f:
+        f.write('<repomd xmlns="http://linux.duke.edu/metadata/repo"><data type="primary_db">'
+                '<location href="repodata/primary.sqlite.bz2"/></data></repomd>\n')
+    connection = sqlite3.connect(os.path.join(repo_dir, 'primary.sqlite'))
+    connection.execute("CREATE TABLE packages (pkgKey INTEGER PRIMARY KEY, name TEXT, arch TEXT, epoch TEXT, "
+                       "version TEXT, release TEXT, summary TEXT, size_package INTEGER, size_installed INTEGER)")
+    for table in ('provides', 'requires'):
+        connection.execute(f"CREATE TABLE {table} (name TEXT, flags TEXT, epoch TEXT, version TEXT, release TEXT, "
+                           f"pkgKey INTEGER)")
+    connection.execute("CREATE TABLE files (name TEXT, type TEXT, pkgKey INTEGER)")
+    count = len(packages)
+    rows = []
+    provides = []
+    requires = []
+    for i, (name, arch, version, _, summary, _) in enumerate(packages):
+        epoch, _, version_release = version.rpartition(':')
+        version, release = version_release.split('-', 1)
+        rows.append((i + 1, name, arch, epoch or '0', version, release, summary, 1000 + i % 5000, 3000 + i % 20000))
+        provides.append((f"lib{name}.so.1()(64bit)", None, None, None, None, i + 1))
+        provides.append((name, 'EQ', epoch or '0', version, release, i + 1))
+        for other in (i * 7 + 1) % count, (i * 13 + 2) % count:
+            requires.append((f"lib{packages[other][0]}.so.1()(64bit)", None, None, None, None, i + 1))
+        requires.append(('/bin/sh', None, None, None, None, i + 1))
+    connection.executemany("INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    connection.executemany("INSERT INTO provides VALUES (?, ?, ?, ?, ?, ?)", provides)
+    connection.executemany("INSERT INTO requires VALUES (?, ?, ?, ?, ?, ?)", requires)
+    connection.execute("INSERT INTO files VALUES ('/bin/sh', 'file', 1)")
+    connection.commit()
+    connection.close()
+
+
+def resolve(cache_root: str, packages: list) -> int:
+    """
+    Index repository metadata and compute dependency closure of the packages
+    :return: number of indexed packages
+    """
+    index = DependencyIndex.from_repodata(RepodataReader([cache_root]))
+    DependencyResolver(index).resolve(packages)
+    return len(index)
+
+
+def build_search_index(cache_root: str) -> SearchIndex:
+    """
+    :return: SearchIndex of repository metadata without results cache, so that every search is measured
+    """
+    index = SearchIndex(RepodataReader([cache_root]), check_interval=3600, cache_size=0)
+    index.refresh()
+    return index
+
+
+def measure(function, repeat: int) -> dict:
+    """
+    Run function several times, then once more under tracemalloc to find peak Python memory
+    :param function: benchmarked function, returns number of processed items
+    :param repeat: number of timed runs
+    :return: dictionary of measurements
+    """
+    timings = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = function()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    median = statistics.median(timings)
+    return {
+        'seconds': median,
+        'min_seconds': min(timings),
+        'items': items,
+        'items_per_second': items / median if median else None,
+        'peak_memory': peak_memory,
+    }
+
+
+def parse_packages(rows: list) -> PackageTable:
+    """
+    Parse "Name.Arch Version Repo" rows of 'yum list' one by one into Package objects,
+    the baseline of the single-pass parse_list()
+    :return: PackageTable of parsed packages
+    """
+    return PackageTable(Package(package_info=package_info) for package_info in rows)
+
+
+def list_sections_output(packages: list, columns: int) -> list:
+    """
+    'yum list' output having every section parse_list() handles:
+    installed, available, extra, updated, obsoleting and obsoleted packages
+    """
+    lines = list(HEADER)
+    for selection in ('all', 'extras', 'updates', 'obsoletes'):
+        lines += list_output(packages, [selection], columns)[1][len(HEADER):]
+    return lines
+
+
+def run_size(size: int, repeat: int, columns: int, install_count: int, batch_size: int) -> dict:
+    """
+    Run all benchmarks for a single repository size
+    :return: dictionary of measurements, keyed by benchmark name
+    """
+    results = {}
+    _, lines = list_output(generate_packages(size), [])
+    rows = [line for line in lines if not line.startswith((' ', 'Loaded', 'Loading', 'Installed', 'Available'))]
+    results['parse'] = measure(lambda: len(parse_packages(rows)), repeat)
+    # Items of parse_list are output lines, including wrapped ones
+    lines = list_sections_output(generate_packages(size), columns)
+    results['parse_list'] = measure(lambda: deque(parse_list(lines), maxlen=0) or len(lines), repeat)
+
+    with tempfile.TemporaryDirectory() as cache_root:
+        packages = generate_packages(size)
+        create_dependency_repo(os.path.join(cache_root, 'base'), packages)
+        requested = [name for name, _, _, _, _, _ in packages[:100]]
+        results['resolve'] = measure(lambda: resolve(cache_root, requested), repeat)
+        # Native search index, results cache is disabled to measure lookups
+        results['search_index_build'] = measure(lambda: len(build_search_index(cache_root)), 1)
+        index = build_search_index(cache_root)
+        for name, terms in SEARCH_QUERIES.items():
+            results[name] = measure(lambda: len(index.search_rows(terms)), repeat)
+
+    installer = RpmInstaller('yum')
+    with fake_environment(size, columns):
+        results['list'] = measure(lambda: sum(len(table) for table in installer.list()), repeat)
+        results['list_pattern'] = measure(lambda: sum(len(table) for table in installer.list(['lib*', 'samba1*'])),
+                                          repeat)
+        results['search'] = measure(lambda: len(installer.search('samba')), repeat)
+        # Every 4th package is installed by fake yum, take the rest
+        packages = [name for name, _, _, _, _, installed in generate_packages(min(size, install_count * 2))
+                    if not installed][:install_count]
+        results['install_list'] = measure(lambda: len(installer.install_list(packages, batch_size=batch_size)),
+                                          repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """
+    Print timing ratios of the current results to the baseline
+    :param results: current results
+    :param baseline: previous results
+    :param threshold: allowed slowdown, e.g. 0.2 for 20%
+    :return: number of regressions
+    """
+    regressions = 0
+    print(f"{'benchmark':<30}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for key, current in sorted(results['results'].items()):
+        previous = baseline.get('results', {}).get(key)
+        if previous is None or not previous['seconds']:
+            continue
+        ratio = current['seconds'] / previous['seconds']
+        regressed = ratio > 1 + threshold
+        regressions += regressed
+        print(f"{key:<30}{previous['seconds']:>12.4f}{current['seconds']:>12.4f}{ratio:>8.2f}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    """
+    Run benchmarks, save and compare results
+    :return: system exit code, 1 if some benchmark regressed
+    """
+    parser = argparse.ArgumentParser(description='Command-line params')
+    parser.add_argument('--sizes',
+                        help='Repository sizes (number of packages) to benchmark',
+                        nargs='+',
+                        type=int,
+                        default=DEFAULT_SIZES,
+                        required=False)
+    parser.add_argument('--repeat',
+                        help='Number of timed runs of every benchmark',
+                        type=int,
+                        default=3,
+                        required=False)
+    parser.add_argument('--columns',
+                        help='Terminal width of fake yum output, long lines are wrapped; no wrapping if 0',
+                        type=int,
+                        default=80,
+                        required=False)
+    parser.add_argument('--install-count',
+                        help='Number of packages installed by install_list benchmark',
+                        type=int,
+                        default=200,
+                        required=False)
+    parser.add_argument('--batch-size',
+                        help='Number of packages installed in one transaction, all at once by default',
+                        type=int,
+                        default=None,
+                        required=False)
+    parser.add_argument('--output',
+                        help='Save results to JSON file',
+                        required=False)
+    parser.add_argument('--compare',
+                        help='Compare results with JSON file of a previous run',
+                        required=False)
+    parser.add_argument('--threshold',
+                        help='Allowed slowdown comparing to the previous run',
+                        type=float,
+                        default=0.2,
+                        required=False)
+
+    args = parser.parse_args()
+    results = {
+        'version': VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': {},
+    }
+    for size in args.sizes:
+        for name, measurement in run_size(size, args.repeat, args.columns, args.install_count,
+                                          args.batch_size).items():
+            key = f"{name}/{size}"
+            results['results'][key] = measurement
+            print(f"{key:<30}{measurement['seconds']:>10.4f} s{measurement['items_per_second'] or 0:>14.0f} items/s"
+                  f"{measurement['peak_memory'] / 2 ** 20:>10.1f} MiB")
+    # Peak RSS of fake yum processes, kilobytes on Linux
+    results['children_max_rss'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+###########################################################################
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Startup time benchmark of yum-wrapper command line, based on 'python -X importtime'.
+Every scenario imports what the command needs in a fresh interpreter, import time of modules
+the bare interpreter doesn't load is summed up and checked against the scenario budget:
+python benchmark/startup_benchmark.py --repeat 7 --output startup.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+SOURCE_DIR = os.path.join(PROJECT_DIR, "src")
+
+# Scenario name, Python statement run with -X importtime, budget in milliseconds
+SCENARIOS = {
+    # 'yum-wrapper --help': only the parser
+    'help': ("from yum_wrapper import cli; cli.create_parser().format_help()", 40),
+    # 'yum-wrapper list/search/plan' served from the result cache
+    'query': ("from yum_wrapper import cli, rpm_installer, result_cache, manifest, rpmdb", 90),
+}
+# Modules which must not be imported by a scenario, they are loaded only by the commands needing them
+FORBIDDEN = {
+    'help': {'yum_wrapper.rpm_installer', 'subprocess', 'json'},
+    'query': {'yum_wrapper.repodata', 'yum_wrapper.prefetch', 'urllib.request', 'concurrent.futures', 'sqlite3', 'tempfile'},
+}
+
+
+def importtime_lines(output: str):
+    """
+    :param output: stderr of 'python -X importtime'
+    :return: generator of (cumulative time in microseconds, nesting level, module name), top level is 1
+    """
+    for line in output.splitlines():
+        fields = line[len('import time:'):].split('|') if line.startswith('import time:') else []
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        yield int(fields[1]), len(name) - len(name.lstrip(' ')), name.strip()
+
+
+def parse_importtime(output: str) -> dict:
+    """
+    :param output: stderr of 'python -X importtime'
+    :return: dictionary of top-level imported module and its cumulative import time in microseconds,
+             modules imported by other modules are included in their importer time
+    """
+    return {name: time for time, level, name in importtime_lines(output) if level == 1}
+
+
+def imported_modules(output: str) -> set:
+    """
+    :param output: stderr of 'python -X importtime'
+    :return: names of all imported modules, including nested imports
+    """
+    return {name for _, _, name in importtime_lines(output)}
+
+
+def run_importtime(statement: str) -> str:
+    """
+    Run statement in a fresh interpreter with package sources in sys.path
+    :return: stderr of the interpreter
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(path for path in (SOURCE_DIR, env.get('PYTHONPATH')) if path)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to run '{statement}': {process.stderr.splitlines()[-1:]}")
+    return process.stderr
+
+
+def measure(statement: str, repeat: int) -> dict:
+    """
+    Import time of a statement: modules of the bare interpreter are excluded, the best of repeated runs is taken
+    :return: dictionary with import time in milliseconds, slowest top-level modules and all imported modules
+    """
+    baseline = set(parse_importtime(run_importtime('pass')))
+    best = None
+    for _ in range(repeat):
+        output = run_importtime(statement)
+        modules = {name: time for name, time in parse_importtime(output).items() if name not in baseline}
+        total = sum(modules.values())
+        if best is None or total < best[0]:
+            best = total, modules, output
+    total, modules, output = best
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'milliseconds': total / 1000,
+        'slowest': {name: time / 1000 for name, time in slowest},
+        'modules': sorted(imported_modules(output) - baseline),
+    }
+
+
+def main():
+    """
+    Run startup scenarios and check their budgets
+    :return: system exit code, 1 if any scenario is over budget or imports forbidden modules
+    """
+    parser = argparse.ArgumentParser(description='Command-line params')
+    parser.add_argument('--repeat',
+                        help='Number of runs of every scenario, the best one is taken',
+                        type=int,
+                        default=5,
+                        required=False)
+    parser.add_argument('--scale',
+                        help='Multiplier of the budgets, for slow machines',
+                        type=float,
+                        default=1.0,
+                        required=False)
+    parser.add_argument('--output',
+                        help='Save results to JSON file',
+                        required=False)
+
+    args = parser.parse_args()
+    results = {}
+    over_budget = False
+    for name, (statement, budget) in SCENARIOS.items():
+        result = measure(statement, args.repeat)
+        result['budget'] = budget * args.scale
+        forbidden = sorted(FORBIDDEN.get(name, set()).intersection(result['modules']))
+        results[name] = result
+        status = 'ok'
+        if result['milliseconds'] > result['budget']:
+            status = 'OVER BUDGET'
+            over_budget = True
+        if forbidden:
+            status = f"imports {', '.join(forbidden)}"
+            over_budget = True
+        slowest = ', '.join(f"{module} {time:.1f}" for module, time in result['slowest'].items())
+        print(f"{name:<10}{result['milliseconds']:>8.1f} ms  budget {result['budget']:.0f} ms  {status}  ({slowest})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if over_budget else 0
+
+
+###########################################################################
+if __name__ == '__main__':
+    sys.exit(main())
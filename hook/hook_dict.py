@@ -1,73 +1,304 @@
 import os
 import sys
+import json
+import fnmatch
+import hashlib
 import platform
 import getpass
-from pathlib import Path
+import tempfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+from concurrent.futures import ThreadPoolExecutor
 
 __doc__ = """Execute IDEA dictionaries synchronization.
 Applicable to all IDEA-like projects (PyCharm, WebStorm etc).
 Could be implemented as a pre-commit hook.
 """
-PYTHON = "python3"
 
+# Directories never searched for dictionaries, extended with HOOK_DICT_PRUNE variable (os.pathsep-separated globs)
+DEFAULT_PRUNE = ['.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv', '.tox', '.nox',
+                 '.mypy_cache', '.pytest_cache', '.ruff_cache', 'site-packages', 'build', 'dist', 'target',
+                 'cmake-build-*', '*.egg-info']
 
-def is_linux():
+
+def environment_value(environment_name):
     """
-    :return: True if system is Linux, False otherwise
+    :param environment_name: Name of the environment variable
+    :return: Value of the environment variable or the empty string if not exists
     """
-    return platform.system() == 'Linux'
+    try:
+        return os.environ[environment_name]
+    except KeyError:
+        return ''
 
 
-def is_macos():
+def platform_system():
     """
-    :return: True if system is macOS, False otherwise
+    :return: 
     """
-    return platform.system() == 'Darwin'
+    return platform.system()
 
 
-def is_windows():
+def prune_list():
     """
-    :return: True if system is Windows, False otherwise
+    :return: Glob patterns of directory names, which are not searched
     """
-    return platform.system() == 'Windows'
+    extra = environment_value("HOOK_DICT_PRUNE")
+    return DEFAULT_PRUNE + [pattern for pattern in extra.split(os.pathsep) if pattern]
 
 
-if is_macos() or is_linux():
-    PYTHON = "python3"
-elif is_windows():
-    PYTHON = "python"
+def location_cache_file():
+    """
+    :return: Path to the persisted cache of scanned directories
+    """
+    cache_home = environment_value("XDG_CACHE_HOME") or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'hook_dict', 'locations.json')
 
 
-# merge_command += " ".join([merge_command + (" --idea-dictionary %s" % d) for d in dictionaries])
-def environment_value(environment_name):
+def load_location_cache(cache_file):
     """
-    :param environment_name: Name of the environment variable
-    :return: Value of the environment variable or the empty string if not exists
+    :param cache_file: Path to the cache file
+    :return: Dictionary of cached scans, empty if the cache is missing or broken
     """
     try:
-        return os.environ[environment_name]
-    except KeyError:
-        return ''
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
 
-def platform_system():
+def save_location_cache(cache_file, cache):
     """
-    :return: 
+    Atomically write the cache file
     """
-    return platform.system()
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_file), prefix='.locations')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cache, f)
+        os.replace(temp_path, cache_file)
+    except BaseException:
+        os.remove(temp_path)
+        raise
 
 
-def files_with_compare(root_folder, file_name):
+def scan_directory(directory, file_name, prune, cached):
+    """
+    Scan a single directory, unless it's not changed since the cached scan.
+    Directory mtime changes when its entries are added, removed or renamed, so unchanged mtime means
+    the same subdirectories and the same presence of the dictionary file
+    :param directory: Directory to scan
+    :param file_name: Dictionary file name
+    :param prune: Glob patterns of directory names, which are not searched
+    :param cached: Cached scan [mtime, found, subdirectories] or None
+    :return: Scan [mtime, found, subdirectories], or None if directory is not accessible
     """
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+    if cached is not None and cached[0] == mtime:
+        return cached
+    found = False
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name == file_name and entry.is_file():
+                    found = True
+                elif entry.is_dir(follow_symlinks=False) and \
+                        not any(fnmatch.fnmatch(entry.name, pattern) for pattern in prune):
+                    subdirs.append(entry.name)
+    except OSError:
+        return None
+    return [mtime, found, sorted(subdirs)]
+
+
+def files_with_compare(root_folder, file_name, prune=None, cache_file=None, workers=None):
+    """
+    Find all files with the given name in directory tree.
+    Directories are scanned in parallel with os.scandir, pruned directories are skipped,
+    and scans are cached between runs, so that only changed directories are scanned again
     :param root_folder: Directory root project, where from we start looking for dictionaries
     :param file_name: Dictionary file name (should be the same for all IDEA projects)
+    :param prune: Glob patterns of directory names, which are not searched, prune_list() if None
+    :param cache_file: Persisted cache of scanned directories, location_cache_file() if None
+    :param workers: Number of parallel scanners
     :return: List of paths to all dictionaries, including file name
     """
-    dictionaries = []
     print("Look for %s in %s" % (file_name, root_folder))
-    for path in Path(root_folder).rglob(file_name):
-        dictionaries.append(str(path))
-    return dictionaries
+    if not root_folder or not os.path.isdir(root_folder):
+        return []
+    prune = prune if prune is not None else prune_list()
+    cache_file = cache_file if cache_file is not None else location_cache_file()
+    root_folder = os.path.abspath(root_folder)
+    key = "%s|%s|%s" % (root_folder, file_name, os.pathsep.join(sorted(prune)))
+    cache = load_location_cache(cache_file)
+    previous = cache.get(key, {})
+    scans = {}
+    dictionaries = []
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as executor:
+        level = [root_folder]
+        while level:
+            results = executor.map(lambda directory: scan_directory(directory, file_name, prune,
+                                                                    previous.get(directory)), level)
+            next_level = []
+            for directory, scan in zip(level, results):
+                if scan is None:
+                    continue
+                scans[directory] = scan
+                if scan[1]:
+                    dictionaries.append(os.path.join(directory, file_name))
+                next_level += [os.path.join(directory, subdir) for subdir in scan[2]]
+            level = next_level
+    if scans != previous:
+        cache[key] = scans
+        try:
+            save_location_cache(cache_file, cache)
+        except OSError as e:
+            print("Failed to save location cache: %s" % e)
+    return sorted(dictionaries)
+
+
+def dictionary_state_file():
+    """
+    :return: Path to the file with content hash of dictionaries after the last merge
+    """
+    return os.path.join(os.path.dirname(location_cache_file()), 'state.json')
+
+
+def read_idea_dictionary(path):
+    """
+    Stream-parse IDEA dictionary XML: <component><dictionary name="user"><words><w>word</w>...
+    :param path: Path to the dictionary
+    :return: Tuple of dictionary name and set of words
+    """
+    name = None
+    words = set()
+    for event, element in ElementTree.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            if element.tag == 'dictionary' and name is None:
+                name = element.get('name')
+        elif element.tag == 'w':
+            if element.text and element.text.strip():
+                words.add(element.text.strip())
+            element.clear()
+    return name, words
+
+
+def read_vassist_dictionary(path):
+    """
+    :param path: Path to Visual Assist UserWords.txt, one word per line
+    :return: Set of words
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def idea_dictionary_content(name, words):
+    """
+    :return: IDEA dictionary XML with sorted words, as bytes
+    """
+    lines = ['<component name="ProjectDictionaryState">',
+             '  <dictionary name=%s>' % quoteattr(name or get_username()),
+             '    <words>']
+    lines += ['      <w>%s</w>' % escape(word) for word in sorted(words)]
+    lines += ['    </words>', '  </dictionary>', '</component>', '']
+    return '\n'.join(lines).encode('utf-8')
+
+
+def vassist_dictionary_content(words):
+    """
+    :return: UserWords.txt content with sorted words, as bytes
+    """
+    return ''.join('%s\n' % word for word in sorted(words)).encode('utf-8')
+
+
+def write_if_changed(path, content):
+    """
+    Atomically replace file content, unless it's the same already
+    :param path: Path to the file
+    :param content: New content as bytes
+    :return: True if the file has been written
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.dictionary')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return True
+
+
+def dictionaries_hash(paths):
+    """
+    :param paths: Paths to all merged dictionaries
+    :return: Hash of the dictionaries paths and content
+    """
+    digest = hashlib.sha256()
+    for path in sorted(set(paths)):
+        digest.update(path.encode('utf-8') + b'\0')
+        try:
+            with open(path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            digest.update(b'missing')
+    return digest.hexdigest()
+
+
+def merge_dictionaries(idea_dictionaries, vassist_dictionaries, state_file=None):
+    """
+    Merge words of all IDEA and Visual Assist dictionaries and write them back to every dictionary.
+    Merge is skipped if no dictionary has been changed since the last merge,
+    and only dictionaries with different content are written
+    :param idea_dictionaries: Paths to IDEA XML dictionaries
+    :param vassist_dictionaries: Paths to Visual Assist UserWords.txt dictionaries
+    :param state_file: File with the hash of dictionaries after the last merge, dictionary_state_file() if None
+    :return: Number of written dictionaries
+    """
+    state_file = state_file if state_file is not None else dictionary_state_file()
+    idea_dictionaries = list(dict.fromkeys(idea_dictionaries))
+    vassist_dictionaries = list(dict.fromkeys(vassist_dictionaries))
+    paths = idea_dictionaries + vassist_dictionaries
+    state = load_location_cache(state_file)
+    if state.get('hash') == dictionaries_hash(paths):
+        print("Dictionaries are not changed since the last merge")
+        return 0
+    words = set()
+    idea_names = {}
+    for path in idea_dictionaries:
+        try:
+            idea_names[path], idea_words = read_idea_dictionary(path)
+        except (OSError, ElementTree.ParseError) as e:
+            print("Failed to read %s: %s" % (path, e))
+            continue
+        words |= idea_words
+    for path in vassist_dictionaries:
+        try:
+            words |= read_vassist_dictionary(path)
+        except (OSError, UnicodeDecodeError) as e:
+            print("Failed to read %s: %s" % (path, e))
+    written = 0
+    for path, name in idea_names.items():
+        written += write_if_changed(path, idea_dictionary_content(name, words))
+    vassist_content = vassist_dictionary_content(words)
+    for path in vassist_dictionaries:
+        if os.path.isfile(path):
+            written += write_if_changed(path, vassist_content)
+    print("Merged %d words, %d dictionaries updated" % (len(words), written))
+    try:
+        save_location_cache(state_file, {'hash': dictionaries_hash(paths)})
+    except OSError as e:
+        print("Failed to save dictionaries state: %s" % e)
+    return written
 
 
 def debug_exit():
@@ -118,14 +349,9 @@ def main():
 
     print("Personal IDEA dictionary location %s" % dictionaries_project)
 
-    python_script = os.path.join(dictionaries_project, "dictionary_merge.py")
     personal_idea_dict = os.path.join(dictionaries_project, f"idea/{idea_user_dictionary}")
     personal_vassist_dict = os.path.join(dictionaries_project, "vassist/Dict/UserWords.txt")
 
-    if not os.path.isfile(python_script):
-        print("Python dictionary merge script is not found, exiting hook")
-        sys.exit(0)
-
     if not os.path.isfile(personal_vassist_dict) or not os.path.isfile(personal_idea_dict):
         print("Python dictionary file is not found, exiting hook")
         sys.exit(0)
@@ -137,14 +363,8 @@ def main():
         print("Only %d dictionaries has been found, nothing to merge" % len(idea_dictionaries))
         return 0
 
-    merge_command = "%s %s --vassist-dict %s" % (PYTHON, python_script, personal_vassist_dict)
-
-    for dictionary in idea_dictionaries:
-        merge_command = merge_command + (" --idea-dictionary %s" % dictionary)
-    for dictionary in vassist_dictionaries:
-        merge_command = merge_command + (" --vassist-dictionary %s" % dictionary)
-
-    return os.system(merge_command)
+    merge_dictionaries([personal_idea_dict] + idea_dictionaries, [personal_vassist_dict] + vassist_dictionaries)
+    return 0
 
 
 ###########################################################################
@@ -4,12 +4,22 @@ import sys
 import argparse
 import platform
 import json
+import hashlib
+from importlib import metadata
 from subprocess import run
-from src.extract_version.version import VERSION
 
 PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__))))
+sys.path.append(os.path.join(PROJECT_DIR, "src", "yum_wrapper"))
+# noinspection PyUnresolvedReferences,PyPackageRequirements
+from version import VERSION
+
 PYTHON = "python3"
 PIP = "pip3"
+# Build inputs besides the src tree
+BUILD_FILES = ['setup.py', 'setup.cfg', 'pyproject.toml', 'README.md']
+# Cached virtual environment with build tools
+BUILD_VENV = os.path.join(PROJECT_DIR, '.build-venv')
+BUILD_REQUIREMENTS = ['pip', 'setuptools>=42', 'wheel', 'build', 'twine']
 
 
 def is_linux():
@@ -55,6 +65,102 @@ def targz_path():
     return os.path.join(PROJECT_DIR, 'dist', 'yum_wrapper-{}.tar.gz'.format(VERSION))
 
 
+def source_hash(project_dir=PROJECT_DIR):
+    """
+    :param project_dir: Project root directory
+    :return: SHA-256 of paths and content of all build inputs: src tree and packaging files
+    """
+    files = [os.path.join(project_dir, name) for name in BUILD_FILES]
+    for root, dirs, names in os.walk(os.path.join(project_dir, 'src')):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__' and not d.endswith('.egg-info'))
+        files += [os.path.join(root, name) for name in names if not name.endswith(('.pyc', '.pyo'))]
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        if not os.path.isfile(path):
+            continue
+        digest.update(os.path.relpath(path, project_dir).replace(os.sep, '/').encode('utf-8') + b'\0')
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def build_hash_path():
+    """
+    :return: Path to the file with source hash of the built artifacts
+    """
+    return os.path.join(PROJECT_DIR, 'dist', 'yum_wrapper-{}.build-hash'.format(VERSION))
+
+
+def installed_hash_path():
+    """
+    :return: Path to the file with source hash of the installed package
+    """
+    return os.path.join(PROJECT_DIR, 'dist', '.installed-hash')
+
+
+def read_hash(path):
+    """
+    :return: Hash saved in the file, None if there is no file
+    """
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def write_hash(path, value):
+    """
+    Save hash to the file
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(value)
+
+
+def is_built(current_hash):
+    """
+    :return: True if wheel and sdist of the current version are built from the sources with the same hash
+    """
+    return os.path.isfile(wheel_path()) and os.path.isfile(targz_path()) and \
+        read_hash(build_hash_path()) == current_hash
+
+
+def is_installed(current_hash):
+    """
+    :return: True if the current version is installed from the sources with the same hash
+    """
+    try:
+        installed_version = metadata.version('yum-wrapper')
+    except metadata.PackageNotFoundError:
+        return False
+    return installed_version == VERSION and read_hash(installed_hash_path()) == current_hash
+
+
+def venv_python():
+    """
+    :return: Python executable of the build virtual environment
+    """
+    if is_windows():
+        return os.path.join(BUILD_VENV, 'Scripts', 'python.exe')
+    return os.path.join(BUILD_VENV, 'bin', 'python')
+
+
+def ensure_build_venv():
+    """
+    Create virtual environment with build tools once, and reuse it while the requirements are the same
+    :return: Python executable of the build virtual environment
+    """
+    marker = os.path.join(BUILD_VENV, '.requirements')
+    requirements = '\n'.join(BUILD_REQUIREMENTS)
+    if os.path.isfile(venv_python()) and read_hash(marker) == requirements:
+        return venv_python()
+    run([PYTHON, '-m', 'venv', BUILD_VENV], check=True)
+    run([venv_python(), '-m', 'pip', 'install', '--upgrade'] + BUILD_REQUIREMENTS, check=True)
+    write_hash(marker, requirements)
+    return venv_python()
+
+
 def uninstall_wheel():
     """
     pip.exe uninstall -y yum-wrapper
@@ -62,23 +168,30 @@ def uninstall_wheel():
     run([PIP, 'uninstall', '-y', 'yum-wrapper'])
 
 
-def build_wheel():
+def build_wheel(force=False):
     """
-    python.exe -m pip install --upgrade pip
-    python.exe -m pip install --upgrade build
-    python.exe -m build
+    Build sdist and wheel in the cached build environment, unless they are built from the same sources
+    .build-venv/bin/python -m build --no-isolation
+    :param force: Build even if the artifacts are up to date
+    :return: Source hash of the artifacts
     """
-    run([PYTHON, '-m', 'pip', 'install', '--upgrade', 'pip'])
-    run([PYTHON, '-m', 'pip', 'install', '--upgrade', 'build'])
-    run([PYTHON, '-m', 'pip', 'install', 'twine'])
-    run([PYTHON, '-m', 'build'])
+    current_hash = source_hash()
+    if not force and is_built(current_hash):
+        print("Package {} is up to date, build skipped".format(VERSION))
+        return current_hash
+    cleanup_old_wheels()
+    run([ensure_build_venv(), '-m', 'build', '--no-isolation'], cwd=PROJECT_DIR, check=True)
+    write_hash(build_hash_path(), current_hash)
+    return current_hash
 
 
-def install_wheel():
+def install_wheel(current_hash):
     """
     pip.exe install ./dist/yum_wrapper-{VERSION}-py3-none-any.whl
+    :param current_hash: Source hash of the wheel
     """
-    run([PIP, 'install', wheel_path()])
+    run([PIP, 'install', '--force-reinstall', '--no-deps', wheel_path()], check=True)
+    write_hash(installed_hash_path(), current_hash)
 
 
 def cleanup_old_wheels():
@@ -129,7 +242,7 @@ def create_release(release_file):
     run(['gh', 'release', 'create', 'release.{}'.format(VERSION), wheel_path(), targz_path(),
          '--title', '{}'.format(VERSION),
          '--notes-file', release_file])
-    run('twine', 'upload', 'dist/*')
+    run([ensure_build_venv(), '-m', 'twine', 'upload', wheel_path(), targz_path()])
 
 
 def tmp_release_notes(version):
@@ -157,6 +270,10 @@ def main():
                         choices=["build", "install", "reinstall", "uninstall"],
                         default="reinstall",
                         required=False)
+    parser.add_argument('--force',
+                        help='Build and install even if nothing has been changed',
+                        action='store_true',
+                        required=False)
     parser.add_argument('--upload-s3',
                         help='Upload the package to S3',
                         action='store_true',
@@ -168,18 +285,20 @@ def main():
     args = parser.parse_args()
 
     if args.mode == "build":
-        build_wheel()
-    elif args.mode == "install":
-        cleanup_old_wheels()
-        build_wheel()
-        install_wheel()
-    elif args.mode == "reinstall":
-        cleanup_old_wheels()
-        uninstall_wheel()
-        build_wheel()
-        install_wheel()
+        build_wheel(force=args.force)
+    elif args.mode in ("install", "reinstall"):
+        current_hash = source_hash()
+        if not args.force and is_installed(current_hash):
+            print("Package {} is already installed from the same sources".format(VERSION))
+        else:
+            current_hash = build_wheel(force=args.force)
+            if args.mode == "reinstall":
+                uninstall_wheel()
+            install_wheel(current_hash)
     elif args.mode == "uninstall":
         uninstall_wheel()
+        if os.path.isfile(installed_hash_path()):
+            os.remove(installed_hash_path())
     else:
         print("Unknown mode")
 
@@ -78,4 +78,9 @@ setup(
     package_data={PACKAGE_NAME: ['defaults/*']},
     python_requires=">=3.8",
     install_requires=DEPENDENCIES,
+    entry_points={
+        'console_scripts': [
+            'yum-wrapper = yum_wrapper.cli:main',
+        ],
+    },
 )
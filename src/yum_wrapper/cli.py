@@ -0,0 +1,320 @@
+"""yum-wrapper command line: install, list, search, plan and resolve subcommands.
+Only argparse is imported on startup, modules of a subcommand are imported when it runs,
+so that '--help' and cached queries don't pay for the code they don't use
+"""
+import os
+import sys
+import argparse
+
+
+def default_packagefile():
+    """
+    :return: Path to Packagefile in the user home directory
+    """
+    return os.path.join(os.path.expanduser('~'), 'Packagefile')
+
+
+def create_installer(args, installroot: str = None):
+    """
+    Create RpmInstaller configured by the common command line options
+    :param args: parsed command line
+    :param installroot: root directory of the installation, the host if None
+    :return: RpmInstaller
+    """
+    from .rpm_installer import RpmInstaller, native_repodata
+    from .result_cache import ResultCache
+    from .manifest import ManifestCache
+    from .rpmdb import root_rpmdb_dirs
+    return RpmInstaller(args.tool,
+                        cache=None if args.no_cache else ResultCache(
+                            rpmdb_dirs=root_rpmdb_dirs(installroot) if installroot else None),
+                        repodata=native_repodata() if args.native else None,
+                        shell_sessions=args.shell_sessions,
+                        installroot=installroot,
+                        manifest_cache=None if args.no_cache else ManifestCache())
+
+
+def requested_packages(args, installer) -> list:
+    """
+    :return: packages from the command line, or from the package file if there are none
+    """
+    if args.packages:
+        return args.packages
+    from .manifest import load_manifest
+    return load_manifest(args.file, cache=installer.manifest_cache)
+
+
+def print_failed(report: dict) -> int:
+    """
+    :param report: dictionary of package and its install return code
+    :return: system exit code
+    """
+    failed = [package for package, ret_code in report.items() if ret_code != 0]
+    if failed:
+        print(f"Failed to install: {failed}")
+        return 1
+    return 0
+
+
+def run_install(args) -> int:
+    """
+    Install packages from the command line or from the package file
+    """
+    if args.installroot and len(args.installroot) > 1:
+        if args.packages:
+            print("Several install roots are installed from the package file only")
+            return 2
+        from .rpm_installer import install_roots, prefetcher
+        prefetch = prefetcher(args.tool, args.download_workers) if args.prefetch else None
+        results = install_roots(args.file, args.installroot, args.tool, workers=args.jobs,
+                                batch_size=args.batch_size, prefetch=prefetch)
+        failed = {installroot: [package for package, ret_code in report.items() if ret_code != 0]
+                  for installroot, report in results.items()}
+        failed = {installroot: packages for installroot, packages in failed.items() if packages}
+        if failed:
+            print(f"Failed to install: {failed}")
+            return 1
+        return 0
+    installer = create_installer(args, args.installroot[0] if args.installroot else None)
+    try:
+        prefetch = None
+        if args.prefetch:
+            from .rpm_installer import prefetcher
+            prefetch = prefetcher(args.tool, args.download_workers)
+        # Host installs wait for installs of the daemon and other yum-wrapper processes instead of the yum lock,
+        # an install root has its own yum lock
+        from contextlib import nullcontext
+        from .scheduler import HostLock
+        with nullcontext() if args.installroot else HostLock():
+            if args.packages:
+                report = installer.install_list(args.packages, batch_size=args.batch_size, prefetch=prefetch)
+            else:
+                report = installer.install_file(args.file, batch_size=args.batch_size, prefetch=prefetch)
+        return print_failed(report)
+    finally:
+        installer.close()
+
+
+def run_list(args) -> int:
+    """
+    List installed and available packages
+    """
+    installer = create_installer(args)
+    try:
+        installed, available = installer.list(args.packages or None, selection=args.selection, refresh=args.refresh)
+        print(f"Installed: {installed}")
+        print(f"Available: {available}")
+        return 0
+    finally:
+        installer.close()
+
+
+def run_search(args) -> int:
+    """
+    Search packages by name and summary
+    """
+    installer = create_installer(args)
+    try:
+        print(f"Found: {installer.search(' '.join(args.terms), refresh=args.refresh)}")
+        return 0
+    finally:
+        installer.close()
+
+
+def run_plan(args) -> int:
+    """
+    Print packages which are not installed yet, do not install them
+    """
+    installer = create_installer(args)
+    try:
+        packages = requested_packages(args, installer)
+        missing = installer.plan(packages, refresh=args.refresh)
+        print(f"Already installed: {len(packages) - len(missing)} of {len(packages)}")
+        print(f"To install: {missing}")
+        return 0
+    finally:
+        installer.close()
+
+
+def run_resolve(args) -> int:
+    """
+    Print packages which would be installed with all their dependencies, and their total size,
+    from repository metadata cache, without running yum
+    """
+    from .repodata import RepodataReader
+    from .manifest import ManifestCache, load_manifest
+    from .dependency_resolver import DependencyIndex, DependencyResolver, installed_provides
+    packages = args.packages or load_manifest(args.file, cache=None if args.no_cache else ManifestCache())
+    installed = None if args.no_installed else installed_provides(args.installroot)
+    resolution = DependencyResolver(DependencyIndex.from_repodata(RepodataReader(args.cache_root)),
+                                    installed).resolve(packages)
+    print(resolution)
+    return 1 if resolution.unresolved else 0
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """
+    :return: parser of yum-wrapper command line
+    """
+    parser = argparse.ArgumentParser(prog='yum-wrapper', description='Python wrapper for Yum package manager')
+    parser.add_argument('--version',
+                        help='Print version and exit',
+                        action='store_true',
+                        default=False,
+                        required=False)
+    parser.add_argument('--tool',
+                        help='Package manager to run',
+                        choices=['yum', 'dnf'],
+                        default='yum',
+                        required=False)
+    parser.add_argument('--native',
+                        help='Read available packages from yum/dnf metadata cache instead of running yum',
+                        action='store_true',
+                        default=False,
+                        required=False)
+    parser.add_argument('--no-cache',
+                        help='Do not use cached list results',
+                        action='store_true',
+                        default=False,
+                        required=False)
+    parser.add_argument('--shell-sessions',
+                        help='Run yum commands in N persistent yum shell sessions instead of a process per command',
+                        type=int,
+                        default=0,
+                        required=False)
+    parser.add_argument('--profile',
+                        help='Print time spent in every command and method call',
+                        action='store_true',
+                        default=False,
+                        required=False)
+    parser.add_argument('--metrics',
+                        help='Write command and method metrics to file, JSON if it ends with .json, Prometheus text otherwise',
+                        required=False)
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+
+    install = subparsers.add_parser('install', help='Install RPM packages')
+    install.set_defaults(handler=run_install)
+    install.add_argument('packages',
+                         help='Packages to install, packages from the package file if none',
+                         nargs='*')
+    install.add_argument('--file',
+                         help='Package file, ~/Packagefile by default',
+                         default=default_packagefile(),
+                         required=False)
+    install.add_argument('--batch-size',
+                         help='Number of packages installed in one transaction, all at once by default',
+                         type=int,
+                         default=None,
+                         required=False)
+    install.add_argument('--prefetch',
+                         help='Download packages in parallel before installing them in a single transaction',
+                         action='store_true',
+                         default=False,
+                         required=False)
+    install.add_argument('--download-workers',
+                         help='Number of parallel downloads of --prefetch',
+                         type=int,
+                         default=8,
+                         required=False)
+    install.add_argument('--installroot',
+                         help='Root directories to install into, several roots are installed concurrently',
+                         nargs='+',
+                         required=False)
+    install.add_argument('--jobs',
+                         help='Maximum number of roots installed concurrently, number of CPUs by default',
+                         type=int,
+                         default=None,
+                         required=False)
+
+    list_parser = subparsers.add_parser('list', help='List RPM packages')
+    list_parser.set_defaults(handler=run_list)
+    list_parser.add_argument('packages',
+                             help='Package names, wildcards are supported, all packages if none',
+                             nargs='*')
+    list_parser.add_argument('--selection',
+                             help='Selection of packages to list',
+                             choices=['installed', 'available', 'all'],
+                             default=None,
+                             required=False)
+
+    search = subparsers.add_parser('search', help='Search RPM packages by name and summary')
+    search.set_defaults(handler=run_search)
+    search.add_argument('terms',
+                        help='Search terms',
+                        nargs='+')
+
+    plan = subparsers.add_parser('plan', help='Print packages which are not installed yet')
+    plan.set_defaults(handler=run_plan)
+    plan.add_argument('packages',
+                      help='Packages to check, packages from the package file if none',
+                      nargs='*')
+    plan.add_argument('--file',
+                      help='Package file, ~/Packagefile by default',
+                      default=default_packagefile(),
+                      required=False)
+
+    resolve = subparsers.add_parser('resolve', help='Print packages to install with all their dependencies '
+                                                    'and their size, from repository metadata cache')
+    resolve.set_defaults(handler=run_resolve)
+    resolve.add_argument('packages',
+                         help='Packages to resolve, packages from the package file if none',
+                         nargs='*')
+    resolve.add_argument('--file',
+                         help='Package file, ~/Packagefile by default',
+                         default=default_packagefile(),
+                         required=False)
+    resolve.add_argument('--cache-root',
+                         help='yum/dnf metadata cache directories, /var/cache/dnf and /var/cache/yum by default',
+                         nargs='+',
+                         default=None,
+                         required=False)
+    resolve.add_argument('--installroot',
+                         help='Root directory whose installed packages satisfy dependencies, the host by default',
+                         required=False)
+    resolve.add_argument('--no-installed',
+                         help='Resolve as if nothing is installed, e.g. for a new image',
+                         action='store_true',
+                         default=False,
+                         required=False)
+
+    for subparser in (list_parser, search, plan):
+        subparser.add_argument('--refresh',
+                               help='Ignore cached results and update the cache',
+                               action='store_true',
+                               default=False,
+                               required=False)
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """
+    Entry point of yum-wrapper console script
+    :param argv: command line arguments, sys.argv if None
+    :return: system exit code
+    """
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.version:
+        from .version import VERSION
+        print(VERSION)
+        return 0
+    if args.command is None:
+        parser.print_help()
+        return 2
+    recorder = None
+    if args.profile or args.metrics:
+        from .instrumentation import MetricsRecorder, add_hook
+        recorder = MetricsRecorder()
+        add_hook(recorder)
+    try:
+        return args.handler(args)
+    finally:
+        if args.profile:
+            print(recorder.summary())
+        if args.metrics:
+            recorder.write(args.metrics)
+
+
+###########################################################################
+if __name__ == '__main__':
+    sys.exit(main())
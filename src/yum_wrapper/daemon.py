@@ -0,0 +1,276 @@
+"""Long-running yum_wrapper daemon, which keeps a warm RpmInstaller
+(loaded metadata, search index, installed set) and serves requests over a local UNIX socket.
+Protocol is a JSON object per line: {"method": "search", "params": {"package_name": "samba"}}
+Response is a JSON object per line: {"result": ...} or {"error": "message"}
+"""
+import os
+import sys
+import json
+import socket
+import argparse
+import tempfile
+import socketserver
+from .package_table import PackageTable
+from .rpm_installer import RpmInstaller
+from .result_cache import ResultCache
+from .repodata import RepodataReader
+from .manifest import load_manifest
+from .scheduler import HostLock, OperationScheduler
+from .log_helper import logger
+
+# Requests changing the system are coalesced and serialized by OperationScheduler, the rest are served concurrently
+MUTATING_METHODS = {'install', 'install_file'}
+READ_METHODS = {'ping', 'list', 'search', 'plan', 'upgrades'}
+
+
+def default_socket_path():
+    """
+    :return: Path to the daemon socket in the user runtime directory
+    """
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(), 'yum_wrapper.sock')
+
+
+def remove_stale_socket(socket_path: str):
+    """
+    Remove socket file left by a stopped daemon, the socket of a running daemon is kept
+    :param socket_path: path to the UNIX socket
+    :raise RuntimeError: if another daemon accepts connections on the socket
+    """
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except FileNotFoundError:
+        return
+    except ConnectionRefusedError:
+        logger.info(f"Removing stale socket {socket_path}")
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"Daemon is already running on {socket_path}")
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    """
+    Serve requests of a single client connection, one JSON request per line
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = {'result': self.server.dispatch(request['method'], request.get('params') or {})}
+            except Exception as e:
+                logger.warning(f"Request failed: {e}")
+                response = {'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b'\n')
+            self.wfile.flush()
+
+
+class YumWrapperDaemon(socketserver.ThreadingUnixStreamServer):
+    """
+    UNIX socket server around a warm RpmInstaller
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, installer: RpmInstaller, lock_path: str = None):
+        """
+        :param socket_path: path to the UNIX socket, stale socket file of a stopped daemon is replaced
+        :param installer: RpmInstaller serving the requests
+        :param lock_path: path to the host install lock file, default_lock_path() if None
+        :raise RuntimeError: if another daemon is serving on the socket
+        """
+        remove_stale_socket(socket_path)
+        self.installer = installer
+        self.scheduler = OperationScheduler(installer, lock=HostLock(lock_path))
+        # Daemon installs packages, so only its owner may talk to it. Socket is created with these permissions,
+        # as it accepts connections as soon as it is bound
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, DaemonHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        """
+        Close the socket, then finish queued installs
+        """
+        super().server_close()
+        self.scheduler.close()
+
+    def warm_up(self):
+        """
+        Load installed set, repository metadata and search index of the query installer before the first request
+        """
+        query_installer = self.scheduler.query_installer
+        query_installer.installed_packages()
+        if query_installer.search_index is not None:
+            query_installer.search_index.refresh(force=True)
+
+    def dispatch(self, method: str, params: dict):
+        """
+        Submit install request or read-only query to the scheduler. Queries run on its cache-only installer,
+        concurrently with each other and with install transactions
+        :param method: name of the request method
+        :param params: keyword arguments of the method
+        :return: JSON-serializable result
+        """
+        if method in MUTATING_METHODS:
+            return self._install(method, params)
+        if method in READ_METHODS:
+            return self._execute(method, params)
+        raise ValueError(f"Unknown method: {method}")
+
+    def _install(self, method: str, params: dict) -> dict:
+        """
+        Install packages through the scheduler, requests of concurrent clients are coalesced into one transaction.
+        Only packages of a package file which are not installed yet are installed, like RpmInstaller.install_file()
+        """
+        if method == 'install':
+            return self.scheduler.install_list(params['packages'], params.get('batch_size'))
+        packages = load_manifest(params['package_file'], cache=self.installer.manifest_cache)
+        missing = self.scheduler.submit_plan(packages).result()
+        logger.info(f"Packages to install: {missing}")
+        return self.scheduler.install_list(missing, params.get('batch_size'))
+
+    def _execute(self, method: str, params: dict):
+        """
+        Run the query by the scheduler and convert the result to JSON-serializable form
+        """
+        if method == 'ping':
+            return 'pong'
+        refresh = params.get('refresh', False)
+        if method == 'plan':
+            return self.scheduler.submit_plan(params['packages']).result()
+        if method == 'list':
+            installed, available = self.scheduler.submit_list(params.get('packages'), params.get('selection'),
+                                                              refresh=refresh).result()
+            return {'installed': installed.to_columns(), 'available': available.to_columns()}
+        if method == 'search':
+            return self.scheduler.submit_search(params['package_name'], refresh=refresh).result().to_columns()
+        if method == 'upgrades':
+            return self.scheduler.submit_upgrades(params.get('packages'), refresh=refresh).result().to_columns()
+        raise ValueError(f"Unknown method: {method}")
+
+
+class DaemonClient:
+    """
+    Thin client of yum_wrapper daemon
+    """
+
+    def __init__(self, socket_path: str = None, timeout: float = None):
+        """
+        :param socket_path: path to the daemon socket, default_socket_path() if None
+        :param timeout: socket timeout in seconds, installs may take long, so no timeout by default
+        """
+        self.socket_path = socket_path if socket_path is not None else default_socket_path()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(self.socket_path)
+        self._file = self._socket.makefile('rwb')
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def call(self, method: str, **params):
+        """
+        Send request to the daemon and wait for its response
+        :return: result of the request
+        """
+        self._file.write(json.dumps({'method': method, 'params': params}).encode("utf-8") + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise RuntimeError("Daemon closed connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"Daemon error: {response['error']}")
+        return response['result']
+
+    def list(self, packages: list = None, selection: str = None, refresh: bool = False) -> (PackageTable, PackageTable):
+        result = self.call('list', packages=packages, selection=selection, refresh=refresh)
+        return PackageTable.from_columns(result['installed']), PackageTable.from_columns(result['available'])
+
+    def search(self, package_name: str, refresh: bool = False) -> PackageTable:
+        return PackageTable.from_columns(self.call('search', package_name=package_name, refresh=refresh))
+
+    def install_list(self, packages: list, batch_size: int = None) -> dict:
+        return self.call('install', packages=packages, batch_size=batch_size)
+
+
+def main():
+    """
+    Run the daemon, or send a request to the running daemon
+    :return: system exit code
+    """
+    parser = argparse.ArgumentParser(description='Command-line params')
+    parser.add_argument('--serve',
+                        help='Run the daemon',
+                        action='store_true',
+                        default=False,
+                        required=False)
+    parser.add_argument('--socket',
+                        help='Path to the daemon UNIX socket',
+                        default=default_socket_path(),
+                        required=False)
+    parser.add_argument('--native',
+                        help='Read available packages from yum/dnf metadata cache instead of running yum',
+                        action='store_true',
+                        default=False,
+                        required=False)
+    parser.add_argument('--list',
+                        help='List RPM packages',
+                        nargs='+',
+                        required=False)
+    parser.add_argument('--search',
+                        help='Search RPM packages',
+                        required=False)
+    parser.add_argument('--install',
+                        help='Install RPM packages',
+                        nargs='+',
+                        required=False)
+
+    args = parser.parse_args()
+    if args.serve:
+        installer = RpmInstaller('yum', cache=ResultCache(), repodata=RepodataReader() if args.native else None)
+        server = YumWrapperDaemon(args.socket, installer)
+        server.warm_up()
+        logger.info(f"Serving on {args.socket}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.remove(args.socket)
+        return 0
+
+    with DaemonClient(args.socket) as client:
+        if args.list:
+            installed, available = client.list(args.list)
+            print(f"Installed: {installed}")
+            print(f"Available: {available}")
+        if args.search:
+            print(f"Found: {client.search(args.search)}")
+        if args.install:
+            report = client.install_list(args.install)
+            failed = [package for package, ret_code in report.items() if ret_code != 0]
+            if failed:
+                print(f"Failed to install: {failed}")
+                return 1
+    return 0
+
+
+###########################################################################
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,477 @@
+"""Offline dependency closure of a package list against repository metadata.
+Provides, requires and file provides of every repository package are indexed once,
+the closure is computed like yum does it, without running yum, so it works on cached or fixture metadata.
+Only files listed in primary metadata are indexed (binaries, /etc and the like), not the full filelists,
+so requirements of other files are reported unresolved
+"""
+import sys
+import sqlite3
+import xml.etree.ElementTree as ElementTree
+from .package import evr_string
+from .package_table import PackageTable
+from .package_matcher import WILDCARDS, PackageMatcher
+from .package_helper import execute_stream
+from .repodata import COMMON_NS, RepodataReader, open_compressed
+from .rpm_version import compare_versions, label_compare, split_evr
+from .yum_output import KNOWN_ARCHES
+from .log_helper import logger
+
+RPM_NS = '{http://linux.duke.edu/metadata/rpm}'
+# Sense bits of rpm dependency flags, same values as in rpm headers
+SENSE_LESS = 2
+SENSE_GREATER = 4
+SENSE_EQUAL = 8
+# Flags of repository metadata
+FLAGS = {'LT': SENSE_LESS, 'GT': SENSE_GREATER, 'EQ': SENSE_EQUAL,
+         'LE': SENSE_LESS | SENSE_EQUAL, 'GE': SENSE_GREATER | SENSE_EQUAL}
+# rpm features are provided by rpm itself, not by packages
+RPMLIB_PREFIX = 'rpmlib('
+# Installed packages, their provides and files, one per line: name.arch, flags and version separated by tabs,
+# provides in the same format, or file path
+RPM_PROVIDES_FORMAT = ('%{NAME}.%{ARCH}\\t8\\t%|EPOCH?{%{EPOCH}:}:{}|%{VERSION}-%{RELEASE}\\n'
+                       '[%{PROVIDENAME}\\t%{PROVIDEFLAGS}\\t%{PROVIDEVERSION}\\n][%{FILENAMES}\\n]')
+# Requirement of a package from the package file
+PACKAGEFILE = 'Packagefile'
+
+
+def parse_evr(epoch, version: str, release: str) -> tuple:
+    """
+    :return: tuple (epoch, version, release) for rpm_version.label_compare(), None if version is not set
+    """
+    if not version:
+        return None
+    return int(epoch) if epoch and str(epoch).isdigit() else 0, version, release or ''
+
+
+def format_requirement(name: str, flags: int, evr: tuple) -> str:
+    """
+    :return: requirement formatted like rpm does, e.g. "libc.so.6 >= 2.17"
+    """
+    if not flags or evr is None:
+        return name
+    operator = ('<' if flags & SENSE_LESS else '') + ('>' if flags & SENSE_GREATER else '') + \
+               ('=' if flags & SENSE_EQUAL else '')
+    epoch, version, release = evr
+    return f"{name} {operator} {f'{epoch}:' if epoch else ''}{version}{f'-{release}' if release else ''}"
+
+
+def overlaps(provide_flags: int, provide_evr: tuple, require_flags: int, require_evr: tuple) -> bool:
+    """
+    Check if provided version range overlaps the required one, like rpm does.
+    Unversioned provide or requirement matches any version, release is compared only if both sides have it
+    :return: True if the provide satisfies the requirement
+    """
+    if not require_flags or not provide_flags or require_evr is None or provide_evr is None:
+        return True
+    if not provide_evr[2] or not require_evr[2]:
+        provide_evr = provide_evr[0], provide_evr[1], ''
+        require_evr = require_evr[0], require_evr[1], ''
+    sense = label_compare(provide_evr, require_evr)
+    if sense < 0:
+        return bool(provide_flags & SENSE_GREATER or require_flags & SENSE_LESS)
+    if sense > 0:
+        return bool(provide_flags & SENSE_LESS or require_flags & SENSE_GREATER)
+    return bool(provide_flags & require_flags & (SENSE_EQUAL | SENSE_LESS | SENSE_GREATER))
+
+
+def _table_columns(connection, table: str) -> set:
+    """
+    :return: column names of sqlite table, empty set if there is no such table
+    """
+    return {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+
+
+def _dependencies(connection, table: str) -> dict:
+    """
+    Read dependencies from primary sqlite database
+    :param table: 'provides' or 'requires', rpmlib() requirements are skipped
+    :return: dictionary of package key and list of (name, flags, evr) tuples
+    """
+    columns = _table_columns(connection, table)
+    if not columns:
+        return {}
+    intern = sys.intern
+    flags_value = FLAGS.get
+    query = f"SELECT pkgKey, name, flags, epoch, version, release FROM {table} WHERE name NOT LIKE '{RPMLIB_PREFIX}%'"
+    dependencies = {}
+    for package_key, name, flags, epoch, version, release in connection.execute(query):
+        dependencies.setdefault(package_key, []).append(
+            (intern(name), flags_value(flags, 0), parse_evr(epoch, version, release) if version else None))
+    return dependencies
+
+
+def iter_primary_db(db_path: str):
+    """
+    Read packages with their dependencies from primary sqlite database.
+    Missing tables and size columns are tolerated, such packages provide only their own names
+    :param db_path: path to primary sqlite database
+    :return: generator of tuples (name, arch, evr, download size, installed size, provides, requires)
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        columns = _table_columns(connection, 'packages')
+        sizes = [column if column in columns else 'NULL' for column in ('size_package', 'size_installed')]
+        provides = _dependencies(connection, 'provides')
+        requires = _dependencies(connection, 'requires')
+        if _table_columns(connection, 'files'):
+            for package_key, name in connection.execute("SELECT pkgKey, name FROM files"):
+                provides.setdefault(package_key, []).append((name, 0, None))
+        query = f"SELECT pkgKey, name, arch, epoch, version, release, {', '.join(sizes)} FROM packages"
+        for package_key, name, arch, epoch, version, release, download_size, installed_size in \
+                connection.execute(query):
+            yield (name, sys.intern(arch), evr_string(epoch, version, release), download_size or 0,
+                   installed_size or 0, provides.get(package_key, []), requires.get(package_key, []))
+    finally:
+        connection.close()
+
+
+def _entries(format_element, tag: str) -> list:
+    """
+    :return: list of (name, flags, evr) tuples of rpm:provides or rpm:requires element
+    """
+    element = format_element.find(f'{RPM_NS}{tag}')
+    if element is None:
+        return []
+    intern = sys.intern
+    return [(intern(entry.get('name')), FLAGS.get(entry.get('flags'), 0),
+             parse_evr(entry.get('epoch'), entry.get('ver'), entry.get('rel')))
+            for entry in element.iter(f'{RPM_NS}entry') if not entry.get('name').startswith(RPMLIB_PREFIX)]
+
+
+def iter_primary_xml(xml_path: str):
+    """
+    Read packages with their dependencies from primary XML, possibly compressed
+    :param xml_path: path to primary XML
+    :return: generator of tuples (name, arch, evr, download size, installed size, provides, requires)
+    """
+    with open_compressed(xml_path) as xml_file:
+        for event, element in ElementTree.iterparse(xml_file):
+            if element.tag != f'{COMMON_NS}package':
+                continue
+            version = element.find(f'{COMMON_NS}version')
+            size = element.find(f'{COMMON_NS}size')
+            provides = []
+            requires = []
+            format_element = element.find(f'{COMMON_NS}format')
+            if format_element is not None:
+                provides = _entries(format_element, 'provides')
+                requires = _entries(format_element, 'requires')
+                provides += [(file.text, 0, None) for file in format_element.iter(f'{COMMON_NS}file') if file.text]
+            yield (element.findtext(f'{COMMON_NS}name'),
+                   sys.intern(element.findtext(f'{COMMON_NS}arch')),
+                   evr_string(version.get('epoch'), version.get('ver'), version.get('rel')),
+                   int(size.get('package') or 0) if size is not None else 0,
+                   int(size.get('installed') or 0) if size is not None else 0,
+                   provides, requires)
+            element.clear()
+
+
+def parse_installed_provides(lines) -> dict:
+    """
+    Parse output of 'rpm -qa --queryformat RPM_PROVIDES_FORMAT'
+    :param lines: iterable of output lines
+    :return: dictionary of provide name, name.arch of installed package or file path and list of (flags, evr) tuples
+    """
+    intern = sys.intern
+    provides = {}
+    for line in lines:
+        fields = line.split('\t')
+        if len(fields) == 1:
+            provides.setdefault(line, []).append((0, None))
+            continue
+        flags = int(fields[1]) if fields[1].isdigit() else 0
+        evr = fields[2] if len(fields) > 2 else ''
+        provides.setdefault(intern(fields[0]), []).append(
+            (flags & (SENSE_LESS | SENSE_GREATER | SENSE_EQUAL), split_evr(evr) if evr else None))
+    return provides
+
+
+def installed_provides(installroot: str = None) -> dict:
+    """
+    Query provides and files of all installed packages from rpmdb
+    :param installroot: root directory of the installation, the host system if None
+    :return: dictionary of provide name or file path and list of (flags, evr) tuples
+    """
+    command = ['rpm', '-qa', '--queryformat', RPM_PROVIDES_FORMAT]
+    if installroot:
+        command += ['--root', installroot]
+    return parse_installed_provides(execute_stream(command))
+
+
+class DependencyIndex:
+    """
+    Packages of all repositories with their requirements, and index of their provides and file provides.
+    Packages are kept in columns, like in PackageTable, provides map a name to (row, flags, evr) tuples
+    """
+
+    def __init__(self):
+        self.names = []
+        self.arches = []
+        self.versions = []
+        self.repos = []
+        self.download_sizes = []
+        self.installed_sizes = []
+        self.requires = []
+        self.provides = {}
+        self._by_name = {}
+
+    def add(self, name: str, arch: str, version: str, repo: str, download_size: int, installed_size: int,
+            provides: list, requires: list) -> int:
+        """
+        Add package, it always provides its own name of its version
+        :param provides: list of (name, flags, evr) tuples, file paths have no flags and evr
+        :param requires: list of (name, flags, evr) tuples, without rpmlib() requirements
+        :return: row number of the added package
+        """
+        row = len(self.names)
+        self.names.append(name)
+        self.arches.append(arch)
+        self.versions.append(version)
+        self.repos.append(repo)
+        self.download_sizes.append(download_size)
+        self.installed_sizes.append(installed_size)
+        self.requires.append(tuple(requires))
+        self._by_name.setdefault(name, []).append(row)
+        index = self.provides
+        self_provided = False
+        for provide_name, flags, evr in provides:
+            index.setdefault(provide_name, []).append((row, flags, evr))
+            self_provided = self_provided or provide_name == name
+        if not self_provided:
+            index.setdefault(name, []).append((row, SENSE_EQUAL, split_evr(version)))
+        return row
+
+    def add_repository(self, repository_name: str, packages):
+        """
+        :param repository_name: name of the repository
+        :param packages: iterable of tuples returned by iter_primary_db() or iter_primary_xml()
+        """
+        repo = sys.intern(repository_name)
+        for name, arch, version, download_size, installed_size, provides, requires in packages:
+            self.add(name, arch, version, repo, download_size, installed_size, provides, requires)
+
+    @classmethod
+    def from_repodata(cls, repodata: RepodataReader) -> 'DependencyIndex':
+        """
+        Index all repositories from yum/dnf metadata cache, sqlite database is preferred over XML
+        :param repodata: RepodataReader of the metadata cache
+        :return: DependencyIndex
+        """
+        index = cls()
+        for repository in repodata.repositories():
+            logger.info(f"Indexing dependencies of repository {repository.name}")
+            db_path = repository.primary_db()
+            if db_path is not None:
+                index.add_repository(repository.name, iter_primary_db(db_path))
+                continue
+            xml_path = repository.metadata_file('primary')
+            if xml_path is not None:
+                index.add_repository(repository.name, iter_primary_xml(xml_path))
+                continue
+            logger.warning(f"Primary metadata of repository {repository.name} is not found in {repository.path}")
+        return index
+
+    def rows(self, name: str) -> list:
+        """
+        :return: rows of packages with the given name
+        """
+        return self._by_name.get(name, [])
+
+    def providers(self, name: str, flags: int = 0, evr: tuple = None) -> list:
+        """
+        :return: rows of packages satisfying the requirement
+        """
+        return [row for row, provide_flags, provide_evr in self.provides.get(name, ())
+                if overlaps(provide_flags, provide_evr, flags, evr)]
+
+    def __len__(self):
+        return len(self.names)
+
+
+class Resolution:
+    """
+    Result of dependency closure
+    """
+
+    def __init__(self):
+        # PackageTable of packages to install, sizes are installed sizes
+        self.packages = PackageTable()
+        self.download_size = 0
+        self.installed_size = 0
+        # Requested packages which are already installed
+        self.installed = []
+        # Requirement which can't be satisfied and list of packages requiring it
+        self.unresolved = {}
+
+    def __str__(self):
+        lines = [f"{package.name}.{package.arch} {package.version} {package.repo} {package.size}"
+                 for package in self.packages]
+        lines.append(f"New packages: {len(self.packages)}")
+        lines.append(f"Download size: {self.download_size}")
+        lines.append(f"Installed size: {self.installed_size}")
+        if self.installed:
+            lines.append(f"Already installed: {self.installed}")
+        for requirement, required_by in self.unresolved.items():
+            note = " (only files of primary metadata are known)" if requirement.startswith('/') else ''
+            lines.append(f"Unresolved: {requirement}{note}, required by {', '.join(required_by)}")
+        return '\n'.join(lines)
+
+
+class DependencyResolver:
+    """
+    Transitive closure of requested packages against the installed set.
+    A requirement satisfied by an installed package or by an already selected one is skipped,
+    otherwise the best provider is selected like yum does: package of the same name,
+    of the requiring package arch or noarch, with the shortest name, of the newest version
+    """
+
+    def __init__(self, index: DependencyIndex, installed: dict = None):
+        """
+        :param index: DependencyIndex of repository packages
+        :param installed: installed provides returned by installed_provides(), nothing is installed if None
+        """
+        self.index = index
+        self.installed = installed if installed is not None else {}
+
+    def _installed(self, name: str, flags: int, evr: tuple) -> bool:
+        """
+        :return: True if an installed package satisfies the requirement
+        """
+        return any(overlaps(provide_flags, provide_evr, flags, evr)
+                   for provide_flags, provide_evr in self.installed.get(name, ()))
+
+    def _requested_installed(self, entry: str) -> bool:
+        """
+        :param entry: package file entry
+        :return: True if entry is installed, name.arch only if a package of this arch is installed,
+                 wildcard patterns are resolved to packages first
+        """
+        if WILDCARDS.search(entry):
+            return False
+        return self._installed(entry, 0, None)
+
+    def _row_installed(self, row: int, same_version: bool = False) -> bool:
+        """
+        :param same_version: only the same version of the package counts, any version otherwise
+        :return: True if a package of the same name and arch as the repository package is installed
+        """
+        index = self.index
+        if same_version:
+            return self._installed(f"{index.names[row]}.{index.arches[row]}", SENSE_EQUAL,
+                                   split_evr(index.versions[row]))
+        return self._installed(f"{index.names[row]}.{index.arches[row]}", 0, None)
+
+    def _best(self, rows: list, name: str, arch: str) -> int:
+        """
+        :param rows: rows of packages satisfying the requirement
+        :param name: required name
+        :param arch: arch of the requiring package, None for the requested packages
+        :return: row of the best provider
+        """
+        index = self.index
+        best = best_key = None
+        for row in rows:
+            provider_arch = index.arches[row]
+            arch_rank = 0 if provider_arch == arch else 1 if provider_arch == 'noarch' else 2
+            key = index.names[row] != name, arch_rank, len(index.names[row]), index.names[row], provider_arch
+            if best is None or key < best_key or \
+                    (key == best_key and compare_versions(index.versions[row], index.versions[best]) > 0):
+                best, best_key = row, key
+        return best
+
+    def _newest(self, matcher: PackageMatcher, rows) -> list:
+        """
+        :return: rows of the newest version of every name and arch matching the pattern
+        """
+        index = self.index
+        newest = {}
+        for row in rows:
+            if matcher.match(index.names[row], index.arches[row], index.versions[row]):
+                key = index.names[row], index.arches[row]
+                if key not in newest or compare_versions(index.versions[row], index.versions[newest[key]]) > 0:
+                    newest[key] = row
+        return list(newest.values())
+
+    def _requested_rows(self, entry: str) -> (list, bool):
+        """
+        :param entry: package file entry: name, name.arch, provide, file path, wildcard pattern,
+                      or name with version like name-version[-release][.arch]
+        :return: tuple of rows of packages to select for the entry, empty if nothing provides it,
+                 and True if the entry has a version, so that only the same installed version satisfies it
+        """
+        index = self.index
+        if WILDCARDS.search(entry):
+            return self._newest(PackageMatcher(entry), range(len(index))), False
+        rows = index.providers(entry)
+        if rows:
+            return [self._best(rows, entry, None)], False
+        name, _, arch = entry.rpartition('.')
+        if arch in KNOWN_ARCHES:
+            rows = [row for row in index.rows(name) if index.arches[row] == arch]
+            if rows:
+                return [self._best(rows, name, arch)], False
+        # name-version is matched like 'yum install' does, package name is one of dash-separated prefixes
+        parts = entry.split(':', 1)[-1].split('-')
+        rows = [row for end in range(1, len(parts)) for row in index.rows('-'.join(parts[:end]))]
+        rows = self._newest(PackageMatcher(entry), rows)
+        if rows:
+            return [self._best(rows, index.names[rows[0]], None)], True
+        return [], False
+
+    def resolve(self, packages: list) -> Resolution:
+        """
+        :param packages: requested packages, e.g. loaded from the package file
+        :return: Resolution with new packages, their total download and installed size, and unresolved requirements
+        """
+        index = self.index
+        resolution = Resolution()
+        selected = set()
+        selected_keys = set()
+        queue = []
+
+        def select(row):
+            key = index.names[row], index.arches[row]
+            if row in selected or key in selected_keys:
+                return
+            selected.add(row)
+            selected_keys.add(key)
+            queue.append(row)
+
+        for entry in packages:
+            if self._requested_installed(entry):
+                resolution.installed.append(entry)
+                continue
+            requested, versioned = self._requested_rows(entry)
+            if not requested:
+                resolution.unresolved.setdefault(entry, []).append(PACKAGEFILE)
+                continue
+            rows = [row for row in requested if not self._row_installed(row, versioned)]
+            if not rows:
+                # e.g. wildcard matching only installed packages
+                resolution.installed.append(entry)
+            for row in rows:
+                select(row)
+
+        while queue:
+            row = queue.pop()
+            for name, flags, evr in index.requires[row]:
+                if self._installed(name, flags, evr):
+                    continue
+                rows = index.providers(name, flags, evr)
+                if any(provider in selected for provider in rows):
+                    continue
+                # Another version of the same name and arch is selected already, and it doesn't satisfy the requirement
+                rows = [provider for provider in rows
+                        if (index.names[provider], index.arches[provider]) not in selected_keys]
+                if not rows:
+                    required_by = f"{index.names[row]}.{index.arches[row]}"
+                    resolution.unresolved.setdefault(format_requirement(name, flags, evr), []).append(required_by)
+                    continue
+                select(self._best(rows, name, index.arches[row]))
+
+        for row in sorted(selected, key=lambda selected_row: (index.names[selected_row], index.arches[selected_row])):
+            resolution.packages.add(index.names[row], index.arches[row], index.versions[row], index.repos[row],
+                                    size=index.installed_sizes[row])
+            resolution.download_size += index.download_sizes[row]
+            resolution.installed_size += index.installed_sizes[row]
+        return resolution
@@ -0,0 +1,278 @@
+"""Instrumentation of subprocess calls and RpmInstaller methods.
+Every measured call produces an Event passed to registered hooks; MetricsRecorder is a hook
+collecting events into histograms exportable as Prometheus text format or JSON.
+No hooks are registered by default, and then measuring costs a single list check per call.
+"""
+import os
+import json
+import time
+import bisect
+import resource
+import threading
+import functools
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** power for power in range(9))
+LINES_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+METRIC_PREFIX = 'yum_wrapper'
+# Options followed by a separate value, which is not a subcommand
+OPTIONS_WITH_VALUE = {'--installroot', '--setopt', '--downloaddir', '--releasever', '-c', '--config'}
+
+# Registered hooks, called with every Event
+HOOKS = []
+
+
+class Event:
+    """
+    Measurement of a single command or method call.
+    For methods only name and wall time are set, CPU time is unknown for commands run by a persistent shell
+    """
+
+    __slots__ = ('kind', 'name', 'wall_time', 'cpu_time', 'stdout_bytes', 'lines', 'ret_code')
+
+    def __init__(self, kind: str, name: str, wall_time: float, cpu_time: float = None,
+                 stdout_bytes: int = None, lines: int = None, ret_code: int = None):
+        self.kind = kind
+        self.name = name
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.stdout_bytes = stdout_bytes
+        self.lines = lines
+        self.ret_code = ret_code
+
+
+def add_hook(hook):
+    """
+    :param hook: callable receiving Event
+    """
+    HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    """
+    :param hook: previously added hook
+    """
+    HOOKS.remove(hook)
+
+
+def emit(event: Event):
+    """
+    Pass event to all hooks
+    """
+    for hook in list(HOOKS):
+        hook(event)
+
+
+def command_name(command: list) -> str:
+    """
+    Short command name used as metric label: tool and its subcommand, without sudo and options
+    :param command: list of command and arguments
+    :return: e.g. "yum list" or "rpm -qa"
+    """
+    args = command[1:] if command and command[0] == 'sudo' else command
+    if not args:
+        return ''
+    tool = os.path.basename(args[0])
+    skip = False
+    for arg in args[1:]:
+        if skip:
+            skip = False
+        elif arg in OPTIONS_WITH_VALUE:
+            skip = True
+        elif not arg.startswith('-') or tool == 'rpm':
+            return f"{tool} {arg}"
+    return tool
+
+
+def children_cpu_time() -> float:
+    """
+    CPU time of all terminated and waited-for child processes. It's process-wide,
+    so commands run concurrently from several threads may be accounted to each other
+    :return: user and system time in seconds
+    """
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class CommandTimer:
+    """
+    Measures a single command, created only if some hooks are registered
+    """
+
+    __slots__ = ('name', 'started', 'cpu_started')
+
+    def __init__(self, command: list, measure_cpu: bool = True):
+        """
+        :param command: list of command and arguments
+        :param measure_cpu: measure CPU time of the child process
+        """
+        self.name = command_name(command)
+        self.cpu_started = children_cpu_time() if measure_cpu else None
+        self.started = time.perf_counter()
+
+    def finish(self, ret_code: int, stdout_bytes: int, lines: int):
+        """
+        Emit event of the finished command
+        """
+        wall_time = time.perf_counter() - self.started
+        cpu_time = children_cpu_time() - self.cpu_started if self.cpu_started is not None else None
+        emit(Event('command', self.name, wall_time, cpu_time, stdout_bytes, lines, ret_code))
+
+
+def timed(function):
+    """
+    Decorator emitting method events with wall time of every call
+    """
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not HOOKS:
+            return function(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            emit(Event('method', name, time.perf_counter() - started))
+    return wrapper
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds, like Prometheus one
+    """
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def buckets(self) -> list:
+        """
+        :return: list of (upper bound, cumulative count) tuples, the last bound is '+Inf'
+        """
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(list(self.bounds) + ['+Inf'], self.counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return buckets
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'sum': self.sum, 'buckets': [[bound, count] for bound, count in self.buckets()]}
+
+
+class MetricsRecorder:
+    """
+    Hook collecting events into histograms per command or method name
+    """
+
+    # Metric name, Event attribute, buckets, event kind
+    METRICS = (
+        ('command_seconds', 'wall_time', SECONDS_BUCKETS, 'command'),
+        ('command_cpu_seconds', 'cpu_time', SECONDS_BUCKETS, 'command'),
+        ('command_stdout_bytes', 'stdout_bytes', BYTES_BUCKETS, 'command'),
+        ('command_lines', 'lines', LINES_BUCKETS, 'command'),
+        ('method_seconds', 'wall_time', SECONDS_BUCKETS, 'method'),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # metric name -> label -> Histogram
+        self.histograms = {metric: {} for metric, _, _, _ in self.METRICS}
+        # (command, return code) -> number of calls
+        self.exit_codes = {}
+
+    def __call__(self, event: Event):
+        with self._lock:
+            for metric, attribute, bounds, kind in self.METRICS:
+                value = getattr(event, attribute)
+                if kind != event.kind or value is None:
+                    continue
+                histogram = self.histograms[metric].get(event.name)
+                if histogram is None:
+                    histogram = self.histograms[metric][event.name] = Histogram(bounds)
+                histogram.observe(value)
+            if event.kind == 'command':
+                key = event.name, event.ret_code
+                self.exit_codes[key] = self.exit_codes.get(key, 0) + 1
+
+    def to_json(self) -> dict:
+        """
+        :return: JSON-serializable dictionary of all metrics
+        """
+        with self._lock:
+            metrics = {metric: {label: histogram.to_dict() for label, histogram in histograms.items()}
+                       for metric, histograms in self.histograms.items()}
+            metrics['command_exit_total'] = [{'command': command, 'code': code, 'count': count}
+                                             for (command, code), count in sorted(self.exit_codes.items())]
+        return metrics
+
+    def to_prometheus(self) -> str:
+        """
+        :return: metrics in Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            for metric, attribute, _, kind in self.METRICS:
+                name = f"{METRIC_PREFIX}_{metric}"
+                label = 'command' if kind == 'command' else 'method'
+                lines += [f"# HELP {name} {attribute.replace('_', ' ')} of every {kind} call", f"# TYPE {name} histogram"]
+                for value, histogram in sorted(self.histograms[metric].items()):
+                    for bound, count in histogram.buckets():
+                        lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{{label}="{value}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{label}="{value}"}} {histogram.count}')
+            name = f"{METRIC_PREFIX}_command_exit_total"
+            lines += [f"# HELP {name} command calls by exit code", f"# TYPE {name} counter"]
+            for (command, code), count in sorted(self.exit_codes.items()):
+                lines.append(f'{name}{{command="{command}",code="{code}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """
+        Atomically write metrics to file, JSON if file name ends with .json, Prometheus text format otherwise,
+        so that the file may be picked up by node_exporter textfile collector
+        :param path: output file path
+        """
+        # tempfile is slow to import and needed only when metrics are written
+        import tempfile
+        content = json.dumps(self.to_json(), indent=2) if path.endswith('.json') else self.to_prometheus()
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.metrics')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def summary(self) -> str:
+        """
+        :return: human-readable table of calls, total and mean time per command and method
+        """
+        rows = [f"{'call':<32}{'count':>8}{'total s':>10}{'mean s':>10}{'cpu s':>10}{'MiB':>10}{'lines':>10}"]
+        with self._lock:
+            for metric in ('command_seconds', 'method_seconds'):
+                for label, histogram in sorted(self.histograms[metric].items(), key=lambda item: -item[1].sum):
+                    command = metric == 'command_seconds'
+                    cpu = self.histograms['command_cpu_seconds'].get(label) if command else None
+                    stdout = self.histograms['command_stdout_bytes'].get(label) if command else None
+                    lines = self.histograms['command_lines'].get(label) if command else None
+                    row = f"{label:<32}{histogram.count:>8}{histogram.sum:>10.3f}{histogram.sum / histogram.count:>10.3f}"
+                    if command:
+                        row += (f"{f'{cpu.sum:.3f}' if cpu else '-':>10}"
+                                f"{stdout.sum / 2 ** 20 if stdout else 0:>10.2f}"
+                                f"{lines.sum if lines else 0:>10}")
+                    rows.append(row)
+        return '\n'.join(rows)
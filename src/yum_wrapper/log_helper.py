@@ -0,0 +1,11 @@
+"""
+Logger of yum_wrapper package, writes to stderr unless the application configures logging itself
+"""
+import logging
+
+logger = logging.getLogger("yum_wrapper")
+if not logger.handlers and not logging.getLogger().handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
@@ -0,0 +1,186 @@
+"""Packagefile manifests.
+Manifest is a list of packages, one per line, with comments started with '#' and directives:
+include <path>  - include another manifest, path is relative to the including file, wildcards are supported
+[<host glob>]   - packages and includes below apply only to hosts matching the glob, [*] applies to all hosts again
+Compiled manifest is a list of unique packages in the order of their first appearance
+"""
+import os
+import glob
+import json
+import socket
+import fnmatch
+import hashlib
+from .result_cache import default_cache_dir
+from .log_helper import logger
+
+INCLUDE = 'include'
+ALL_HOSTS = '*'
+
+
+def file_hash(path: str) -> str:
+    """
+    :return: SHA-256 of the file content
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compile_manifest(path: str, hostname: str = None) -> (list, dict, dict):
+    """
+    Compile manifest with all its includes
+    :param path: manifest file
+    :param hostname: host name matched against host sections, current host name if None
+    :return: tuple of list of unique packages, dictionary of all read files and their content hashes,
+             and dictionary of include wildcards and files they matched
+    """
+    hostname = hostname if hostname is not None else socket.gethostname()
+    packages = {}
+    files = {}
+    globs = {}
+    _compile(os.path.abspath(path), hostname, packages, files, globs, [])
+    return list(packages), files, globs
+
+
+def _compile(path: str, hostname: str, packages: dict, files: dict, globs: dict, stack: list):
+    """
+    Read manifest file, add its packages and packages of its includes
+    :param path: absolute path to the manifest file
+    :param hostname: host name matched against host sections
+    :param packages: ordered dictionary of packages to fill
+    :param files: dictionary of read files and their content hashes to fill
+    :param globs: dictionary of include wildcards and files they matched to fill
+    :param stack: files being included, to detect include cycles
+    """
+    if path in stack:
+        raise ValueError(f"Include cycle: {' -> '.join(stack + [path])}")
+    with open(path, 'rb') as f:
+        content = f.read()
+    files[path] = hashlib.sha256(content).hexdigest()
+    lines = content.decode("utf-8").splitlines()
+    active = True
+    for number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            active = fnmatch.fnmatch(hostname, line[1:-1].strip() or ALL_HOSTS)
+            continue
+        if not active:
+            continue
+        directive, _, argument = line.partition(' ')
+        if directive == INCLUDE and argument.strip():
+            pattern = os.path.join(os.path.dirname(path), argument.strip())
+            if glob.has_magic(pattern):
+                included = globs[pattern] = sorted(glob.glob(pattern))
+            else:
+                included = [pattern]
+            if not included:
+                logger.warning(f"{path}:{number}: no manifests match {argument.strip()}")
+            for include_path in included:
+                _compile(os.path.abspath(include_path), hostname, packages, files, globs, stack + [path])
+            continue
+        for package in line.split():
+            packages[package] = None
+
+
+class ManifestCache:
+    """
+    Persistent cache of compiled manifests.
+    Entry is keyed by manifest path and host name, and is valid while content of all read files is the same
+    and include wildcards match the same files. Files are re-hashed only if their mtime or size is changed
+    """
+
+    def __init__(self, cache_dir: str = None):
+        """
+        :param cache_dir: cache directory, 'manifests' directory in default_cache_dir() if None
+        """
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(default_cache_dir(), 'manifests')
+
+    def _entry_path(self, path: str, hostname: str) -> str:
+        key = hashlib.sha256(f"{os.path.abspath(path)}\n{hostname}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def _file_state(path: str, content_hash: str) -> list:
+        """
+        :return: list of path, mtime, size and content hash of the file
+        """
+        stat = os.stat(path)
+        return [path, stat.st_mtime_ns, stat.st_size, content_hash]
+
+    def get(self, path: str, hostname: str) -> list:
+        """
+        :return: cached list of packages, None if not cached, some of the read files are changed,
+                 or some include wildcard matches other files
+        """
+        try:
+            with open(self._entry_path(path, hostname), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if 'globs' not in entry:
+            return None
+        for pattern, included in entry['globs'].items():
+            if sorted(glob.glob(pattern)) != included:
+                return None
+        updated = False
+        for state in entry['files']:
+            try:
+                stat = os.stat(state[0])
+            except OSError:
+                return None
+            if (stat.st_mtime_ns, stat.st_size) == (state[1], state[2]):
+                continue
+            # File is touched, but its content may be the same
+            if file_hash(state[0]) != state[3]:
+                return None
+            state[1], state[2] = stat.st_mtime_ns, stat.st_size
+            updated = True
+        if updated:
+            self._write(path, hostname, entry)
+        return entry['packages']
+
+    def put(self, path: str, hostname: str, packages: list, files: dict, globs: dict = None):
+        """
+        :param path: manifest file
+        :param hostname: host name the manifest is compiled for
+        :param packages: compiled list of packages
+        :param files: dictionary of files read while compiling and their content hashes
+        :param globs: dictionary of include wildcards and files they matched
+        """
+        entry = {'files': [self._file_state(file, content_hash) for file, content_hash in files.items()],
+                 'globs': globs or {},
+                 'packages': packages}
+        self._write(path, hostname, entry)
+
+    def _write(self, path: str, hostname: str, entry: dict):
+        # tempfile is slow to import and needed only when the cache is updated
+        import tempfile
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.entry')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(temp_path, self._entry_path(path, hostname))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+def load_manifest(path: str, hostname: str = None, cache: ManifestCache = None) -> list:
+    """
+    Compiled manifest, from cache if none of its files is changed
+    :param path: manifest file
+    :param hostname: host name matched against host sections, current host name if None
+    :param cache: cache of compiled manifests, manifest is compiled every time if None
+    :return: list of unique packages
+    """
+    hostname = hostname if hostname is not None else socket.gethostname()
+    if cache is not None:
+        packages = cache.get(path, hostname)
+        if packages is not None:
+            return packages
+    packages, files, globs = compile_manifest(path, hostname)
+    if cache is not None:
+        cache.put(path, hostname, packages, files, globs)
+    return packages
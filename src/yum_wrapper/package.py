@@ -0,0 +1,92 @@
+import sys
+
+
+def evr_string(epoch, version: str, release: str) -> str:
+    """
+    Format package version the same way yum does, e.g. "1:2.02-0.87.el7"
+    :param epoch: package epoch, omitted if empty or zero
+    :param version: package version
+    :param release: package release
+    :return: version string "[Epoch:]Version-Release"
+    """
+    if epoch and str(epoch) != '0':
+        return f"{epoch}:{version}-{release}"
+    return f"{version}-{release}"
+
+
+class Package:
+    """
+    Package class
+    Attributes are kept in slots, strings shared by many packages (arch, repo) are interned
+    """
+
+    __slots__ = ('name', 'arch', 'version', 'repo', 'summary', 'install_time', 'size')
+
+    def __init__(self, package_info: str):
+        """
+        Package info provided by yum or dnf
+        This is a string that have format "Name.Arch Version Repo"
+        E.g. "libwpg.x86_64 0.3.0-1.el7 anaconda"
+        Repo name may start or may not start with '@' sign, we will remove it later
+        """
+        package_info_list = package_info.split()
+        if len(package_info_list) != 3:
+            raise ValueError(f"Invalid package info: {package_info}")
+        name, arch = package_info_list[0].rsplit('.', 1)
+        repo = package_info_list[2][1:] if package_info_list[2].startswith('@') else package_info_list[2]
+        self.name = name
+        self.arch = sys.intern(arch)
+        self.version = package_info_list[1]
+        self.repo = sys.intern(repo)
+        self.summary = None
+        self.install_time = None
+        self.size = None
+
+    @classmethod
+    def from_fields(cls, name: str, arch: str, version: str = None, repo: str = None, summary: str = None,
+                    install_time: int = None, size: int = None):
+        """
+        Create package from already parsed fields
+        Install time (seconds since epoch) and installed size in bytes are known only for installed packages
+        """
+        package = cls.__new__(cls)
+        package.name = name
+        package.arch = arch
+        package.version = version
+        package.repo = repo
+        package.summary = summary
+        package.install_time = install_time
+        package.size = size
+        return package
+
+    @classmethod
+    def from_search_result(cls, search_info: str):
+        """
+        Package info provided by 'yum search'
+        This is a string that have format "Name.Arch : Summary"
+        E.g. "samba-client.x86_64 : Samba client programs"
+        Search results do not contain version and repo, they are set to None
+        """
+        name_arch, separator, summary = search_info.partition(' : ')
+        if not separator or '.' not in name_arch:
+            raise ValueError(f"Invalid search result: {search_info}")
+        name, arch = name_arch.strip().rsplit('.', 1)
+        return cls.from_fields(name, sys.intern(arch), summary=summary.strip())
+
+    def info(self):
+        """
+        Return full package info in format "Name.Arch Version Repo"
+        """
+        return f"{self.name}.{self.arch}-{self.version}-{self.repo}"
+
+    def __str__(self):
+        """
+        Short Package representation, name without Arch suffix, e.g. "libwpg"
+        """
+        return self.name
+
+    def __repr__(self):
+        """
+        Full Package representation, string formatted like "Name.Arch Version Repo"
+        """
+        return self.info()
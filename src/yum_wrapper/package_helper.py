@@ -1,4 +1,5 @@
 import subprocess
+from . import instrumentation
 
 
 def execute(command: list):
@@ -6,15 +7,44 @@ def execute(command: list):
     Execute command
     :param command: list of command and arguments
     """
+    timer = instrumentation.CommandTimer(command) if instrumentation.HOOKS else None
     # check_output
     result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
     output = result.stdout.decode("utf-8")
     # trim leading and training whitespaces in any element
     output_list = [s.strip() for s in output.split('\n') if s]
     ret_code = result.returncode
+    if timer is not None:
+        timer.finish(ret_code, len(result.stdout), len(output_list))
     return ret_code, output_list
 
 
+def execute_stream(command: list):
+    """
+    Execute command and yield its output line by line, as soon as the process produces it
+    Leading and trailing whitespaces are trimmed, empty lines are skipped
+    Return code of the command is the generator return value, use 'yield from' to get it
+    :param command: list of command and arguments
+    """
+    timer = instrumentation.CommandTimer(command) if instrumentation.HOOKS else None
+    stdout_bytes = lines = 0
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    try:
+        for line in process.stdout:
+            if timer is not None:
+                stdout_bytes += len(line)
+            line = line.decode("utf-8").strip()
+            if line:
+                lines += 1
+                yield line
+    finally:
+        process.stdout.close()
+        ret_code = process.wait()
+        if timer is not None:
+            timer.finish(ret_code, stdout_bytes, lines)
+    return ret_code
+
+
 def read_packagefile(package_file: str):
     """
     Read packages from file ignoring empty lines and comments
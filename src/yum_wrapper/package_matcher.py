@@ -0,0 +1,109 @@
+import re
+import fnmatch
+
+WILDCARDS = re.compile(r'[*?\[]')
+
+
+def candidate_names(name: str, arch: str, version: str = None) -> list:
+    """
+    Package spellings which 'yum list' patterns are matched against:
+    name, name.arch, name-version, name-version-release, name-version-release.arch
+    and the same with epoch, if the package has one
+    :param name: package name
+    :param arch: package arch
+    :param version: package version formatted as "[Epoch:]Version-Release"
+    :return: list of strings
+    """
+    names = [name, f"{name}.{arch}"]
+    if version:
+        epoch, _, version_release = version.rpartition(':')
+        version_only = version_release.rsplit('-', 1)[0]
+        names += [f"{name}-{version_only}", f"{name}-{version_release}", f"{name}-{version_release}.{arch}"]
+        if epoch:
+            names += [f"{name}-{version}", f"{name}-{version}.{arch}", f"{epoch}:{name}-{version_release}.{arch}"]
+    return names
+
+
+class PackageMatcher:
+    """
+    Package name patterns, compiled once and matched locally.
+    Patterns without wildcards are looked up in a dictionary,
+    patterns with wildcards are compiled to a single regular expression with alternatives.
+    Most packages are rejected by name only: versioned spellings are built only for names some literal
+    pattern starts with, and the regular expression is tried only for names starting with a pattern prefix
+    """
+
+    def __init__(self, patterns):
+        """
+        :param patterns: iterable of package names, wildcards are supported
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.patterns = list(patterns)
+        self._literals = {}
+        self._versioned_names = set()
+        self._wildcards = []
+        for index, pattern in enumerate(self.patterns):
+            if WILDCARDS.search(pattern):
+                self._wildcards.append((index, re.compile(fnmatch.translate(pattern))))
+            else:
+                self._literals.setdefault(pattern, []).append(index)
+                # "name-version" literal may match only packages named as one of its dash-separated prefixes
+                name = pattern.split(':', 1)[1] if ':' in pattern else pattern
+                parts = name.split('-')
+                self._versioned_names.update('-'.join(parts[:end]) for end in range(1, len(parts)))
+        self._combined = None
+        self._prefix_length = 0
+        self._prefixes = set()
+        if self._wildcards:
+            self._combined = re.compile('|'.join(f"(?:{regex.pattern})" for _, regex in self._wildcards))
+            prefixes = [WILDCARDS.split(self.patterns[index], 1)[0] for index, _ in self._wildcards]
+            if not any(':' in prefix for prefix in prefixes):
+                self._prefix_length = min(len(prefix) for prefix in prefixes)
+                self._prefixes = {prefix[:self._prefix_length] for prefix in prefixes}
+
+    def _needs_wildcards(self, name: str) -> bool:
+        """
+        :return: False if no wildcard pattern may match any spelling of the package name
+        """
+        if self._combined is None:
+            return False
+        length = self._prefix_length
+        return not length or len(name) < length or name[:length] in self._prefixes
+
+    def match(self, name: str, arch: str, version: str = None) -> bool:
+        """
+        :return: True if any pattern matches the package
+        """
+        literals = self._literals
+        if name in literals or f"{name}.{arch}" in literals:
+            return True
+        check_wildcards = self._needs_wildcards(name)
+        if not check_wildcards and name not in self._versioned_names:
+            return False
+        combined = self._combined
+        for candidate in candidate_names(name, arch, version):
+            if candidate in literals or (check_wildcards and combined.match(candidate)):
+                return True
+        return False
+
+    def matching_patterns(self, name: str, arch: str, version: str = None) -> set:
+        """
+        :return: indexes of all patterns matching the package
+        """
+        indexes = set()
+        for candidate in candidate_names(name, arch, version):
+            indexes.update(self._literals.get(candidate, ()))
+            if self._combined is not None and self._combined.match(candidate):
+                indexes.update(index for index, regex in self._wildcards if regex.match(candidate))
+        return indexes
+
+    def select(self, table) -> list:
+        """
+        Match all packages of the table in a single pass
+        :param table: PackageTable
+        :return: list of matching row numbers
+        """
+        match = self.match
+        return [row for row, (name, arch, version) in enumerate(zip(table.names, table.arches, table.versions))
+                if match(name, arch, version)]
@@ -0,0 +1,363 @@
+import sys
+from array import array
+from .package import Package
+
+# Row number of a missing row in the chain of rows
+NO_ROW = -1
+
+
+class CodedColumn:
+    """
+    Column of strings with a few distinct values, e.g. arches and repos.
+    Every row keeps a code of its value in an array, one byte per row while there are up to 256 values
+    """
+
+    __slots__ = ('codes', 'values', '_value_codes')
+
+    def __init__(self, values=None):
+        """
+        :param values: iterable of values to fill the column with
+        """
+        self.codes = array('B')
+        self.values = []
+        self._value_codes = {}
+        if values is not None:
+            for value in values:
+                self.append(value)
+
+    def append(self, value):
+        """
+        Add value to the end of the column
+        """
+        code = self._value_codes.get(value)
+        if code is None:
+            code = self._value_codes[value] = len(self.values)
+            self.values.append(value)
+            if code > 255 and self.codes.typecode == 'B':
+                self.codes = array('i', self.codes)
+        self.codes.append(code)
+
+    def __getitem__(self, row: int):
+        return self.values[self.codes[row]]
+
+    def code(self, value) -> int:
+        """
+        :return: code of the value, None if no row has it
+        """
+        return self._value_codes.get(value)
+
+    def select(self, rows: list) -> 'CodedColumn':
+        """
+        :param rows: list of row numbers
+        :return: new column of the selected rows, with the same codes of values
+        """
+        column = CodedColumn()
+        column.codes = array(self.codes.typecode, map(self.codes.__getitem__, rows))
+        column.values = list(self.values)
+        column._value_codes = dict(self._value_codes)
+        return column
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class RowChains:
+    """
+    Rows grouped by a key without a list per key: the first row of every key, and the next row of the same key
+    for every row. Last row of the chain for every row is kept once rows are appended, so that appends
+    take constant time
+    """
+
+    __slots__ = ('first_rows', 'next_rows', 'last_rows')
+
+    def __init__(self, keys: list):
+        """
+        :param keys: list of keys of rows 0, 1, 2...
+        """
+        first_rows = {}
+        next_rows = array('i', [NO_ROW]) * len(keys)
+        # Walk backwards, so that every row is prepended to the chain of rows after it
+        for row in range(len(keys) - 1, -1, -1):
+            key = keys[row]
+            next_rows[row] = first_rows.get(key, NO_ROW)
+            first_rows[key] = row
+        self.first_rows = first_rows
+        self.next_rows = next_rows
+        self.last_rows = None
+
+    def append(self, key, row: int):
+        """
+        Append row, which is the next row of the table, to the end of the chain of its key
+        """
+        next_rows = self.next_rows
+        last_rows = self.last_rows
+        if last_rows is None:
+            last_rows = self.last_rows = array('i', range(len(next_rows)))
+            for previous in range(len(next_rows) - 1, -1, -1):
+                if next_rows[previous] != NO_ROW:
+                    last_rows[previous] = last_rows[next_rows[previous]]
+        next_rows.append(NO_ROW)
+        last_rows.append(row)
+        first = self.first_rows.setdefault(key, row)
+        if first != row:
+            next_rows[last_rows[first]] = row
+            last_rows[first] = row
+
+    def rows(self, key) -> list:
+        """
+        :return: rows of the key in the order they were appended
+        """
+        row = self.first_rows.get(key, NO_ROW)
+        next_rows = self.next_rows
+        rows = []
+        while row != NO_ROW:
+            rows.append(row)
+            row = next_rows[row]
+        return rows
+
+
+class PackageTable:
+    """
+    Columnar storage of packages information.
+    Every package is a row number in name, arch, version, repo, summary, install time and size columns,
+    repeating strings are interned, so they are stored only once, arches and repos are stored as one-byte codes.
+    Rows of the same name, and of the same name and arch, are chained in RowChains; each of the chains is built
+    on the first lookup which needs it, so tables which are only iterated don't pay for them.
+    Package objects are created only when rows are accessed.
+    """
+
+    __slots__ = ('names', 'arches', 'versions', 'repos', 'summaries', 'install_times', 'sizes',
+                 '_name_chains', '_arch_chains')
+
+    def __init__(self, packages=None):
+        """
+        :param packages: iterable of Package objects to fill the table with
+        """
+        self.names = []
+        self.arches = CodedColumn()
+        self.versions = []
+        self.repos = CodedColumn()
+        self.summaries = []
+        self.install_times = []
+        self.sizes = []
+        # Rows chained by name, None until the first lookup
+        self._name_chains = None
+        # Rows chained by (name, arch code), None until the first lookup by arch
+        self._arch_chains = None
+        if packages is not None:
+            self.extend(packages)
+
+    def add(self, name: str, arch: str, version: str = None, repo: str = None, summary: str = None,
+            install_time: int = None, size: int = None) -> int:
+        """
+        Add package row to the table
+        :return: number of the added row
+        """
+        intern = sys.intern
+        row = len(self.names)
+        name = intern(name)
+        self.names.append(name)
+        self.arches.append(intern(arch))
+        self.versions.append(intern(version) if version is not None else None)
+        self.repos.append(intern(repo) if repo is not None else None)
+        self.summaries.append(summary)
+        self.install_times.append(install_time)
+        self.sizes.append(size)
+        if self._name_chains is not None:
+            self._name_chains.append(name, row)
+        if self._arch_chains is not None:
+            self._arch_chains.append((name, self.arches.codes[row]), row)
+        return row
+
+    def _name_index(self) -> RowChains:
+        """
+        :return: rows chained by name, built on the first call
+        """
+        if self._name_chains is None:
+            self._name_chains = RowChains(self.names)
+        return self._name_chains
+
+    def _arch_index(self) -> RowChains:
+        """
+        :return: rows chained by name and arch code, built on the first call
+        """
+        if self._arch_chains is None:
+            self._arch_chains = RowChains(list(zip(self.names, self.arches.codes)))
+        return self._arch_chains
+
+    def append(self, package: Package) -> int:
+        """
+        Add Package object to the table
+        :return: number of the added row
+        """
+        return self.add(package.name, package.arch, package.version, package.repo, package.summary,
+                        package.install_time, package.size)
+
+    def extend(self, packages):
+        """
+        Add Package objects to the table
+        :param packages: iterable of Package objects
+        """
+        for package in packages:
+            self.append(package)
+
+    def row(self, row: int) -> Package:
+        """
+        :return: Package object for the row number
+        """
+        return Package.from_fields(self.names[row], self.arches[row], self.versions[row], self.repos[row],
+                                   self.summaries[row], self.install_times[row], self.sizes[row])
+
+    def rows(self, name: str, arch: str = None) -> list:
+        """
+        :return: numbers of rows with package name, and arch if provided
+        """
+        if arch is None:
+            return self._name_index().rows(name)
+        code = self.arches.code(arch)
+        if code is None:
+            return []
+        return self._arch_index().rows((name, code))
+
+    def get(self, name: str, arch: str = None) -> Package:
+        """
+        Find package by name, and arch if provided
+        :return: first found Package object, None if the package is not in table
+        """
+        rows = self.rows(name, arch)
+        return self.row(rows[0]) if rows else None
+
+    def find(self, name: str, arch: str = None) -> list:
+        """
+        Find all packages (e.g. several versions of a kernel) by name, and arch if provided
+        :return: list of Package objects
+        """
+        return [self.row(row) for row in self.rows(name, arch)]
+
+    def to_columns(self) -> dict:
+        """
+        :return: dictionary of column name and list of values, e.g. for JSON serialization
+        """
+        return {'names': self.names, 'arches': list(self.arches), 'versions': self.versions, 'repos': list(self.repos),
+                'summaries': self.summaries, 'install_times': self.install_times, 'sizes': self.sizes}
+
+    @classmethod
+    def from_columns(cls, columns: dict) -> 'PackageTable':
+        """
+        :param columns: dictionary created by to_columns()
+        :return: new table
+        """
+        table = cls()
+        names = columns['names']
+        for row in range(len(names)):
+            table.add(names[row], columns['arches'][row], columns['versions'][row], columns['repos'][row],
+                      columns['summaries'][row], columns['install_times'][row], columns['sizes'][row])
+        return table
+
+    def key(self, row: int) -> tuple:
+        """
+        :return: package identity (name, arch, version) of the row, used in set operations
+        """
+        return self.names[row], self.arches[row], self.versions[row]
+
+    def keys(self) -> set:
+        """
+        :return: set of package identities (name, arch, version) in the table
+        """
+        return set(zip(self.names, self.arches, self.versions))
+
+    def select(self, rows) -> 'PackageTable':
+        """
+        :param rows: iterable of row numbers
+        :return: new table with the selected rows
+        """
+        rows = list(rows)
+        table = PackageTable()
+        # Columns are copied at once, strings are interned already
+        for column in ('names', 'versions', 'summaries', 'install_times', 'sizes'):
+            setattr(table, column, list(map(getattr(self, column).__getitem__, rows)))
+        table.arches = self.arches.select(rows)
+        table.repos = self.repos.select(rows)
+        return table
+
+    def _add_row(self, other: 'PackageTable', row: int) -> int:
+        """
+        Copy row from other table
+        :return: number of the added row
+        """
+        return self.add(other.names[row], other.arches[row], other.versions[row], other.repos[row],
+                        other.summaries[row], other.install_times[row], other.sizes[row])
+
+    def group_by_repo(self) -> dict:
+        """
+        :return: dictionary of repo name and PackageTable of its packages
+        """
+        repo_rows = {}
+        for row, repo in enumerate(self.repos):
+            repo_rows.setdefault(repo, []).append(row)
+        return {repo: self.select(rows) for repo, rows in repo_rows.items()}
+
+    def union(self, other: 'PackageTable') -> 'PackageTable':
+        """
+        :return: packages from this table, followed by packages from other table which are not in this one
+        """
+        keys = self.keys()
+        table = self.select(range(len(self)))
+        for row in range(len(other)):
+            if other.key(row) not in keys:
+                table._add_row(other, row)
+        return table
+
+    def intersection(self, other: 'PackageTable') -> 'PackageTable':
+        """
+        :return: packages from this table which are also in other table
+        """
+        keys = other.keys()
+        return self.select(row for row in range(len(self)) if self.key(row) in keys)
+
+    def difference(self, other: 'PackageTable') -> 'PackageTable':
+        """
+        :return: packages from this table which are not in other table
+        """
+        keys = other.keys()
+        return self.select(row for row in range(len(self)) if self.key(row) not in keys)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __contains__(self, item) -> bool:
+        """
+        :param item: package name, (name, arch) tuple or Package object
+        """
+        if isinstance(item, Package):
+            return any(self.versions[row] == item.version for row in self.rows(item.name, item.arch))
+        if isinstance(item, tuple):
+            return bool(self.rows(*item))
+        return item in self._name_index().first_rows
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, row: int) -> Package:
+        if row < 0:
+            row += len(self.names)
+        if not 0 <= row < len(self.names):
+            raise IndexError(f"Package table row {row} is out of range")
+        return self.row(row)
+
+    def __iter__(self):
+        for row in range(len(self.names)):
+            yield self.row(row)
+
+    def __repr__(self):
+        return repr(list(self))
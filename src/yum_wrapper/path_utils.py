@@ -2,7 +2,7 @@
 
 import os
 import pathlib
-from log_helper import logger
+from .log_helper import logger
 
 PROJECT_DIR = os.path.join(os.path.realpath(__file__), "..")
 HOME_DIR = os.path.join(pathlib.Path.home())
@@ -22,11 +22,118 @@ def project_dir():
     return PROJECT_DIR
 
 
-def create_symlinks_recursive(src, dst):
+def _scan_tree(directory):
+    """
+    List all files of directory tree with os.scandir, subdirectories are scanned by the caller
+    :param directory: directory to scan
+    :return: tuple of sorted list of (file name, file path) and sorted list of subdirectories
+    """
+    files = []
+    subdirs = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file():
+                files.append((entry.name, entry.path))
+    return sorted(files), sorted(subdirs)
+
+
+def _source_files(src, workers):
+    """
+    Map file names of src tree to their paths, subtrees are scanned in parallel.
+    Tree is flattened, so if several files have the same name, the last one in sorted top-down order wins
+    :param src: absolute path of source directory
+    :param workers: number of parallel scanners
+    :return: dictionary of file name and file path
+    """
+    # Imported here, most users of path_utils need only home_dir()
+    from concurrent.futures import ThreadPoolExecutor
+    ordered = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        level = [src]
+        while level:
+            next_level = []
+            for files, subdirs in executor.map(_scan_tree, level):
+                ordered.append(files)
+                next_level += subdirs
+            level = next_level
+    return {name: path for files in ordered for name, path in files}
+
+
+def _replace_symlink(target, link):
+    """
+    Atomically replace link or file with a symlink to target
+    """
+    temp_link = os.path.join(os.path.dirname(link), ".{}.{}.tmp".format(os.path.basename(link), os.getpid()))
+    os.symlink(target, temp_link)
+    os.replace(temp_link, link)
+
+
+def sync_symlinks(src, dst, prune=False, dry_run=False, workers=None):
+    """
+    Incrementally create symlinks in dst directory for all files in src directory tree.
+    Links already pointing to the right file are not touched, so a re-run on unchanged tree writes nothing.
+    Wrong links and regular files are replaced atomically
+    :param src: source directory
+    :param dst: destination directory
+    :param prune: remove links to src tree, which don't point to any of its current files
+    :param dry_run: only count and log changes, don't make them
+    :param workers: number of parallel scanners of src subtrees
+    :return: dictionary of counters: created, updated, unchanged, removed, skipped
+    """
+    src = os.path.abspath(src)
+    stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'skipped': 0}
+    wanted = _source_files(src, workers or min(32, (os.cpu_count() or 1) + 4))
+    with os.scandir(dst) as entries:
+        existing = {entry.name: entry for entry in entries}
+    for name, src_file in wanted.items():
+        dst_file = os.path.join(dst, name)
+        entry = existing.get(name)
+        if entry is None:
+            action = 'created'
+        elif entry.is_symlink():
+            if os.readlink(entry.path) == src_file:
+                stats['unchanged'] += 1
+                continue
+            action = 'updated'
+        elif entry.is_file():
+            action = 'updated'
+        else:
+            logger.warning("Not a file, skipping: {}".format(dst_file))
+            stats['skipped'] += 1
+            continue
+        logger.info("{} symlink: {} -> {}".format(action.capitalize(), dst_file, src_file))
+        stats[action] += 1
+        if dry_run:
+            continue
+        if action == 'created':
+            os.symlink(src_file, dst_file)
+        else:
+            _replace_symlink(src_file, dst_file)
+    if prune:
+        src_prefix = src + os.sep
+        for name, entry in existing.items():
+            if name in wanted or not entry.is_symlink():
+                continue
+            target = os.readlink(entry.path)
+            if target.startswith(src_prefix):
+                logger.info("Removing stale symlink: {} -> {}".format(entry.path, target))
+                stats['removed'] += 1
+                if not dry_run:
+                    os.remove(entry.path)
+    logger.info("Symlinks of {}: {}".format(src, stats))
+    return stats
+
+
+def create_symlinks_recursive(src, dst, prune=False, dry_run=False):
     """
     Create symlinks for all files in src directory to dst directory
+    Existing correct symlinks are kept, see sync_symlinks()
     :param src: source directory
     :param dst: destination directory
+    :param prune: remove stale symlinks to src directory
+    :param dry_run: only log changes, don't make them
     :return: system exit code
     """
     logger.info("Creating symlinks for directory: {}".format(src))
@@ -36,13 +143,5 @@ def create_symlinks_recursive(src, dst):
     if not os.path.isdir(dst):
         logger.error("Destination directory does not exist: {}".format(dst))
         return 1
-    for root, dirs, files in os.walk(src):
-        for file in files:
-            src_file = os.path.join(root, file)
-            dst_file = os.path.join(dst, file)
-            if os.path.islink(dst_file) or os.path.isfile(dst_file):
-                logger.info("Removing existing symlink: {}".format(dst_file))
-                os.remove(dst_file)
-            logger.info("Creating symlink: {}".format(dst_file))
-            os.symlink(src_file, dst_file)
+    sync_symlinks(src, dst, prune=prune, dry_run=dry_run)
     return 0
@@ -0,0 +1,160 @@
+import os
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from .package_helper import execute
+from .result_cache import default_cache_dir
+from .log_helper import logger
+
+# Number of parallel downloads
+DEFAULT_WORKERS = 8
+
+
+def default_download_dir():
+    """
+    :return: Directory of downloaded RPM files, inside the user cache directory
+    """
+    return os.path.join(default_cache_dir(), 'rpms')
+
+
+def resolve_command(tool: str, packages: list, installroot: str = None) -> list:
+    """
+    Command printing URLs of packages and all their missing dependencies, without downloading them
+    :param tool: 'yum' or 'dnf'
+    :param packages: list of packages to resolve
+    :param installroot: root directory of the installation, dependencies are resolved against it
+    :return: list of command and arguments
+    """
+    if tool == 'dnf':
+        command = ['dnf', 'download', '--url', '--resolve']
+    else:
+        command = ['yumdownloader', '--urls', '--resolve']
+    if installroot:
+        command += ['--installroot', installroot]
+    return command + packages
+
+
+def download_command(tool: str, packages: list, download_dir: str, installroot: str = None) -> list:
+    """
+    Command downloading packages into directory, yum/dnf verify downloaded files against repository checksums
+    :param tool: 'yum' or 'dnf'
+    :param packages: list of packages to download, without their dependencies
+    :param download_dir: directory of downloaded RPM files
+    :param installroot: root directory of the installation, its repository configuration is used
+    :return: list of command and arguments
+    """
+    if tool == 'dnf':
+        command = ['dnf', 'download', '--destdir', download_dir]
+    else:
+        command = ['yumdownloader', '--destdir', download_dir]
+    if installroot:
+        command += ['--installroot', installroot]
+    return command + packages
+
+
+def package_spec(url: str) -> str:
+    """
+    :param url: RPM URL
+    :return: name-version-release.arch of the package, which is its file name without extension
+    """
+    file_name = os.path.basename(urllib.parse.unquote(urllib.parse.urlparse(url).path))
+    return file_name[:-len('.rpm')] if file_name.endswith('.rpm') else file_name
+
+
+def parse_urls(lines) -> list:
+    """
+    :param lines: output of the resolve command
+    :return: list of RPM URLs, other lines are skipped
+    """
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if '://' in line and line.endswith('.rpm') and ' ' not in line:
+            urls.append(line)
+    return list(dict.fromkeys(urls))
+
+
+class Prefetcher:
+    """
+    Resolves the package set and downloads RPM files in parallel before the install transaction,
+    so that yum installs local files only, and download time is not spent inside the transaction.
+    Files are downloaded by yum/dnf tools, not fetched directly, so that they are checked against repository metadata
+    """
+
+    def __init__(self, tool: str = 'yum', download_dir: str = None, workers: int = DEFAULT_WORKERS):
+        """
+        :param tool: 'yum' or 'dnf', defines the resolve command
+        :param download_dir: directory of downloaded RPM files, default_download_dir() if None
+        :param workers: number of parallel download processes
+        """
+        self.tool = tool
+        self.download_dir = download_dir if download_dir is not None else default_download_dir()
+        self.workers = workers
+
+    def resolve(self, packages: list, installroot: str = None) -> list:
+        """
+        :param packages: list of packages to install
+        :param installroot: root directory of the installation, the host system if None
+        :return: list of RPM URLs of the packages and their dependencies, None if packages can't be resolved
+        """
+        try:
+            ret_code, output = execute(resolve_command(self.tool, packages, installroot))
+        except OSError as e:
+            # yumdownloader is a part of yum-utils, which may be not installed
+            logger.warning(f"Failed to resolve {packages}: {e}")
+            return None
+        if ret_code != 0:
+            logger.warning(f"Failed to resolve {packages}, return code {ret_code}")
+            return None
+        return parse_urls(output)
+
+    def download(self, urls: list, installroot: str = None) -> list:
+        """
+        Download RPM files by yumdownloader or 'dnf download', which check them against repository metadata;
+        files already downloaded are reused by the tool only if they match the metadata
+        :param urls: list of RPM URLs from resolve()
+        :param installroot: root directory of the installation, its repository configuration is used
+        :return: list of downloaded files, None if download failed
+        """
+        specs = [package_spec(url) for url in urls]
+        try:
+            ret_code, output = execute(download_command(self.tool, specs, self.download_dir, installroot))
+        except OSError as e:
+            logger.warning(f"Failed to download {specs}: {e}")
+            return None
+        paths = [os.path.join(self.download_dir, f"{spec}.rpm") for spec in specs]
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if ret_code != 0 or missing:
+            logger.warning(f"Failed to download {specs}, return code {ret_code}, missing {missing}")
+            return None
+        return paths
+
+    def download_all(self, urls: list, installroot: str = None) -> list:
+        """
+        Download RPM files by several download processes in parallel
+        :param urls: list of RPM URLs
+        :param installroot: root directory of the installation, its repository configuration is used
+        :return: list of downloaded files in the order of URLs, None if any download failed
+        """
+        os.makedirs(self.download_dir, exist_ok=True)
+        logger.info(f"Downloading {len(urls)} packages to {self.download_dir}")
+        chunks = [urls[start::self.workers] for start in range(min(self.workers, len(urls)))]
+        with ThreadPoolExecutor(max_workers=max(len(chunks), 1)) as executor:
+            results = list(executor.map(lambda chunk: self.download(chunk, installroot), chunks))
+        if any(paths is None for paths in results):
+            return None
+        downloaded = {url: path for chunk, paths in zip(chunks, results) for url, path in zip(chunk, paths)}
+        return [downloaded[url] for url in urls]
+
+    def prefetch(self, packages: list, installroot: str = None) -> list:
+        """
+        Resolve packages and download them with all missing dependencies.
+        Download directory may be shared by several installroots and processes
+        :param packages: list of packages to install
+        :param installroot: root directory of the installation, the host system if None
+        :return: list of downloaded RPM files, empty if all packages and dependencies are installed already,
+                 None if packages can't be resolved or downloaded
+        """
+        urls = self.resolve(packages, installroot)
+        if urls is None:
+            return None
+        return self.download_all(urls, installroot)
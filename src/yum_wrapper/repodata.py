@@ -0,0 +1,232 @@
+import os
+import re
+import bz2
+import glob
+import gzip
+import lzma
+import shutil
+import sqlite3
+import xml.etree.ElementTree as ElementTree
+from .package import Package, evr_string
+from .package_table import PackageTable
+from .package_matcher import PackageMatcher
+from .result_cache import default_cache_dir
+from .log_helper import logger
+
+# yum keeps repository metadata in /var/cache/yum/$basearch/$releasever/<repo>, dnf in /var/cache/dnf/<repo>-<hash>
+CACHE_ROOTS = ['/var/cache/dnf', '/var/cache/yum']
+REPOMD_GLOBS = ['*/repodata/repomd.xml', '*/repomd.xml', '*/*/*/repodata/repomd.xml', '*/*/*/repomd.xml']
+REPO_NS = '{http://linux.duke.edu/metadata/repo}'
+COMMON_NS = '{http://linux.duke.edu/metadata/common}'
+DECOMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+# dnf appends hash of the repository URL to the cache directory name
+DNF_REPO_SUFFIX = re.compile(r'-[0-9a-f]{16}$')
+
+
+def open_compressed(path: str):
+    """
+    Open metadata file for reading in binary mode, decompress it if needed
+    :param path: path to the file, compression is detected by extension
+    :return: file object
+    """
+    opener = DECOMPRESSORS.get(os.path.splitext(path)[1], open)
+    return opener(path, 'rb')
+
+
+class Repository:
+    """
+    Repository metadata in the yum/dnf cache
+    """
+
+    def __init__(self, repomd: str):
+        """
+        :param repomd: path to repomd.xml of the repository
+        """
+        self.repomd = repomd
+        repo_dir = os.path.dirname(repomd)
+        if os.path.basename(repo_dir) == 'repodata':
+            repo_dir = os.path.dirname(repo_dir)
+        self.path = repo_dir
+        self.name = DNF_REPO_SUFFIX.sub('', os.path.basename(repo_dir))
+        self._locations = None
+
+    def revision(self) -> tuple:
+        """
+        :return: state of repomd.xml, which changes when the metadata is updated
+        """
+        stat = os.stat(self.repomd)
+        return stat.st_mtime_ns, stat.st_size
+
+    def locations(self) -> dict:
+        """
+        :return: dictionary of metadata type (e.g. 'primary', 'primary_db') and its file location
+        """
+        if self._locations is None:
+            self._locations = {}
+            for data in ElementTree.parse(self.repomd).getroot().iter(f'{REPO_NS}data'):
+                location = data.find(f'{REPO_NS}location')
+                if location is not None:
+                    self._locations[data.get('type')] = location.get('href')
+        return self._locations
+
+    def metadata_file(self, data_type: str) -> str:
+        """
+        Find metadata file of the given type in the cache.
+        dnf keeps files in 'repodata' as they are referenced from repomd.xml,
+        yum keeps them next to repomd.xml, and also keeps decompressed sqlite databases
+        :param data_type: metadata type, e.g. 'primary' or 'primary_db'
+        :return: path to the file, None if it's not in cache
+        """
+        href = self.locations().get(data_type)
+        if href is None:
+            return None
+        file_name = os.path.basename(href)
+        uncompressed_name, extension = os.path.splitext(file_name)
+        candidates = [os.path.join(self.path, href), os.path.join(self.path, file_name)]
+        if extension in DECOMPRESSORS:
+            candidates = [os.path.join(self.path, uncompressed_name),
+                          os.path.join(self.path, 'repodata', uncompressed_name)] + candidates
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def primary_db(self) -> str:
+        """
+        :return: path to uncompressed primary sqlite database, None if it's not available
+        """
+        path = self.metadata_file('primary_db')
+        if path is None or os.path.splitext(path)[1] not in DECOMPRESSORS:
+            return path
+        # Compressed database is decompressed once to our own cache
+        mtime_ns, size = self.revision()
+        db_path = os.path.join(default_cache_dir(), 'repodata', f"{self.name}-{mtime_ns}-{size}.sqlite")
+        if not os.path.isfile(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            tmp_path = f"{db_path}.{os.getpid()}.tmp"
+            with open_compressed(path) as compressed, open(tmp_path, 'wb') as db_file:
+                shutil.copyfileobj(compressed, db_file)
+            os.replace(tmp_path, db_path)
+        return db_path
+
+    def iter_packages(self):
+        """
+        Read packages from primary metadata, sqlite database is preferred over XML
+        :return: generator of Package objects
+        """
+        db_path = self.primary_db()
+        if db_path is not None:
+            yield from self._iter_primary_db(db_path)
+            return
+        xml_path = self.metadata_file('primary')
+        if xml_path is not None:
+            yield from self._iter_primary_xml(xml_path)
+            return
+        logger.warning(f"Primary metadata of repository {self.name} is not found in {self.path}")
+
+    def _iter_primary_db(self, db_path: str):
+        """
+        :param db_path: path to primary sqlite database
+        :return: generator of Package objects
+        """
+        connection = sqlite3.connect(db_path)
+        try:
+            query = "SELECT name, arch, epoch, version, release, summary FROM packages"
+            for name, arch, epoch, version, release, summary in connection.execute(query):
+                yield Package.from_fields(name, arch, evr_string(epoch, version, release), self.name, summary)
+        finally:
+            connection.close()
+
+    def _iter_primary_xml(self, xml_path: str):
+        """
+        :param xml_path: path to primary XML, possibly compressed
+        :return: generator of Package objects
+        """
+        with open_compressed(xml_path) as xml_file:
+            for event, element in ElementTree.iterparse(xml_file):
+                if element.tag != f'{COMMON_NS}package':
+                    continue
+                version = element.find(f'{COMMON_NS}version')
+                yield Package.from_fields(element.findtext(f'{COMMON_NS}name'),
+                                          element.findtext(f'{COMMON_NS}arch'),
+                                          evr_string(version.get('epoch'), version.get('ver'), version.get('rel')),
+                                          self.name,
+                                          element.findtext(f'{COMMON_NS}summary'))
+                element.clear()
+
+
+class RepodataReader:
+    """
+    Answer read-only queries from repository metadata in yum/dnf cache, without running yum.
+    Packages of every repository are loaded once, and reloaded only when its repomd.xml is changed
+    """
+
+    def __init__(self, cache_roots: list = None):
+        """
+        :param cache_roots: yum and dnf cache directories
+        """
+        self.cache_roots = cache_roots if cache_roots is not None else CACHE_ROOTS
+        self._packages = {}
+
+    def repositories(self) -> list:
+        """
+        :return: list of Repository objects found in cache directories
+        """
+        repomd_files = set()
+        for cache_root in self.cache_roots:
+            for pattern in REPOMD_GLOBS:
+                repomd_files.update(glob.glob(os.path.join(cache_root, pattern)))
+        return [Repository(repomd) for repomd in sorted(repomd_files)]
+
+    def packages(self, repository: Repository) -> PackageTable:
+        """
+        :return: PackageTable of the repository packages
+        """
+        revision = repository.revision()
+        cached = self._packages.get(repository.repomd)
+        if cached is None or cached[0] != revision:
+            logger.info(f"Loading metadata of repository {repository.name}")
+            cached = revision, PackageTable(repository.iter_packages())
+            self._packages[repository.repomd] = cached
+        return cached[1]
+
+    def iter_available(self, patterns: list = None):
+        """
+        :param patterns: package names or name.arch, wildcards are supported; all packages if None
+        :return: generator of Package objects
+        """
+        matcher = PackageMatcher(patterns) if patterns else None
+        for repository in self.repositories():
+            table = self.packages(repository)
+            rows = matcher.select(table) if matcher is not None else range(len(table))
+            for row in rows:
+                yield table.row(row)
+
+    def list_available(self, patterns: list = None) -> PackageTable:
+        """
+        :param patterns: package names or name.arch, wildcards are supported; all packages if None
+        :return: PackageTable of available packages
+        """
+        return PackageTable(self.iter_available(patterns))
+
+    def search(self, terms: str) -> PackageTable:
+        """
+        Search packages by name and summary, like 'yum search' does.
+        Packages matching more terms go first, then packages matching by name.
+        Every name.arch is reported once, even if it's available in several versions or repositories
+        :param terms: whitespace-separated search terms, case-insensitive
+        :return: PackageTable of found packages
+        """
+        terms = terms.lower().split()
+        found = {}
+        for repository in self.repositories():
+            for package in self.packages(repository):
+                if (package.name, package.arch) in found:
+                    continue
+                name = package.name.lower()
+                summary = (package.summary or '').lower()
+                name_matches = sum(term in name for term in terms)
+                matches = sum(term in name or term in summary for term in terms)
+                if matches:
+                    found[package.name, package.arch] = (-matches, -name_matches, package.name, package.arch), package
+        return PackageTable(package for _, package in sorted(found.values(), key=lambda match: match[0]))
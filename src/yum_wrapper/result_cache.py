@@ -0,0 +1,178 @@
+import os
+import glob
+import json
+import time
+import hashlib
+import threading
+from .path_utils import home_dir
+from .rpmdb import RPMDB_DIRS
+from .log_helper import logger
+
+# Repository metadata, yum keeps it in /var/cache/yum/$basearch/$releasever/<repo>, dnf in /var/cache/dnf/<repo>-<hash>
+METADATA_GLOBS = ['/var/cache/yum/*/*/*/repomd.xml',
+                  '/var/cache/yum/*/*/*/repodata/repomd.xml',
+                  '/var/cache/dnf/*/repodata/repomd.xml']
+
+
+def default_cache_dir():
+    """
+    :return: Cache directory of yum_wrapper, respects XDG_CACHE_HOME
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(home_dir(), '.cache')
+    return os.path.join(cache_home, 'yum_wrapper')
+
+
+class ResultCache:
+    """
+    Persistent cache of read-only yum commands output.
+    Every entry is a JSON file keyed by the command and its arguments.
+    Entry is valid while repository metadata and rpmdb are not changed (compared by their mtime and size)
+    and its TTL is not expired. When cache exceeds its size, least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = None, ttl: int = 3600, max_size: int = 64 * 1024 * 1024,
+                 metadata_globs: list = None, rpmdb_dirs: list = None):
+        """
+        :param cache_dir: directory for cache entries, ~/.cache/yum_wrapper/results by default
+        :param ttl: entry time to live in seconds
+        :param max_size: maximum total size of the cache entries in bytes
+        :param metadata_globs: glob patterns of repomd.xml files, which invalidate cache when changed
+        :param rpmdb_dirs: rpmdb directories, which invalidate cache when changed
+        """
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(default_cache_dir(), 'results')
+        self.ttl = ttl
+        self.max_size = max_size
+        self.metadata_globs = metadata_globs if metadata_globs is not None else METADATA_GLOBS
+        self.rpmdb_dirs = rpmdb_dirs if rpmdb_dirs is not None else RPMDB_DIRS
+        # Cache is shared by daemon threads: an outdated entry is removed only if no other thread has replaced it
+        self._lock = threading.Lock()
+
+    def fingerprint(self) -> str:
+        """
+        :return: hash of the repository metadata and rpmdb state
+        """
+        files = []
+        for pattern in self.metadata_globs:
+            files.extend(glob.glob(pattern))
+        for rpmdb_dir in self.rpmdb_dirs:
+            if os.path.isdir(rpmdb_dir):
+                files.extend(entry.path for entry in os.scandir(rpmdb_dir) if entry.is_file())
+        state = hashlib.sha256()
+        for path in sorted(files):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode("utf-8"))
+        return state.hexdigest()
+
+    def _entry_path(self, command: list) -> str:
+        """
+        :return: path to the cache entry of the command
+        """
+        key = hashlib.sha256(json.dumps(command).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, command: list):
+        """
+        Read cached command output
+        :param command: list of command and arguments
+        :return: list of output lines, None if there is no valid entry
+        """
+        entry_path = self._entry_path(command)
+        try:
+            with open(entry_path, 'r') as entry_file:
+                entry = json.load(entry_file)
+                entry_stat = os.fstat(entry_file.fileno())
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['created'] > self.ttl or entry['fingerprint'] != self.fingerprint():
+            logger.info(f"Cache entry for {command} is outdated")
+            with self._lock:
+                if self._same_file(entry_path, entry_stat):
+                    self._remove(entry_path)
+            return None
+        # Access time is tracked by mtime, so that it works on noatime file systems
+        try:
+            os.utime(entry_path)
+        except OSError:
+            # Evicted by another writer after it was read
+            pass
+        return entry['lines']
+
+    def put(self, command: list, lines: list):
+        """
+        Save command output to cache
+        :param command: list of command and arguments
+        :param lines: list of output lines
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = self._entry_path(command)
+        entry = {'command': command, 'created': time.time(), 'fingerprint': self.fingerprint(), 'lines': lines}
+        # tempfile is slow to import and needed only when the cache is updated
+        import tempfile
+        # Unique temporary file, entry may be written by several threads and processes at once
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.entry', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as entry_file:
+                json.dump(entry, entry_file)
+            with self._lock:
+                os.replace(temp_path, entry_path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        with self._lock:
+            self._evict()
+
+    def clear(self):
+        """
+        Remove all cache entries
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                self._remove(entry.path)
+
+    def _evict(self):
+        """
+        Remove least recently used entries until cache fits its maximum size
+        """
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # Evicted by another writer
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _same_file(path: str, stat: os.stat_result) -> bool:
+        """
+        :return: True if path is still the file with the given stat, i.e. it's not replaced by a newer entry
+        """
+        try:
+            current = os.stat(path)
+        except OSError:
+            return False
+        return (current.st_dev, current.st_ino) == (stat.st_dev, stat.st_ino)
+
+    @staticmethod
+    def _remove(path: str):
+        """
+        Remove cache entry, ignore if it's already removed by another process
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
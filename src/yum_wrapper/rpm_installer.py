@@ -1,127 +1,343 @@
 import os.path
-import argparse
 import sys
-from package_helper import execute, read_packagefile
-from path_utils import home_dir
+import threading
+from .package_helper import execute, execute_stream
+from .package import Package
+from .package_table import PackageTable
+from .result_cache import ResultCache
+from .rpmdb import parse_installed, query_installed_command, root_rpmdb_dirs, rpmdb_revision
+from .package_matcher import PackageMatcher
+from .rpm_version import upgrade_plan
+from .search_index import SearchIndex
+from .yum_shell import YumShell, YumShellPool
+from .instrumentation import timed
+from .yum_output import INSTALLED_SECTIONS, parse_list, parse_search
+from .manifest import ManifestCache, load_manifest
+from .log_helper import logger
 
+# Modules used only by some commands (repodata, prefetch, multiprocessing) are imported on demand,
+# so that the command line starts fast
 
-class Package:
+
+class RpmInstaller:
     """
-    Package class
+    Install packages on RPM-based Linux distribution
     """
 
-    def __init__(self, package_info: str):
+    def __init__(self, tool: str = 'yum', cache: ResultCache = None, repodata: 'RepodataReader' = None,
+                 shell_sessions: int = 0, installroot: str = None, cache_only: bool = False,
+                 manifest_cache: ManifestCache = None):
         """
-        Package info provided by yum or dnf
-        This is a string that have format "Name.Arch Version Repo"
-        E.g. "libwpg.x86_64 0.3.0-1.el7 anaconda"
-        Repo name may start or may not start with '@' sign, we will remove it later
+        :param tool: 'yum' by default
+        :param cache: persistent cache of list and search results, results are not cached if None
+        :param repodata: reader of cached repository metadata, which serves available packages and search
+                         without running yum; yum is used if None
+        :param shell_sessions: number of persistent 'yum shell' sessions for read-only queries,
+                               installs then also go through one persistent session; a process per command if 0
+        :param installroot: root directory of the installation, e.g. container image or chroot; the host if None
+        :param cache_only: run yum from its metadata cache only ('yum -C'), without updating repositories
+        :param manifest_cache: persistent cache of compiled package files, package files are compiled every time if None
         """
-        package_info_list = package_info.split()
-        if len(package_info_list) != 3:
-            raise ValueError(f"Invalid package info: {package_info}")
-        self.name, self.arch = package_info_list[0].split('.')
-        self.version = package_info_list[1]
-        self.repo = package_info_list[2][1:] if package_info_list[2].startswith('@') else package_info_list[2]
+        self.tool = tool
+        self.cache = cache
+        self.repodata = repodata
+        self.installroot = installroot
+        self.cache_only = cache_only
+        self.manifest_cache = manifest_cache
+        self.search_index = SearchIndex(repodata) if repodata is not None else None
+        self._installed = None
+        # Installed set is shared by concurrent queries of daemon threads, it's loaded by one of them
+        self._installed_lock = threading.Lock()
+        self._rpmdb_dirs = root_rpmdb_dirs(installroot) if installroot else None
+        self._shell_pool = None
+        self._install_shell = None
+        if shell_sessions > 0:
+            self._shell_pool = YumShellPool(self._base_command() + ['shell'], shell_sessions)
+            self._install_shell = YumShell(['sudo'] + self._base_command() + ['-y', 'shell'])
 
-    def name(self):
+    def _base_command(self) -> list:
         """
-        Package name without Arch suffix, e.g. "libwpg"
+        :return: yum command with global options, e.g. ['yum', '--installroot', '/srv/image']
         """
-        return self.name
+        command = [self.tool]
+        if self.cache_only:
+            command.append('-C')
+        if self.installroot:
+            command += ['--installroot', self.installroot]
+        return command
 
-    def info(self):
+    def cache_only_copy(self):
         """
-        Return full package info in format "Name.Arch Version Repo"
+        Installer for read-only queries, which may run concurrently with an install transaction.
+        Result cache, repository metadata reader and search index are shared with this installer
+        :return: RpmInstaller running yum in cache-only mode
         """
-        return f"{self.name}.{self.arch}-{self.version}-{self.repo}"
+        installer = RpmInstaller(self.tool, cache=self.cache, installroot=self.installroot, cache_only=True)
+        installer.repodata = self.repodata
+        installer.search_index = self.search_index
+        return installer
 
-    def __str__(self):
+    def close(self):
         """
-        Short Package representation, name without Arch suffix, e.g. "libwpg"
+        Exit persistent yum shell sessions
         """
-        return self.name()
+        if self._shell_pool is not None:
+            self._shell_pool.close()
+        if self._install_shell is not None:
+            self._install_shell.close()
 
-    def __repr__(self):
+    @timed
+    def install(self, package) -> int:
         """
-        Full Package representation, string formatted like "Name.Arch Version Repo"
+        Install single RPM package
+        :return: return code of the install command
         """
-        return self.info()
-
+        return self._install_transaction([package])
 
-class RpmInstaller:
-    """
-    Install packages on RPM-based Linux distribution
-    """
+    def _install_transaction(self, packages: list) -> int:
+        """
+        Install several RPM packages in a single yum transaction
+        :param packages: list of packages to install
+        :return: return code of the install command
+        """
+        if self._install_shell is not None:
+            ret_code, output = self._install_shell.execute(['install'] + packages)
+            if ret_code == 0:
+                ret_code, output = self._install_shell.execute(['run'])
+            if ret_code != 0 and self._install_shell.alive():
+                self._install_shell.execute(['ts', 'reset'])
+        else:
+            ret_code, output = execute(['sudo'] + self._base_command() + ['install', '-y'] + packages)
+        if ret_code != 0:
+            logger.warning(f"Failed to install {packages}, return code {ret_code}")
+        return ret_code
 
-    def __init__(self, tool: str = yum):
+    def _install_files(self, paths: list) -> int:
         """
-        :param tool: 'yum' by default
+        Install downloaded RPM files in a single yum transaction, with GPG signature check of local files
+        which yum skips by default; yum shell sessions are not used, as their options are fixed on start
+        :param paths: list of RPM files
+        :return: return code of the install command
         """
-        self.tool = tool
+        ret_code, output = execute(['sudo'] + self._base_command() +
+                                   ['--setopt=localpkg_gpgcheck=1', 'install', '-y'] + paths)
+        if ret_code != 0:
+            logger.warning(f"Failed to install {paths}, return code {ret_code}")
+        return ret_code
 
-    def install(self, package):
+    def _install_bisect(self, packages: list, report: dict):
         """
-        Install single RPM package
+        Install packages in one transaction, and if it fails, split the batch in halves
+        and install them separately, until the failed packages are found
+        :param packages: list of packages to install
+        :param report: dictionary to fill with package return codes
         """
-        execute(['sudo', self.tool, 'install', '-y', package])
+        ret_code = self._install_transaction(packages)
+        if ret_code == 0 or len(packages) == 1:
+            for package in packages:
+                report[package] = ret_code
+            return
+        middle = len(packages) // 2
+        self._install_bisect(packages[:middle], report)
+        self._install_bisect(packages[middle:], report)
 
-    def install_list(self, packages: list):
+    @timed
+    def install_list(self, packages: list, batch_size: int = None, prefetch: 'Prefetcher' = None) -> dict:
         """
         Install RPM packages from list
+        Packages are installed in batches of batch_size packages, one yum transaction per batch.
+        If a batch fails, it is bisected to find the failed packages, and the rest of them is installed anyway.
+        If prefetcher is set, packages and their dependencies are downloaded in parallel first,
+        and installed from the downloaded files in a single transaction; batches are used only if it fails.
+        Nothing is installed if the prefetcher resolves no missing packages
         :param packages: list of packages to install
+        :param batch_size: number of packages in one transaction, all packages in one transaction if None
+        :param prefetch: Prefetcher downloading packages before the transaction, no prefetch if None
+        :return: dictionary of package name and its install return code, 0 for success
         """
-        for package in packages:
-            self.install(package)
+        if not packages:
+            return {}
+        if prefetch is not None:
+            return self.install_downloaded(packages, prefetch.prefetch(packages, self.installroot), batch_size)
+        report = {}
+        batch_size = batch_size if batch_size and batch_size > 0 else len(packages)
+        for start in range(0, len(packages), batch_size):
+            self._install_bisect(packages[start:start + batch_size], report)
+        return report
 
-    def install_file(self, package_file: str):
+    def install_downloaded(self, packages: list, paths: list, batch_size: int = None) -> dict:
+        """
+        Install RPM packages from the files downloaded for them in a single transaction,
+        if it fails, packages are installed by name like install_list() does
+        :param packages: list of packages to install
+        :param paths: downloaded files of the packages and their missing dependencies,
+                      empty if all of them are installed already, None if download failed
+        :param batch_size: number of packages in one transaction of the install by name
+        :return: dictionary of package name and its install return code, 0 for success
         """
-        Install RPM packages from file
-        Remove comments and empty lines from the list
+        if paths == []:
+            logger.info(f"Packages {packages} and their dependencies are installed already")
+            return {package: 0 for package in packages}
+        if paths is not None and self._install_files(paths) == 0:
+            return {package: 0 for package in packages}
+        logger.warning("Failed to install prefetched packages, installing them by name")
+        return self.install_list(packages, batch_size=batch_size)
+
+    @timed
+    def plan(self, packages: list, refresh: bool = False) -> list:
+        """
+        Resolve packages against the installed set, queried from rpmdb once.
+        A package is installed if any installed package matches it by name, name.arch or name-version,
+        capabilities (e.g. file paths) are never matched and always planned for install
+        :param packages: list of packages to install, wildcards are supported
+        :param refresh: query rpmdb even if it has not been changed
+        :return: list of packages which are not installed yet, in the original order
+        """
+        if not packages:
+            return []
+        installed = self.installed_packages(refresh=refresh)
+        matcher = PackageMatcher(packages)
+        satisfied = set()
+        for row in matcher.select(installed):
+            satisfied.update(matcher.matching_patterns(installed.names[row], installed.arches[row],
+                                                       installed.versions[row]))
+        return [package for index, package in enumerate(packages) if index not in satisfied]
+
+    @timed
+    def install_file(self, package_file: str, batch_size: int = None, skip_installed: bool = True,
+                     prefetch: 'Prefetcher' = None) -> dict:
+        """
+        Install RPM packages from manifest file, see manifest module for its format
         :param package_file: file with list of packages to install
+        :param batch_size: number of packages in one transaction, all packages in one transaction if None
+        :param skip_installed: install only packages which are not installed yet, yum is not run if there are none
+        :param prefetch: Prefetcher downloading packages before the transaction, no prefetch if None
+        :return: dictionary of package name and its install return code, 0 for success
         """
-        packages = read_packagefile(package_file)
-        self.install_list(packages)
+        packages = load_manifest(package_file, cache=self.manifest_cache)
+        if skip_installed:
+            packages = self.plan(packages)
+            logger.info(f"Packages to install: {packages}")
+        return self.install_list(packages, batch_size=batch_size, prefetch=prefetch)
 
-    @staticmethod
-    def _parse_packages(packages: list) -> list[Package]:
+    def _stream(self, command: list):
         """
-        Parse packages from package information list, provided by 'yum list'
-        :param packages: list of packages information strings formatted as "Name.Arch Version Repo"
-        :return: list of Package objects
+        Stream output of the command, yum commands go through a shell session if shell sessions are enabled
+        :param command: list of command and arguments
+        :return: generator of output lines, returning the command return code
         """
-        resulted_packages = []
-        for package_info in packages:
-            package = Package(package_info=package_info)
-            resulted_packages.append(package)
-        return resulted_packages
+        base_cmd = self._base_command()
+        if self._shell_pool is not None and command[:len(base_cmd)] == base_cmd:
+            ret_code, lines = self._shell_pool.execute(command[len(base_cmd):])
+            yield from lines
+            return ret_code
+        return (yield from execute_stream(command))
 
-    def search(self, package_name: str) -> list[Package]:
+    def _query(self, command: list, refresh: bool = False):
         """
-        Search for RPM packages using 'yum search'.
-        Response is a list of strings, which consists of a header, which we ignore, and then a list of packages.
-        Every package is a string with format "Name.Arch Version Repo".
+        Stream output of read-only yum command, use cached output if the cache is enabled.
+        Output is saved to cache only if the command succeeded and has been read until the end
+        :param command: list of command and arguments
+        :param refresh: ignore cached output and run the command
+        :return: generator of output lines
+        """
+        if self.cache is None:
+            return (yield from self._stream(command))
+        if not refresh:
+            lines = self.cache.get(command)
+            if lines is not None:
+                yield from lines
+                return 0
+        lines = []
+        stream = self._stream(command)
+        while True:
+            try:
+                line = next(stream)
+            except StopIteration as result:
+                ret_code = result.value
+                break
+            lines.append(line)
+            yield line
+        if ret_code == 0:
+            self.cache.put(command, lines)
+        return ret_code
+
+    def iter_search(self, package_name: str, refresh: bool = False):
+        """
+        Search for RPM packages using 'yum search', yield packages as soon as yum prints them.
+        Output is parsed by yum_output.parse_search().
         :param package_name: package name to search
-        :return: list of Package objects
+        :param refresh: ignore cached results
+        :return: generator of Package objects
         """
         logger.info(f"Searching for {package_name}")
-        base_cmd = [self.tool, 'search', package_name]
-        ret_code, packages = execute(base_cmd)
-        return self._parse_packages(packages[1:])
+        if self.search_index is not None:
+            for table, row in self.search_index.search_rows(package_name):
+                yield table.row(row)
+            return
+        base_cmd = self._base_command() + ['search', package_name]
+        for name, arch, summary in parse_search(self._query(base_cmd, refresh=refresh)):
+            yield Package.from_fields(name, sys.intern(arch), summary=summary)
 
-    def list(self, packages: list = None, selection: str = None) -> (list[Package], list[Package]):
+    @timed
+    def search(self, package_name: str, refresh: bool = False) -> PackageTable:
+        """
+        Search for RPM packages using 'yum search'.
+        :param package_name: package name to search
+        :param refresh: ignore cached results
+        :return: PackageTable of found packages
+        """
+        if self.search_index is not None:
+            # Rows are copied from the index tables, without creating Package objects
+            return self.search_index.search(package_name)
+        return PackageTable(self.iter_search(package_name, refresh=refresh))
+
+    @timed
+    def installed_packages(self, refresh: bool = False) -> PackageTable:
+        """
+        All installed packages, queried from rpmdb once and kept until rpmdb is changed
+        :param refresh: query rpmdb even if it has not been changed
+        :return: PackageTable of installed packages
+        """
+        with self._installed_lock:
+            revision = rpmdb_revision(self._rpmdb_dirs)
+            if refresh or self._installed is None or self._installed[0] != revision:
+                command = query_installed_command(installroot=self.installroot)
+                self._installed = revision, PackageTable(parse_installed(self._query(command, refresh=refresh)))
+            return self._installed[1]
+
+    def _iter_list_local(self, packages: list = None, selection: str = None, refresh: bool = False):
+        """
+        List packages matching patterns from the installed set and repository metadata, without running yum.
+        All patterns are compiled to a single matcher and evaluated in one pass over every package set.
+        Like in 'yum list', available packages don't include already installed versions
+        :param packages: list of available/installed packages to list, wildcards are supported
+        :param selection: selection of packages to list: "installed", "available", or "all"
+        :param refresh: query rpmdb even if it has not been changed
+        :return: generator of tuples (section, Package), where section is "installed" or "available"
+        """
+        matcher = PackageMatcher(packages) if packages else None
+        installed = self.installed_packages(refresh=refresh)
+        if selection != 'available':
+            rows = matcher.select(installed) if matcher is not None else range(len(installed))
+            for row in rows:
+                yield 'installed', installed.row(row)
+        if selection != 'installed':
+            installed_keys = installed.keys()
+            for repository in self.repodata.repositories():
+                available = self.repodata.packages(repository)
+                rows = matcher.select(available) if matcher is not None else range(len(available))
+                for row in rows:
+                    if available.key(row) not in installed_keys:
+                        yield 'available', available.row(row)
+
+    def _list_command(self, packages: list = None, selection: str = None) -> list:
         """
-        List RPM packages using 'yum list'.
-        Response is a list of strings, which consists of a header, which we ignore, and then a list of packages.
-        List of packages may include installed and available packages.
-        Every package is a string with format "Name.Arch Version Repo".
-        We may include a list of packages we'd like to list. Package names support wildcards.
         :param packages: list of available/installed packages to list
         :param selection: selection of packages to list: "installed", "available", or "all"
-        :return: tuple of two lists of Package objects, the first one is installed packages, the second is available
+        :return: 'yum list' command line
         """
-        logger.info(f"Installing {packages}")
-        base_cmd = [self.tool, 'list']
+        base_cmd = self._base_command() + ['list']
 
         if selection is not None and selection in ['available', 'installed', 'all']:
             base_cmd += [selection]
@@ -130,46 +346,169 @@ class RpmInstaller:
             base_cmd += packages
         elif packages and isinstance(packages, str):
             base_cmd += [packages]
+        return base_cmd
 
-        # TODO: sort out situation with only installed or only available
-        ret_code, packages = execute(base_cmd)
-        installed_index = packages.index('Installed Packages')
-        available_index = packages.index('Available Packages')
-        installed_packages = self._parse_packages(packages[installed_index + 1:available_index])
-        available_packages = self._parse_packages(packages[available_index + 1:])
+    def _iter_list_output(self, command: list, refresh: bool = False):
+        """
+        Run 'yum list' and parse its output in a single pass
+        :param command: 'yum list' command line
+        :param refresh: ignore cached results
+        :return: generator of tuples (section, name, arch, version, repo), see yum_output.parse_list()
+        """
+        return parse_list(self._query(command, refresh=refresh))
 
+    def iter_list(self, packages: list = None, selection: str = None, refresh: bool = False):
+        """
+        List RPM packages using 'yum list', yield packages as soon as yum prints them.
+        Installed packages only are queried from rpmdb with a single 'rpm -qa' call, without loading repositories.
+        If repository metadata reader is set, packages are matched locally and yum is not used at all.
+        Output is parsed by yum_output.parse_list(), any of its sections may be missing.
+        :param packages: list of available/installed packages to list
+        :param selection: selection of packages to list: "installed", "available", or "all"
+        :param refresh: ignore cached results
+        :return: generator of tuples (section, Package), where section is "installed", "available",
+                 or another yum_output.LIST_SECTIONS section
+        """
+        logger.info(f"Listing {packages}")
+        if self.repodata is not None:
+            yield from self._iter_list_local(packages, selection, refresh=refresh)
+            return
+        if selection == 'installed':
+            command = query_installed_command(packages, self.installroot)
+            for package in parse_installed(self._query(command, refresh=refresh)):
+                yield 'installed', package
+            return
+        base_cmd = self._list_command(packages, selection)
+        for section, name, arch, version, repo in self._iter_list_output(base_cmd, refresh=refresh):
+            yield section, Package.from_fields(name, sys.intern(arch), version, repo)
+
+    @timed
+    def list(self, packages: list = None, selection: str = None, refresh: bool = False) -> (PackageTable, PackageTable):
+        """
+        List RPM packages using 'yum list'.
+        List of packages may include installed and available packages.
+        We may include a list of packages we'd like to list. Package names support wildcards.
+        :param packages: list of available/installed packages to list
+        :param selection: selection of packages to list: "installed", "available", or "all"
+        :param refresh: ignore cached results
+        :return: tuple of two PackageTable objects, the first one is installed packages, the second is available
+        """
+        installed_packages = PackageTable()
+        available_packages = PackageTable()
+        if self.repodata is not None or selection == 'installed':
+            for section, package in self.iter_list(packages, selection, refresh=refresh):
+                if section in INSTALLED_SECTIONS:
+                    installed_packages.append(package)
+                else:
+                    available_packages.append(package)
+            return installed_packages, available_packages
+        # Parsed tuples go to the tables directly, without Package objects
+        logger.info(f"Listing {packages}")
+        base_cmd = self._list_command(packages, selection)
+        for section, name, arch, version, repo in self._iter_list_output(base_cmd, refresh=refresh):
+            table = installed_packages if section in INSTALLED_SECTIONS else available_packages
+            table.add(name, arch, version, repo)
         return installed_packages, available_packages
 
+    @timed
+    def upgrades(self, packages: list = None, refresh: bool = False) -> PackageTable:
+        """
+        Find installed packages which have newer available versions
+        :param packages: list of packages to check, wildcards are supported; all packages if None
+        :param refresh: ignore cached results
+        :return: PackageTable of the newest available versions of upgradable packages
+        """
+        installed, available = self.list(packages, selection='all', refresh=refresh)
+        return upgrade_plan(installed, available)
+
+
+def _install_root(tool: str, installroot: str, packages: list, batch_size: int, paths: list) -> dict:
+    """
+    Install planned packages into a single root, runs in a worker process of install_roots()
+    :param paths: files downloaded for the root by install_roots(), packages are installed by name if None
+    """
+    rpm_installer = RpmInstaller(tool, installroot=installroot)
+    if paths is None:
+        return rpm_installer.install_list(packages, batch_size=batch_size)
+    return rpm_installer.install_downloaded(packages, paths, batch_size=batch_size)
+
+
+def _download_roots(prefetch: 'Prefetcher', plans: dict) -> dict:
+    """
+    Resolve packages planned for every root, and download the files missing in any of them once.
+    Every file is downloaded with the repository configuration of the first root which needs it
+    :param prefetch: Prefetcher downloading into the directory shared by all roots
+    :param plans: dictionary of root and its list of packages to install
+    :return: dictionary of root and its list of downloaded files, None if they can't be resolved or downloaded
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(len(plans), 1)) as executor:
+        resolved = dict(zip(plans, executor.map(
+            lambda installroot: prefetch.resolve(plans[installroot], installroot) if plans[installroot] else [],
+            plans)))
+    downloaded = {}
+    for installroot, urls in resolved.items():
+        missing = [url for url in urls or [] if url not in downloaded]
+        if missing:
+            paths = prefetch.download_all(missing, installroot)
+            downloaded.update(zip(missing, paths if paths is not None else [None] * len(missing)))
+    files = {}
+    for installroot, urls in resolved.items():
+        paths = [downloaded[url] for url in urls] if urls is not None else None
+        files[installroot] = paths if paths is None or None not in paths else None
+    return files
+
+
+def install_roots(package_file: str, installroots: list, tool: str = 'yum', workers: int = None,
+                  batch_size: int = None, prefetch: 'Prefetcher' = None) -> dict:
+    """
+    Install package file into several roots concurrently, one worker process per root at a time.
+    The package file is planned against every root in this process first. If prefetcher is set, packages
+    missing in the roots are resolved and downloaded here before the workers start, so that every RPM
+    is downloaded once, and every worker installs the downloaded files of its root
+    :param package_file: file with list of packages to install
+    :param installroots: list of root directories, e.g. container images or chroots
+    :param tool: 'yum' by default
+    :param workers: maximum number of concurrent installs, number of CPUs by default
+    :param batch_size: number of packages in one transaction, all packages in one transaction if None
+    :param prefetch: Prefetcher downloading into the directory shared by all roots, no prefetch if None
+    :return: dictionary of root and its install report, every package of a failed root is reported with -1
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    packages = load_manifest(package_file)
+    results = {}
+    plans = {}
+    for installroot in installroots:
+        try:
+            plans[installroot] = RpmInstaller(tool, installroot=installroot).plan(packages)
+        except Exception as e:
+            logger.warning(f"Failed to plan install into {installroot}: {e}")
+            results[installroot] = {package: -1 for package in packages}
+    files = _download_roots(prefetch, plans) if prefetch is not None else dict.fromkeys(plans)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {installroot: executor.submit(_install_root, tool, installroot, plan, batch_size,
+                                                files[installroot])
+                   for installroot, plan in plans.items()}
+        for installroot, future in futures.items():
+            try:
+                results[installroot] = future.result()
+            except Exception as e:
+                logger.warning(f"Failed to install into {installroot}: {e}")
+                results[installroot] = {package: -1 for package in plans[installroot]}
+    return {installroot: results[installroot] for installroot in installroots}
+
+
+def native_repodata():
+    """
+    :return: RepodataReader of yum/dnf metadata cache
+    """
+    from .repodata import RepodataReader
+    return RepodataReader()
+
 
-def main():
+def prefetcher(tool: str, workers: int):
     """
-    Install everything from package file
-    :return: system exit code
+    :return: Prefetcher downloading packages in parallel into the default download directory
     """
-    parser = argparse.ArgumentParser(description='Command-line params')
-    parser.add_argument('--install',
-                        help='Install RPM packages from file',
-                        action='store_true',
-                        default=False,
-                        required=False)
-    parser.add_argument('--list',
-                        help='List RPM packages',
-                        nargs='+',
-                        required=False)
-
-    args = parser.parse_args()
-    rpm_installer = RpmInstaller('yum')
-    if args.install:
-        default_packagefile = os.path.join(home_dir(), 'Packagefile')
-        rpm_installer.install_file(default_packagefile)
-    if len(args.list):
-        installed, available = rpm_installer.list(args.list)
-        print(f"Installed: {installed}")
-        print(f"Available: {available}")
-
-    return 0
-
-
-###########################################################################
-if __name__ == '__main__':
-    sys.exit(main())
+    from .prefetch import Prefetcher
+    return Prefetcher(tool, workers=workers)
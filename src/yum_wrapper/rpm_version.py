@@ -0,0 +1,135 @@
+import re
+from functools import lru_cache
+from operator import gt, is_not
+from itertools import compress, repeat
+from .package_table import PackageTable
+
+# Version segments: runs of digits, runs of ASCII letters, and tilde/caret separators, other characters are skipped
+SEGMENTS = re.compile(r'[0-9]+|[a-zA-Z]+|~|\^')
+
+
+# Size of caches of parsed versions, a few times the number of packages in large repositories
+VERSION_CACHE_SIZE = 1 << 18
+# Order of version segment kinds in version keys: tilde sorts before everything, even the end of the version,
+# caret after the end but before any other segment, and numeric segments after alphabetical ones
+TILDE = (0,)
+END = (1,)
+CARET = (2,)
+ALPHA = 3
+NUMERIC = 4
+# Version of packages which are not installed in upgrade_plan(), newer than any evr_key()
+NOT_INSTALLED = (float('inf'),)
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def version_key(version: str) -> tuple:
+    """
+    Split version into segments once, so that versions are compared as plain tuples, in rpm order
+    :param version: version or release string
+    :return: tuple of (kind, value) segments ending with END
+    """
+    key = []
+    for segment in SEGMENTS.findall(version):
+        if segment == '~':
+            key.append(TILDE)
+        elif segment == '^':
+            key.append(CARET)
+        elif segment.isdigit():
+            key.append((NUMERIC, int(segment)))
+        else:
+            key.append((ALPHA, segment))
+    key.append(END)
+    return tuple(key)
+
+
+def rpmvercmp(first: str, second: str) -> int:
+    """
+    Compare version or release strings the same way rpm does.
+    Strings are compared segment by segment, numeric segments are newer than alphabetical ones,
+    tilde sorts before everything (1.0~rc1 < 1.0), caret sorts after the base version but before the next one
+    :return: 1 if first is newer, -1 if second is newer, 0 if they are equal
+    """
+    if first == second:
+        return 0
+    one = version_key(first)
+    two = version_key(second)
+    return (one > two) - (one < two)
+
+
+def split_evr(version: str) -> tuple:
+    """
+    :param version: version string formatted as "[Epoch:]Version-Release"
+    :return: tuple (epoch, version, release), epoch is 0 if not set, release is empty if not set
+    """
+    epoch, _, version_release = version.rpartition(':')
+    version, separator, release = version_release.rpartition('-')
+    if not separator:
+        version, release = version_release, ''
+    return int(epoch) if epoch.isdigit() else 0, version, release
+
+
+def label_compare(first: tuple, second: tuple) -> int:
+    """
+    Compare (epoch, version, release) tuples like rpm does
+    :return: 1 if first is newer, -1 if second is newer, 0 if they are equal
+    """
+    if first[0] != second[0]:
+        return 1 if first[0] > second[0] else -1
+    result = rpmvercmp(first[1], second[1])
+    if result:
+        return result
+    return rpmvercmp(first[2], second[2])
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def evr_key(version: str) -> tuple:
+    """
+    :param version: version string formatted as "[Epoch:]Version-Release"
+    :return: tuple (epoch, version key, release key), newer versions have greater keys
+    """
+    epoch, version, release = split_evr(version)
+    return epoch, version_key(version), version_key(release)
+
+
+def compare_versions(first: str, second: str) -> int:
+    """
+    Compare package versions formatted as "[Epoch:]Version-Release", like in 'yum list' output
+    :return: 1 if first is newer, -1 if second is newer, 0 if they are equal
+    """
+    if first == second:
+        return 0
+    one = evr_key(first)
+    two = evr_key(second)
+    return (one > two) - (one < two)
+
+
+def upgrade_plan(installed: PackageTable, available: PackageTable) -> PackageTable:
+    """
+    Find packages which have newer available versions.
+    Every version is parsed to its evr_key() once and compared as a tuple: the newest installed version
+    of every name.arch is found first, then available versions are compared with it in one pass of map(),
+    and only the newer ones are looked at one by one
+    :param installed: installed packages, the first part of RpmInstaller.list() result
+    :param available: available packages, the second part of RpmInstaller.list() result
+    :return: PackageTable of the newest available packages newer than installed ones, sorted by name.arch
+    """
+    # Coded arch columns are expanded once, they are slower to index than lists
+    installed_keys = list(zip(installed.names, list(installed.arches)))
+    installed_evrs = list(map(evr_key, installed.versions))
+    newest_installed = dict(zip(installed_keys, installed_evrs))
+    # Several versions of the same name.arch may be installed (kernel), the last one is kept by dict(),
+    # the rows having another version are compared with it
+    for row in compress(range(len(installed_keys)),
+                        map(is_not, installed_evrs, map(newest_installed.__getitem__, installed_keys))):
+        if installed_evrs[row] > newest_installed[installed_keys[row]]:
+            newest_installed[installed_keys[row]] = installed_evrs[row]
+    available_keys = list(zip(available.names, list(available.arches)))
+    available_evrs = list(map(evr_key, available.versions))
+    newest_versions = map(newest_installed.get, available_keys, repeat(NOT_INSTALLED))
+    newest_available = {}
+    # Several versions of the same name.arch may be available, the first newest one is reported
+    for row in compress(range(len(available_keys)), map(gt, available_evrs, newest_versions)):
+        newest = newest_available.get(available_keys[row])
+        if newest is None or available_evrs[row] > available_evrs[newest]:
+            newest_available[available_keys[row]] = row
+    return available.select(sorted(newest_available.values(), key=available_keys.__getitem__))
@@ -0,0 +1,78 @@
+import os
+import sys
+from .package import Package, evr_string
+from .log_helper import logger
+
+# One line per package, fields are separated by tabs: name, epoch, version, release, arch, install time, size
+RPM_QUERY_FORMAT = '%{NAME}\\t%{EPOCH}\\t%{VERSION}\\t%{RELEASE}\\t%{ARCH}\\t%{INSTALLTIME}\\t%{SIZE}\\n'
+# rpmdb does not know where the package was installed from, yum reports such packages as 'installed'
+INSTALLED_REPO = 'installed'
+# rpm prints this for tags which are not set, e.g. epoch of most packages
+RPM_NONE = '(none)'
+# Installed packages database, moved to /usr/lib/sysimage/rpm in newer distributions
+RPMDB_DIRS = ['/var/lib/rpm', '/usr/lib/sysimage/rpm']
+
+
+def root_rpmdb_dirs(installroot: str) -> list:
+    """
+    :param installroot: root directory of the installation, e.g. container image or chroot
+    :return: rpmdb directories inside the root
+    """
+    return [os.path.join(installroot, rpmdb_dir.lstrip('/')) for rpmdb_dir in RPMDB_DIRS]
+
+
+def rpmdb_revision(rpmdb_dirs: list = None) -> tuple:
+    """
+    :param rpmdb_dirs: rpmdb directories, RPMDB_DIRS by default
+    :return: state of rpmdb files, which changes when packages are installed or removed
+    """
+    revision = []
+    for rpmdb_dir in rpmdb_dirs if rpmdb_dirs is not None else RPMDB_DIRS:
+        if os.path.isdir(rpmdb_dir):
+            for entry in os.scandir(rpmdb_dir):
+                if entry.is_file():
+                    stat = entry.stat()
+                    revision.append((entry.path, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(revision))
+
+
+def query_installed_command(patterns: list = None, installroot: str = None) -> list:
+    """
+    :param patterns: package names to query, wildcards are supported; all installed packages if None
+    :param installroot: root directory of the installation, the host system if None
+    :return: rpm command, which prints installed packages in RPM_QUERY_FORMAT
+    """
+    command = ['rpm', '-qa', '--queryformat', RPM_QUERY_FORMAT]
+    if installroot:
+        command += ['--root', installroot]
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    return command + list(patterns or [])
+
+
+def parse_installed(lines):
+    """
+    Parse output of query_installed_command() in a single pass
+    Pseudo-packages without arch (imported gpg-pubkey) are skipped, as yum does
+    :param lines: iterable of output lines
+    :return: generator of Package objects
+    """
+    intern = sys.intern
+    repo = intern(INSTALLED_REPO)
+    for line in lines:
+        fields = line.split('\t')
+        if len(fields) != 7:
+            logger.warning(f"Invalid rpm query line: {line}")
+            continue
+        name, epoch, version, release, arch, install_time, size = fields
+        if arch == RPM_NONE:
+            continue
+        if epoch == RPM_NONE:
+            epoch = None
+        yield Package.from_fields(name,
+                                  intern(arch),
+                                  evr_string(epoch, version, release),
+                                  repo,
+                                  install_time=int(install_time) if install_time.isdigit() else None,
+                                  size=int(size) if size.isdigit() else None)
+
@@ -0,0 +1,237 @@
+import os
+import fcntl
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from .log_helper import logger
+
+# Number of concurrent read-only queries
+DEFAULT_QUERY_WORKERS = 4
+# Directories of the install lock shared by all users of the host, the first existing one is used
+LOCK_DIRS = ('/run/lock', '/var/lock', '/tmp')
+LOCK_FILE = 'yum_wrapper.lock'
+
+
+def default_lock_path():
+    """
+    Lock file must be the same for every user of the host, so the choice doesn't depend on permissions
+    :return: Path to the install lock file, YUM_WRAPPER_LOCK if set, otherwise yum_wrapper.lock
+             in the first existing directory of LOCK_DIRS
+    """
+    path = os.environ.get('YUM_WRAPPER_LOCK')
+    if path:
+        return path
+    lock_dir = next((lock_dir for lock_dir in LOCK_DIRS if os.path.isdir(lock_dir)), LOCK_DIRS[-1])
+    return os.path.join(lock_dir, LOCK_FILE)
+
+
+def open_lock_file(path: str) -> int:
+    """
+    Open the lock file, or create it readable and writable by all users, so that any of them may lock it.
+    Existing file is opened without O_CREAT, which sticky directories like /tmp refuse for files of other users
+    :param path: path to the lock file
+    :return: read-only file descriptor, which is enough for flock
+    :raise RuntimeError: if the lock file can't be opened or created
+    """
+    while True:
+        try:
+            return os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise RuntimeError(f"Can't open install lock {path}, set YUM_WRAPPER_LOCK to a shared lock file: {e}")
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            # Created by another process meanwhile
+            continue
+        except OSError as e:
+            raise RuntimeError(f"Can't create install lock {path}, set YUM_WRAPPER_LOCK to a shared lock file: {e}")
+        # Mode of the new file is reduced by umask
+        os.fchmod(fd, 0o666)
+        return fd
+
+
+class HostLock:
+    """
+    Exclusive lock of install transactions, shared by all yum_wrapper processes of the host (fcntl.flock).
+    Every acquire opens the lock file anew, so threads of one process exclude each other as well
+    """
+
+    def __init__(self, path: str = None):
+        """
+        :param path: path to the lock file, default_lock_path() if None
+        """
+        self.path = path if path is not None else default_lock_path()
+        self._local = threading.local()
+
+    def acquire(self):
+        """
+        Wait until no other process or thread holds the lock
+        :raise RuntimeError: if the lock file can't be opened or created
+        """
+        fd = open_lock_file(self.path)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info(f"Waiting for another install holding {self.path}")
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._local.fd = fd
+
+    def release(self):
+        fd = self._local.fd
+        self._local.fd = None
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class InstallRequest:
+    """
+    Packages requested by a single caller, and the future of its install report
+    """
+
+    __slots__ = ('packages', 'batch_size', 'future')
+
+    def __init__(self, packages: list, batch_size: int = None):
+        self.packages = packages
+        self.batch_size = batch_size
+        self.future = Future()
+
+
+class OperationScheduler:
+    """
+    Schedules operations of several callers sharing one host.
+    Installs are serialized through a queue, so callers never wait on the yum lock:
+    requests arriving while a transaction is running are coalesced into the next single transaction.
+    Transactions hold the host lock, so installs of other yum_wrapper processes wait for them instead of
+    colliding on the yum lock. Read-only queries run concurrently on a cache-only installer, without taking the yum lock
+    """
+
+    def __init__(self, installer, query_workers: int = DEFAULT_QUERY_WORKERS, batch_size: int = None,
+                 lock=None):
+        """
+        :param installer: RpmInstaller running install transactions
+        :param query_workers: number of concurrent read-only queries
+        :param batch_size: number of packages in one transaction, all coalesced packages in one transaction if None
+        :param lock: context manager held during every transaction, HostLock() if None
+        """
+        self.installer = installer
+        self.query_installer = installer.cache_only_copy()
+        self.batch_size = batch_size
+        self.lock = lock if lock is not None else HostLock()
+        self._requests = queue.Queue()
+        self._queries = ThreadPoolExecutor(max_workers=query_workers)
+        self._installs = threading.Thread(target=self._install_loop, name='install-scheduler', daemon=True)
+        self._installs.start()
+
+    def _install_loop(self):
+        """
+        Take all pending requests and install their packages in a single transaction, until None is queued
+        """
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            requests = [request]
+            stop = False
+            while True:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                requests.append(request)
+            self._install(requests)
+            if stop:
+                return
+
+    def _install(self, requests: list):
+        """
+        Install packages of coalesced requests, every request gets report of its own packages.
+        Transaction uses the smallest batch size of the requests
+        """
+        packages = list(dict.fromkeys(package for request in requests for package in request.packages))
+        batch_size = min((request.batch_size for request in requests if request.batch_size), default=self.batch_size)
+        logger.info(f"Installing {len(packages)} packages of {len(requests)} requests")
+        try:
+            with self.lock:
+                report = self.installer.install_list(packages, batch_size=batch_size)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        for request in requests:
+            request.future.set_result({package: report[package] for package in request.packages})
+
+    def submit_install(self, packages: list, batch_size: int = None) -> Future:
+        """
+        :param packages: list of packages to install
+        :param batch_size: number of packages in one transaction, batch size of the scheduler if None
+        :return: future of dictionary of package name and its install return code
+        """
+        request = InstallRequest(list(packages), batch_size)
+        if not request.packages:
+            request.future.set_result({})
+        else:
+            self._requests.put(request)
+        return request.future
+
+    def submit_list(self, packages: list = None, selection: str = None, refresh: bool = False) -> Future:
+        """
+        :return: future of RpmInstaller.list() result, computed in cache-only mode
+        """
+        return self._queries.submit(self.query_installer.list, packages, selection, refresh=refresh)
+
+    def submit_search(self, package_name: str, refresh: bool = False) -> Future:
+        """
+        :return: future of RpmInstaller.search() result, computed in cache-only mode
+        """
+        return self._queries.submit(self.query_installer.search, package_name, refresh=refresh)
+
+    def submit_upgrades(self, packages: list = None, refresh: bool = False) -> Future:
+        """
+        :return: future of RpmInstaller.upgrades() result, computed in cache-only mode
+        """
+        return self._queries.submit(self.query_installer.upgrades, packages, refresh=refresh)
+
+    def submit_plan(self, packages: list) -> Future:
+        """
+        :return: future of RpmInstaller.plan() result, packages which are not installed yet
+        """
+        return self._queries.submit(self.query_installer.plan, packages)
+
+    def install_list(self, packages: list, batch_size: int = None) -> dict:
+        return self.submit_install(packages, batch_size).result()
+
+    def list(self, packages: list = None, selection: str = None):
+        return self.submit_list(packages, selection).result()
+
+    def search(self, package_name: str):
+        return self.submit_search(package_name).result()
+
+    def close(self):
+        """
+        Finish queued installs and running queries
+        """
+        self._requests.put(None)
+        self._installs.join()
+        self._queries.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
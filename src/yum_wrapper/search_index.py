@@ -0,0 +1,298 @@
+import time
+import threading
+from array import array
+from itertools import chain
+from collections import OrderedDict, defaultdict
+from .package_table import PackageTable
+from .log_helper import logger
+
+# Length of n-grams in postings; 1 and 2 character terms are looked up in separate short postings
+NGRAM_SIZE = 3
+# Intersection of n-gram postings stops when it removes less than this share of candidates,
+# checking the rest of candidates for the term directly is cheaper
+MIN_PRUNE = 0.1
+# Default number of cached search results, they are dropped when any segment is rebuilt
+RESULTS_CACHE_SIZE = 64
+EMPTY = array('i')
+
+
+def _grams(text: str, size: int) -> set:
+    """
+    :return: set of all substrings of the text of the given size
+    """
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _count_levels(postings) -> list:
+    """
+    Count in how many postings every document is found, with set operations instead of a loop over documents
+    :param postings: iterable of postings
+    :return: list of sets, i-th set holds documents found in exactly i postings, the 0th one is empty
+    """
+    levels = [set()]
+    for posting in postings:
+        posting = set(posting)
+        for count in range(len(levels) - 1, 0, -1):
+            moved = levels[count] & posting
+            if moved:
+                levels[count] -= moved
+                if count + 1 == len(levels):
+                    levels.append(set())
+                levels[count + 1] |= moved
+                posting -= moved
+        if posting:
+            if len(levels) == 1:
+                levels.append(set())
+            levels[1] |= posting
+    return levels
+
+
+class _Segment:
+    """
+    Search index of a single repository: trigram postings over lowercased name and summary, and over name only.
+    Postings of 1 and 2 character terms are kept separately and filled on the first lookup of the term.
+    Documents are numbered in (name, arch) order of the packages, so sorted postings are sorted by name too;
+    rows maps documents back to rows of the repository PackageTable.
+    Segment is not changed after it's built, except for short postings, so it's shared by concurrent searches
+    """
+
+    __slots__ = ('revision', 'table', 'rows', 'names', 'texts', 'exact', 'postings', 'name_postings',
+                 'short_postings')
+
+    def __init__(self, revision: tuple, table: PackageTable):
+        """
+        :param revision: revision of repository metadata the segment is built from
+        :param table: PackageTable of the repository packages
+        """
+        self.revision = revision
+        self.table = table
+        self.rows = array('i', sorted(range(len(table)), key=lambda row: (table.names[row], table.arches[row], row)))
+        self.names = [table.names[row].lower() for row in self.rows]
+        summaries = table.summaries
+        self.texts = [f"{name}\n{summaries[row].lower() if summaries[row] else ''}"
+                      for name, row in zip(self.names, self.rows)]
+        self.exact = {}
+        postings = defaultdict(list)
+        name_postings = defaultdict(list)
+        for doc, (name, text) in enumerate(zip(self.names, self.texts)):
+            self.exact.setdefault(name, []).append(doc)
+            for gram in {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}:
+                postings[gram].append(doc)
+            for gram in {name[i:i + NGRAM_SIZE] for i in range(len(name) - NGRAM_SIZE + 1)}:
+                name_postings[gram].append(doc)
+        self.postings = {gram: array('i', docs) for gram, docs in postings.items()}
+        self.name_postings = {gram: array('i', docs) for gram, docs in name_postings.items()}
+        self.short_postings = {}
+
+    def _short_posting(self, term: str, name_only: bool):
+        """
+        :return: posting of a term shorter than NGRAM_SIZE, the texts are scanned on the first lookup only
+        """
+        key = term, name_only
+        posting = self.short_postings.get(key)
+        if posting is None:
+            texts = self.names if name_only else self.texts
+            posting = self.short_postings[key] = array('i', [doc for doc, text in enumerate(texts) if term in text])
+        return posting
+
+    def lookup(self, term: str, name_only: bool = False):
+        """
+        Terms of up to NGRAM_SIZE characters are answered by a single posting,
+        for longer terms postings of their n-grams are intersected, and only the rest is checked for the term
+        :param term: lowercased search term
+        :param name_only: look for term in names only
+        :return: sorted documents containing term in name or summary
+        """
+        if len(term) < NGRAM_SIZE:
+            return self._short_posting(term, name_only)
+        index = self.name_postings if name_only else self.postings
+        postings = []
+        for gram in _grams(term, NGRAM_SIZE):
+            posting = index.get(gram)
+            if posting is None:
+                return EMPTY
+            postings.append(posting)
+        if len(term) == NGRAM_SIZE:
+            return postings[0]
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if posting is candidates or posting == candidates:
+                # n-grams of the same word are often found in the same documents
+                continue
+            pruned = set(candidates).intersection(posting)
+            if len(pruned) > (1 - MIN_PRUNE) * len(candidates):
+                break
+            candidates = sorted(pruned)
+            if not candidates:
+                return EMPTY
+        texts = self.names if name_only else self.texts
+        return [doc for doc in candidates if term in texts[doc]]
+
+    def groups(self, terms: list) -> list:
+        """
+        :param terms: unique lowercased search terms
+        :return: list of (group, documents) pairs, lower groups are ranked higher: packages matching more terms,
+                 then exact name matches, then more name matches; a document may appear in several groups
+        """
+        if len(terms) == 1:
+            term = terms[0]
+            return [(0, self.exact.get(term, EMPTY)), (1, self.lookup(term, name_only=True)), (2, self.lookup(term))]
+        term_levels = _count_levels(self.lookup(term) for term in terms)
+        name_levels = _count_levels(self.lookup(term, name_only=True) for term in terms)
+        exact = set(chain.from_iterable(self.exact.get(term, EMPTY) for term in terms))
+        term_count = len(terms)
+        groups = []
+        for term_matches, term_docs in enumerate(term_levels):
+            for name_matches, docs in reversed(list(enumerate(name_levels))):
+                docs = term_docs & docs if name_matches else term_docs
+                term_docs = term_docs - docs
+                exact_docs = docs & exact
+                for is_exact, group_docs in (True, exact_docs), (False, docs - exact_docs):
+                    if group_docs:
+                        group = ((term_count - term_matches) * 2 + (not is_exact)) * (term_count + 1) + \
+                            term_count - name_matches
+                        groups.append((group, group_docs))
+        return groups
+
+
+class SearchIndex:
+    """
+    In-process full-text index of package names and summaries from repository metadata.
+    Index consists of per-repository segments, a segment is rebuilt only when its repository metadata is changed.
+    Results are ranked like 'yum search': packages matching more terms first,
+    then exact name matches, then name matches, then summary matches
+    """
+
+    def __init__(self, repodata, check_interval: float = 5.0, cache_size: int = RESULTS_CACHE_SIZE):
+        """
+        :param repodata: RepodataReader, source of repository packages
+        :param check_interval: how often (in seconds) repository metadata is checked for changes
+        :param cache_size: number of cached search results, nothing is cached if 0
+        """
+        self.repodata = repodata
+        self.check_interval = check_interval
+        self.cache_size = cache_size
+        self._segments = {}
+        # Searches of daemon threads read the state once: list of (segment, ranks) pairs and rows by rank;
+        # refresh replaces it as a whole, and the generation, which keys cached results, is incremented
+        self._state = [], []
+        self._generation = 0
+        self._refresh_lock = threading.Lock()
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._checked = None
+
+    def refresh(self, force: bool = False):
+        """
+        Rebuild segments of changed repositories, drop segments of removed repositories
+        :param force: check repositories even if check interval has not passed yet
+        """
+        if not force and self._checked is not None and time.monotonic() - self._checked < self.check_interval:
+            return
+        # Concurrent callers wait for a single rebuild instead of indexing the same repositories
+        with self._refresh_lock:
+            now = time.monotonic()
+            if not force and self._checked is not None and now - self._checked < self.check_interval:
+                return
+            segments = {}
+            changed = False
+            for repository in self.repodata.repositories():
+                revision = repository.revision()
+                segment = self._segments.get(repository.repomd)
+                if segment is None or segment.revision != revision:
+                    logger.info(f"Indexing repository {repository.name}")
+                    segment = _Segment(revision, self.repodata.packages(repository))
+                    changed = True
+                segments[repository.repomd] = segment
+            if changed or list(segments) != list(self._segments):
+                state = self._rank(list(segments.values()))
+                with self._results_lock:
+                    self._state = state
+                    self._generation += 1
+                    self._results.clear()
+            self._segments = segments
+            self._checked = now
+
+    @staticmethod
+    def _rank(segments: list) -> tuple:
+        """
+        Number (name, arch) pairs of all segments in their sort order, so that results are sorted as integers;
+        all versions of the same name.arch in all repositories share the rank,
+        and it is reported from the first repository having it
+        :return: tuple of list of (segment, ranks) pairs, where ranks are ranks of the segment documents
+                 or None if ranks are the documents themselves, and list of (PackageTable, row) by rank
+        """
+        keys = sorted({(name, arch) for segment in segments
+                       for name, arch in zip(segment.table.names, segment.table.arches)})
+        ranks = {key: rank for rank, key in enumerate(keys)}
+        rows = [None] * len(keys)
+        segment_ranks = []
+        for segment in reversed(segments):
+            table = segment.table
+            # List is faster to index than array
+            doc_ranks = [ranks[table.names[row], table.arches[row]] for row in segment.rows]
+            for rank, row in zip(reversed(doc_ranks), reversed(segment.rows)):
+                rows[rank] = table, row
+            if len(segments) == 1 and len(keys) == len(segment.rows):
+                doc_ranks = None
+            segment_ranks.append((segment, doc_ranks))
+        segment_ranks.reverse()
+        return segment_ranks, rows
+
+    def search_rows(self, terms: str) -> list:
+        """
+        Ranked search without copying found packages, recent results are cached until the index is refreshed
+        :param terms: whitespace-separated search terms, case-insensitive, any of them should match
+        :return: list of (PackageTable, row) pairs of found packages in repository tables,
+                 every name.arch is reported once
+        """
+        self.refresh()
+        terms = list(dict.fromkeys(terms.lower().split()))
+        with self._results_lock:
+            state = self._state
+            # Ranking doesn't depend on the order of terms
+            key = self._generation, ' '.join(sorted(terms))
+            results = self._results.get(key)
+            if results is not None:
+                self._results.move_to_end(key)
+                return results
+        segments, rows = state
+        groups = {}
+        for segment, ranks in segments:
+            for group, docs in segment.groups(terms):
+                groups.setdefault(group, []).append(docs if ranks is None else map(ranks.__getitem__, docs))
+        # Ranks are sorted in every group, a name.arch is reported in its best group only
+        found = set()
+        ranks = []
+        for group in sorted(groups):
+            group_ranks = set(chain.from_iterable(groups[group]))
+            group_ranks.difference_update(found)
+            found.update(group_ranks)
+            ranks.extend(sorted(group_ranks))
+        results = list(map(rows.__getitem__, ranks))
+        if self.cache_size > 0:
+            with self._results_lock:
+                # Results of the previous generation are not cached after refresh
+                if key[0] != self._generation:
+                    return results
+                self._results[key] = results
+                if len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+        return results
+
+    def __len__(self):
+        """
+        :return: number of indexed name.arch pairs
+        """
+        return len(self._state[1])
+
+    def search(self, terms: str) -> PackageTable:
+        """
+        :param terms: whitespace-separated search terms, case-insensitive, any of them should match
+        :return: PackageTable of found packages, every name.arch is reported once
+        """
+        results = PackageTable()
+        for table, row in self.search_rows(terms):
+            results._add_row(table, row)
+        return results
@@ -0,0 +1,153 @@
+"""Single-pass parsers of 'yum list' and 'yum search' output.
+Parsers consume lines as they are produced and yield plain tuples, no intermediate lists are built
+"""
+
+# Section headers of 'yum list' and 'dnf list' output
+LIST_SECTIONS = {
+    'Installed Packages': 'installed',
+    'Available Packages': 'available',
+    'Extra Packages': 'extra',
+    'Obsoleting Packages': 'obsoleting',
+    'Updated Packages': 'updates',
+    'Available Upgrades': 'updates',
+    'Upgraded Packages': 'updates',
+    'Recently Added Packages': 'recent',
+}
+
+# Last words of section headers, only lines ending with them are looked up in LIST_SECTIONS
+HEADER_WORDS = {header.split()[-1] for header in LIST_SECTIONS}
+
+# Sections of installed packages, the rest are available in repositories.
+# Installed packages listed in "Obsoleting Packages" are the obsoleted ones
+INSTALLED_SECTIONS = {'installed', 'extra', 'obsoleted'}
+
+# Architectures recognized in wrapped and repo-less entries
+KNOWN_ARCHES = {'x86_64', 'i686', 'i586', 'i386', 'noarch', 'aarch64', 'armv7hl', 'ppc64le', 'ppc64', 's390x', 'src',
+                'athlon', 'riscv64', 'loongarch64'}
+
+
+def _is_name_arch(token: str) -> bool:
+    """
+    :return: True if token looks like "name.arch" with a known arch
+    """
+    return token.rpartition('.')[2] in KNOWN_ARCHES
+
+
+def _entry(section: str, tokens: list) -> tuple:
+    """
+    Package tuple from tokens of a wrapped or repo-less entry
+    """
+    name, _, arch = tokens[0].rpartition('.')
+    repo = tokens[2] if len(tokens) > 2 else None
+    if repo is not None and repo.startswith('@'):
+        if section == 'obsoleting':
+            section = 'obsoleted'
+        repo = repo[1:]
+    return section, name, arch, tokens[1], repo
+
+
+def parse_list(lines):
+    """
+    Parse 'yum list' output.
+    Every package is "Name.Arch Version Repo", installed repo names start with '@'.
+    Long entries are wrapped, so that version and repo are moved to the next lines, and some entries
+    (e.g. packages installed from a local file in dnf) have no repo at all.
+    An entry missing its repo ends when a token with a known arch starts the next one.
+    Lines before the first section header are skipped
+    :param lines: iterable of output lines, stripped or not
+    :return: generator of tuples (section, name, arch, version, repo), repo is None if not printed
+    """
+    sections = LIST_SECTIONS
+    header_words = HEADER_WORDS
+    known_arches = KNOWN_ARCHES
+    lines = iter(lines)
+    section = None
+    for line in lines:
+        section = sections.get(' '.join(line.split()))
+        if section is not None:
+            break
+    obsoleting = section == 'obsoleting'
+    pending = []
+    # Every line is split once, its fields are unpacked and checked without other per-line string operations
+    for fields in map(str.split, lines):
+        count = len(fields)
+        # Fast path: complete "Name.Arch Version Repo" line
+        if count == 3 and not pending:
+            name_arch, version, repo = fields
+            name, dot, arch = name_arch.rpartition('.')
+            if dot:
+                if repo[0] == '@':
+                    repo = repo[1:]
+                    if obsoleting:
+                        yield 'obsoleted', name, arch, version, repo
+                        continue
+                yield section, name, arch, version, repo
+                continue
+        if not count:
+            continue
+        if fields[-1] in header_words:
+            header = sections.get(' '.join(fields))
+            if header is not None:
+                if len(pending) > 1:
+                    yield _entry(section, pending)
+                pending = []
+                section = header
+                obsoleting = section == 'obsoleting'
+                continue
+        # Wrapped entry: "Name.Arch" line, then "Version Repo" line
+        if count == 1 and not pending and '.' in fields[0]:
+            pending = fields
+            continue
+        if count == 2 and len(pending) == 1 and fields[0].rpartition('.')[2] not in known_arches and \
+                fields[1].rpartition('.')[2] not in known_arches:
+            yield _entry(section, pending + fields)
+            pending = []
+            continue
+        for field in fields:
+            if pending and _is_name_arch(field):
+                if len(pending) > 1:
+                    yield _entry(section, pending)
+                pending = []
+            elif not pending and '.' not in field:
+                # Not a package entry, e.g. a message printed in the middle of the output
+                break
+            pending.append(field)
+            if len(pending) == 3:
+                yield _entry(section, pending)
+                pending = []
+    if len(pending) > 1:
+        yield _entry(section, pending)
+
+
+def parse_search(lines):
+    """
+    Parse 'yum search' output.
+    Response consists of a header, which is skipped, and then a list of packages,
+    separated by "=== N/S matched ===" lines.
+    Every package is a string with format "Name.Arch : Summary", long summaries are wrapped to lines started with ':'
+    :param lines: iterable of output lines, stripped or not
+    :return: generator of tuples (name, arch, summary)
+    """
+    matches_started = False
+    name_arch = None
+    summary = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith(':') and name_arch is not None:
+            summary = f"{summary} {line[1:].strip()}"
+            continue
+        if name_arch is not None:
+            name, _, arch = name_arch.rpartition('.')
+            yield name, arch, summary
+            name_arch = None
+        if line.startswith('='):
+            matches_started = True
+        elif matches_started and ' : ' in line:
+            name_arch, _, summary = line.partition(' : ')
+            name_arch = name_arch.strip()
+            summary = summary.strip()
+            if '.' not in name_arch:
+                name_arch = None
+    if name_arch is not None:
+        name, _, arch = name_arch.rpartition('.')
+        yield name, arch, summary
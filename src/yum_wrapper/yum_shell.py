@@ -0,0 +1,166 @@
+import os
+import queue
+import shlex
+import itertools
+import threading
+import subprocess
+from . import instrumentation
+from .log_helper import logger
+
+# Unknown command, after which the shell reports an error containing its name, marks the end of the command output
+END_MARKER = '__yum_wrapper_end_{}__'
+# Prompt printed by the shell before reading every line
+PROMPT = '> '
+# Output lines of a failed command; yum and dnf shells don't report return codes of their commands
+FAILURE_PREFIXES = ('Error', 'No package ', 'No match for argument', 'Transaction check error',
+                    'Transaction test error', 'Could not run transaction')
+# Last line of a transaction completed by 'run'
+TRANSACTION_COMPLETE = 'Complete!'
+
+
+def command_failed(args: list, lines: list) -> bool:
+    """
+    Return code of a shell command, derived from its output
+    :param args: command and its arguments, e.g. ['install', 'mc']
+    :param lines: output lines of the command
+    :return: True if the command reported an error, or 'run' has started a transaction which didn't complete
+    """
+    if any(line.startswith(FAILURE_PREFIXES) for line in lines):
+        return True
+    if args[:1] == ['run'] and lines:
+        return TRANSACTION_COMPLETE not in lines and not any(line.startswith('Nothing to do') for line in lines)
+    return False
+
+
+class YumShell:
+    """
+    Persistent 'yum shell' or 'dnf shell' session.
+    Commands are written to the shell stdin one by one, so that repository metadata is loaded only once.
+    Every command is followed by a unique unknown command, the shell error message about it
+    delimits the command output
+    """
+
+    def __init__(self, command: list):
+        """
+        :param command: shell command line, e.g. ['yum', 'shell'] or ['sudo', 'yum', '-y', 'shell']
+        """
+        self.command = command
+        self._process = None
+        self._markers = itertools.count()
+        self._lock = threading.Lock()
+
+    def alive(self) -> bool:
+        """
+        :return: True if the shell process is running
+        """
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """
+        Start the shell process and wait until it's ready for commands
+        """
+        # yum and dnf are Python programs, their output to a pipe must not be buffered
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        logger.info(f"Starting {' '.join(self.command)}")
+        self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT, env=env)
+        self._communicate(None)
+
+    def execute(self, args: list) -> (int, list):
+        """
+        Run one shell command, start the shell if it's not running
+        :param args: command and its arguments, e.g. ['list', 'installed', 'mc']
+        :return: tuple of return code (1 if the command failed, see command_failed(), or the shell exited)
+                 and list of output lines
+        """
+        with self._lock:
+            if not self.alive():
+                self.start()
+            if not instrumentation.HOOKS:
+                return self._communicate(args)
+            # Shell process outlives the command, so its CPU time can't be measured
+            timer = instrumentation.CommandTimer(self.command + args[:1], measure_cpu=False)
+            timer.name = f"{instrumentation.command_name(self.command)} {args[0]}"
+            ret_code, lines = self._communicate(args)
+            timer.finish(ret_code, sum(len(line) + 1 for line in lines), len(lines))
+            return ret_code, lines
+
+    def _communicate(self, args):
+        """
+        Write command followed by the end marker, and read output until the marker.
+        Prompt printed before reading the command prefixes the first output line, and only it is removed,
+        prompt printed before reading the marker prefixes the marker line
+        :param args: command and its arguments, only end marker is written if None
+        :return: tuple of return code and list of output lines
+        """
+        marker = END_MARKER.format(next(self._markers))
+        request = f"{shlex.join(args)}\n" if args else ''
+        self._process.stdin.write(f"{request}{marker}\n".encode("utf-8"))
+        self._process.stdin.flush()
+        lines = []
+        first_line = True
+        for raw_line in self._process.stdout:
+            line = raw_line.decode("utf-8")
+            if marker in line:
+                return int(command_failed(args or [], lines)), lines
+            if first_line and line.startswith(PROMPT):
+                line = line[len(PROMPT):]
+            first_line = False
+            line = line.strip()
+            if line:
+                lines.append(line)
+        ret_code = self._process.wait()
+        logger.warning(f"{' '.join(self.command)} exited with return code {ret_code}")
+        self._process = None
+        return ret_code or 1, lines
+
+    def close(self):
+        """
+        Exit the shell
+        """
+        with self._lock:
+            if not self.alive():
+                return
+            try:
+                self._process.stdin.write(b"exit\n")
+                self._process.stdin.close()
+                self._process.wait(timeout=30)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+
+
+class YumShellPool:
+    """
+    Several shell sessions for concurrent read-only queries, started on demand
+    """
+
+    def __init__(self, command: list, size: int = 2):
+        """
+        :param command: shell command line, e.g. ['yum', 'shell']
+        :param size: maximum number of sessions
+        """
+        self._idle = queue.LifoQueue()
+        self._sessions = [YumShell(command) for _ in range(size)]
+        for session in self._sessions:
+            self._idle.put(session)
+
+    def execute(self, args: list) -> (int, list):
+        """
+        Run one shell command in an idle session, wait for one if all of them are busy
+        :param args: command and its arguments, e.g. ['search', 'samba']
+        :return: tuple of return code and list of output lines
+        """
+        session = self._idle.get()
+        try:
+            return session.execute(args)
+        finally:
+            self._idle.put(session)
+
+    def close(self):
+        """
+        Exit all sessions
+        """
+        for session in self._sessions:
+            session.close()
@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "benchmark")))
+from collections import Counter
+from yum_wrapper.rpm_installer import RpmInstaller
+from yum_wrapper.yum_output import parse_list
+from fake_yum import generate_packages, list_output
+from run_benchmarks import fake_environment, compare, list_sections_output
+from startup_benchmark import FORBIDDEN, SCENARIOS, measure
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_fake_yum(self):
+        """
+        Test RpmInstaller parses fake yum output, and installs through the sudo shim
+        """
+        installer = RpmInstaller('yum')
+        with fake_environment(100, columns=80):
+            installed, available = installer.list()
+            self.assertEqual(len(installed), 25)
+            self.assertEqual(len(available), 75)
+            self.assertIn('samba0', installed)
+            found = installer.search('samba')
+            self.assertTrue(found)
+            self.assertTrue(all('samba' in f"{package.name} {package.summary}".lower() for package in found))
+            self.assertEqual(installer.install_list(['xml1']), {'xml1': 0})
+            self.assertNotEqual(installer.install_list(['no-such-package'])['no-such-package'], 0)
+
+    def test_fake_yum_sections(self):
+        """
+        Test fake yum prints extra, updated and obsoleting packages, and the parser reads them in wrapped output too
+        """
+        packages = generate_packages(100)
+        for columns in 0, 40:
+            sections = Counter(entry[0] for entry in parse_list(list_sections_output(packages, columns)))
+            self.assertEqual(sections, {'installed': 25, 'available': 75, 'extra': 5, 'updates': 7,
+                                        'obsoleting': 4, 'obsoleted': 4})
+        ret_code, lines = list_output(packages, ['obsoletes', 'samba0*'])
+        self.assertEqual(ret_code, 0)
+        self.assertEqual(list(parse_list(lines)), [('obsoleting', 'samba0-ng', 'x86_64', '0.0.0-2.el7', 'base'),
+                                                   ('obsoleted', 'samba0', 'x86_64', '0.0.0-1.el7', 'base')])
+
+    def test_compare(self):
+        """
+        Test slowdown above the threshold is reported as a regression
+        """
+        baseline = {'results': {'list/1000': {'seconds': 1.0}, 'search/1000': {'seconds': 1.0}}}
+        results = {'results': {'list/1000': {'seconds': 1.5}, 'search/1000': {'seconds': 1.1}}}
+        self.assertEqual(compare(results, baseline, threshold=0.2), 1)
+
+    def test_startup_imports(self):
+        """
+        Test command line scenarios don't import modules of other commands
+        """
+        for name, (statement, _) in SCENARIOS.items():
+            result = measure(statement, repeat=1)
+            self.assertGreater(result['milliseconds'], 0)
+            self.assertFalse(FORBIDDEN[name].intersection(result['modules']), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "benchmark")))
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from yum_wrapper import cli
+from yum_wrapper.version import VERSION
+from run_benchmarks import fake_environment
+from test_repodata import BASE_PACKAGES, create_sqlite_repo
+
+
+class TestCli(unittest.TestCase):
+
+    @staticmethod
+    def run_cli(*argv):
+        """
+        :return: tuple of exit code and printed output
+        """
+        output = io.StringIO()
+        with redirect_stdout(output):
+            ret_code = cli.main(['--no-cache'] + list(argv))
+        return ret_code, output.getvalue()
+
+    def test_version(self):
+        """
+        Test --version prints package version
+        """
+        self.assertEqual(self.run_cli('--version'), (0, f"{VERSION}\n"))
+
+    def test_no_command(self):
+        """
+        Test missing subcommand prints help and fails
+        """
+        ret_code, output = self.run_cli()
+        self.assertEqual(ret_code, 2)
+        self.assertIn('install', output)
+
+    def test_list_search(self):
+        """
+        Test list and search subcommands against fake yum
+        """
+        with fake_environment(100):
+            ret_code, output = self.run_cli('list', 'samba0', 'xml1')
+            self.assertEqual(ret_code, 0)
+            installed, available = output.splitlines()
+            self.assertIn('samba0', installed)
+            self.assertIn('xml1', available)
+            ret_code, output = self.run_cli('search', 'samba')
+            self.assertEqual(ret_code, 0)
+            self.assertIn('samba0', output)
+
+    def test_install_plan(self):
+        """
+        Test plan and install subcommands from package file and command line
+        """
+        with tempfile.TemporaryDirectory() as temp_dir, fake_environment(100):
+            package_file = os.path.join(temp_dir, 'Packagefile')
+            with open(package_file, 'w') as f:
+                f.write("samba0\nxml1\n")
+            ret_code, output = self.run_cli('plan', '--file', package_file)
+            self.assertEqual(ret_code, 0)
+            # Fake rpmdb is empty
+            self.assertIn("Already installed: 0 of 2", output)
+            self.assertIn("xml1", output)
+            self.assertEqual(self.run_cli('install', '--file', package_file), (0, ''))
+            self.assertEqual(self.run_cli('install', 'http2'), (0, ''))
+            ret_code, output = self.run_cli('install', 'no-such-package')
+            self.assertEqual(ret_code, 1)
+            self.assertIn('no-such-package', output)
+
+    def test_resolve(self):
+        """
+        Test resolve subcommand reads repository metadata without running yum
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            create_sqlite_repo(os.path.join(temp_dir, 'base'), BASE_PACKAGES)
+            ret_code, output = self.run_cli('resolve', '--cache-root', temp_dir, '--no-installed', 'mc', 'samba-client')
+            self.assertEqual(ret_code, 0)
+            self.assertIn("New packages: 2", output)
+            self.assertIn("mc.x86_64 1:4.8.7-11.el7 base", output)
+            ret_code, output = self.run_cli('resolve', '--cache-root', temp_dir, '--no-installed', 'no-such-package')
+            self.assertEqual(ret_code, 1)
+            self.assertIn("Unresolved: no-such-package", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
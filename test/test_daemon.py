@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import socket
+import tempfile
+import threading
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.package import Package
+from yum_wrapper.package_table import PackageTable
+from yum_wrapper.daemon import DaemonClient, YumWrapperDaemon
+
+
+class FakeInstaller:
+    """
+    Installer recording concurrency of the requests
+    """
+
+    search_index = None
+
+    def __init__(self):
+        self.barrier = threading.Barrier(2, timeout=5)
+        self.lock = threading.Lock()
+        self.active_installs = 0
+        self.max_active_installs = 0
+        self.install_started = threading.Event()
+        self.install_released = threading.Event()
+        self.install_released.set()
+
+    def installed_packages(self):
+        return PackageTable()
+
+    def cache_only_copy(self):
+        return self
+
+    def search(self, package_name, refresh=False):
+        # Passes only if two searches are served at the same time
+        self.barrier.wait()
+        return PackageTable([Package.from_fields(package_name, 'x86_64', '1.0-1', 'base', 'Summary')])
+
+    def list(self, packages=None, selection=None, refresh=False):
+        return PackageTable([Package("mc.x86_64 1:4.8.7-11.el7 @base")]), PackageTable()
+
+    def install_list(self, packages, batch_size=None):
+        with self.lock:
+            self.active_installs += 1
+            self.max_active_installs = max(self.max_active_installs, self.active_installs)
+        self.install_started.set()
+        self.install_released.wait(5)
+        time.sleep(0.05)
+        with self.lock:
+            self.active_installs -= 1
+        return {package: 0 for package in packages}
+
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, 'yum_wrapper.sock')
+        self.installer = FakeInstaller()
+        self.server = YumWrapperDaemon(self.socket_path, self.installer,
+                                       lock_path=os.path.join(self.temp_dir.name, 'yum_wrapper.lock'))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def run_clients(self, request, count):
+        results = [None] * count
+
+        def run(index):
+            with DaemonClient(self.socket_path, timeout=10) as client:
+                results[index] = request(client)
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_list(self):
+        """
+        Test packages are transferred as tables
+        """
+        with DaemonClient(self.socket_path, timeout=10) as client:
+            installed, available = client.list(['mc'])
+            self.assertEqual(client.call('ping'), 'pong')
+            with self.assertRaises(RuntimeError):
+                client.call('remove', packages=['mc'])
+        self.assertEqual(installed.get('mc').version, '1:4.8.7-11.el7')
+        self.assertEqual(len(available), 0)
+
+    def test_socket_permissions(self):
+        """
+        Test only the owner may connect to the socket, and the process umask is restored
+        """
+        socket_path = os.path.join(self.temp_dir.name, 'private.sock')
+        umask = os.umask(0o022)
+        try:
+            server = YumWrapperDaemon(socket_path, FakeInstaller(),
+                                      lock_path=os.path.join(self.temp_dir.name, 'yum_wrapper.lock'))
+            server.server_close()
+        finally:
+            daemon_umask = os.umask(umask)
+        self.assertEqual(os.stat(socket_path).st_mode & 0o777, 0o600)
+        self.assertEqual(daemon_umask, 0o022)
+
+    def test_concurrent_reads(self):
+        """
+        Test read-only requests are served concurrently
+        """
+        results = self.run_clients(lambda client: client.search('samba'), 2)
+        self.assertEqual([result.names for result in results], [['samba'], ['samba']])
+
+    def test_running_daemon(self):
+        """
+        Test socket of a running daemon is not replaced by another daemon
+        """
+        with self.assertRaises(RuntimeError):
+            YumWrapperDaemon(self.socket_path, FakeInstaller())
+        with DaemonClient(self.socket_path, timeout=10) as client:
+            self.assertEqual(client.call('ping'), 'pong')
+
+    def test_stale_socket(self):
+        """
+        Test socket file left by a stopped daemon is replaced
+        """
+        socket_path = os.path.join(self.temp_dir.name, 'stale.sock')
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+        server = YumWrapperDaemon(socket_path, FakeInstaller(),
+                                  lock_path=os.path.join(self.temp_dir.name, 'yum_wrapper.lock'))
+        try:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            with DaemonClient(socket_path, timeout=10) as client:
+                self.assertEqual(client.call('ping'), 'pong')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_serialized_installs(self):
+        """
+        Test installs are serialized
+        """
+        results = self.run_clients(lambda client: client.install_list(['mc']), 3)
+        self.assertEqual(results, [{'mc': 0}] * 3)
+        self.assertEqual(self.installer.max_active_installs, 1)
+
+    def test_read_during_install(self):
+        """
+        Test read-only requests are served while an install transaction is running
+        """
+        self.installer.install_released.clear()
+        install = threading.Thread(target=self.run_clients, args=(lambda client: client.install_list(['mc']), 1))
+        install.start()
+        try:
+            self.assertTrue(self.installer.install_started.wait(5))
+            with DaemonClient(self.socket_path, timeout=10) as client:
+                installed, available = client.list(['mc'])
+            self.assertEqual(installed.names, ['mc'])
+            self.assertEqual(self.installer.active_installs, 1)
+        finally:
+            self.installer.install_released.set()
+            install.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
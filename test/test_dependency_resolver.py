@@ -0,0 +1,221 @@
+import os
+import sys
+import gzip
+import sqlite3
+import tempfile
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from yum_wrapper.repodata import RepodataReader
+from yum_wrapper.dependency_resolver import (SENSE_EQUAL, SENSE_GREATER, SENSE_LESS, DependencyIndex, DependencyResolver,
+                                 overlaps, parse_installed_provides)
+from test_repodata import REPOMD, BASE_PACKAGES, EPEL_PACKAGES, create_sqlite_repo, create_xml_repo
+
+PRIMARY_PACKAGE = """<package type="rpm">
+  <name>{name}</name>
+  <arch>{arch}</arch>
+  <version epoch="0" ver="{version}" rel="{release}"/>
+  <size package="{download_size}" installed="{installed_size}" archive="0"/>
+  <format>
+    <rpm:provides>{provides}</rpm:provides>
+    <rpm:requires>{requires}</rpm:requires>
+    {files}
+  </format>
+</package>
+"""
+
+# name, arch, version, release, download size, installed size, provides, requires, files
+# Dependencies are tuples (name, flags, version, release)
+BASE_DEPENDENCIES = [
+    ('app', 'x86_64', '1.0', '1', 1000, 3000, [('app', 'EQ', '1.0', '1')],
+     [('libfoo.so.1()(64bit)', None, None, None), ('/bin/sh', None, None, None),
+      ('config-tool', 'GE', '2.0', None), ('glibc', 'GE', '2.17', None),
+      ('rpmlib(CompressedFileNames)', 'LE', '3.0.4', '1')], []),
+    ('libfoo', 'x86_64', '1.0', '1', 200, 500, [('libfoo.so.1()(64bit)', None, None, None)],
+     [('glibc', None, None, None)], []),
+    ('libfoo', 'i686', '1.0', '1', 200, 500, [('libfoo.so.1', None, None, None)], [], []),
+    ('libfoo-compat', 'x86_64', '0.9', '1', 100, 100, [('libfoo.so.1()(64bit)', None, None, None)], [], []),
+    ('bash', 'x86_64', '4.2', '46', 300, 900, [], [], ['/bin/sh', '/bin/bash']),
+    ('config-tool', 'noarch', '1.5', '1', 10, 20, [], [], []),
+    ('broken', 'x86_64', '1.0', '1', 10, 20, [], [('missing-lib', 'GE', '2', None)], []),
+]
+EPEL_DEPENDENCIES = [
+    ('config-tool', 'noarch', '2.1', '1', 50, 100, [('config-tool', 'EQ', '2.1', '1')],
+     [('/usr/bin/python', None, None, None)], []),
+    ('python', 'x86_64', '2.7.5', '90', 400, 1200, [('python', 'EQ', '2.7.5', '90')], [], ['/usr/bin/python']),
+]
+
+
+def dependency_entries(dependencies):
+    entries = []
+    for name, flags, version, release in dependencies:
+        attributes = f' flags="{flags}" epoch="0" ver="{version}"' if flags else ''
+        attributes += f' rel="{release}"' if release else ''
+        entries.append(f'<rpm:entry name="{name}"{attributes}/>')
+    return ''.join(entries)
+
+
+def create_xml_dependency_repo(repo_dir, packages):
+    """
+    Create dnf-like repository cache with gzipped primary XML including dependencies
+    """
+    os.makedirs(os.path.join(repo_dir, 'repodata'))
+    with open(os.path.join(repo_dir, 'repodata', 'repomd.xml'), 'w') as f:
+        f.write(REPOMD.format(data_type='primary', file_name='0123-primary.xml.gz'))
+    with gzip.open(os.path.join(repo_dir, 'repodata', '0123-primary.xml.gz'), 'wt') as f:
+        f.write('<metadata xmlns="http://linux.duke.edu/metadata/common" '
+                'xmlns:rpm="http://linux.duke.edu/metadata/rpm" packages="%d">\n' % len(packages))
+        for name, arch, version, release, download_size, installed_size, provides, requires, files in packages:
+            f.write(PRIMARY_PACKAGE.format(name=name, arch=arch, version=version, release=release,
+                                           download_size=download_size, installed_size=installed_size,
+                                           provides=dependency_entries(provides),
+                                           requires=dependency_entries(requires),
+                                           files=''.join(f'<file>{file}</file>' for file in files)))
+        f.write('</metadata>\n')
+
+
+def create_sqlite_dependency_repo(repo_dir, packages):
+    """
+    Create yum-like repository cache with primary sqlite database including dependencies
+    """
+    os.makedirs(repo_dir)
+    with open(os.path.join(repo_dir, 'repomd.xml'), 'w') as f:
+        f.write(REPOMD.format(data_type='primary_db', file_name='4567-primary.sqlite.bz2'))
+    connection = sqlite3.connect(os.path.join(repo_dir, '4567-primary.sqlite'))
+    connection.execute("CREATE TABLE packages (pkgKey INTEGER PRIMARY KEY, name TEXT, arch TEXT, epoch TEXT, "
+                       "version TEXT, release TEXT, summary TEXT, size_package INTEGER, size_installed INTEGER)")
+    for table in ('provides', 'requires'):
+        connection.execute(f"CREATE TABLE {table} (name TEXT, flags TEXT, epoch TEXT, version TEXT, release TEXT, "
+                           f"pkgKey INTEGER)")
+    connection.execute("CREATE TABLE files (name TEXT, type TEXT, pkgKey INTEGER)")
+    for name, arch, version, release, download_size, installed_size, provides, requires, files in packages:
+        package_key = connection.execute("INSERT INTO packages (name, arch, epoch, version, release, summary, "
+                                         "size_package, size_installed) VALUES (?, ?, '0', ?, ?, '', ?, ?)",
+                                         (name, arch, version, release, download_size, installed_size)).lastrowid
+        for table, dependencies in (('provides', provides), ('requires', requires)):
+            connection.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(dependency, flags, '0' if flags else None, dependency_version,
+                                     dependency_release, package_key)
+                                    for dependency, flags, dependency_version, dependency_release in dependencies])
+        connection.executemany("INSERT INTO files VALUES (?, 'file', ?)", [(file, package_key) for file in files])
+    connection.commit()
+    connection.close()
+
+
+class TestDependencyResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        create_sqlite_dependency_repo(os.path.join(self.temp_dir.name, 'yum', 'x86_64', '7', 'base'),
+                                      BASE_DEPENDENCIES)
+        create_xml_dependency_repo(os.path.join(self.temp_dir.name, 'dnf', 'epel-1a2b3c4d5e6f7a8b'),
+                                   EPEL_DEPENDENCIES)
+        self.index = DependencyIndex.from_repodata(RepodataReader([os.path.join(self.temp_dir.name, 'dnf'),
+                                                                   os.path.join(self.temp_dir.name, 'yum')]))
+        self.installed = parse_installed_provides(['glibc.x86_64\t8\t2.17-317.el7', 'glibc\t8\t2.17-317.el7',
+                                                   'glibc(x86-64)\t8\t2.17-317.el7', '/usr/lib64/libc.so.6'])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_overlaps(self):
+        """
+        Test provided and required version ranges are compared like rpm does
+        """
+        self.assertTrue(overlaps(SENSE_EQUAL, (0, '2.1', '1'), SENSE_GREATER | SENSE_EQUAL, (0, '2.0', '')))
+        self.assertFalse(overlaps(SENSE_EQUAL, (0, '1.5', '1'), SENSE_GREATER | SENSE_EQUAL, (0, '2.0', '')))
+        self.assertTrue(overlaps(SENSE_EQUAL, (0, '2.0', '3'), SENSE_EQUAL, (0, '2.0', '')))
+        self.assertFalse(overlaps(SENSE_EQUAL, (1, '1.0', '1'), SENSE_LESS, (0, '9.0', '')))
+        self.assertTrue(overlaps(SENSE_GREATER, (0, '1.0', ''), SENSE_LESS, (0, '2.0', '')))
+        self.assertTrue(overlaps(0, None, SENSE_EQUAL, (0, '2.0', '')))
+
+    def test_index(self):
+        """
+        Test provides, file provides and own names are indexed from sqlite and XML metadata
+        """
+        self.assertEqual(len(self.index), 9)
+        self.assertEqual(sorted(self.index.names[row] for row in self.index.providers('libfoo.so.1()(64bit)')),
+                         ['libfoo', 'libfoo-compat'])
+        self.assertEqual([self.index.names[row] for row in self.index.providers('/bin/sh')], ['bash'])
+        self.assertEqual([self.index.repos[row] for row in self.index.providers('/usr/bin/python')], ['epel'])
+        self.assertEqual([self.index.versions[row] for row in self.index.providers('config-tool')], ['2.1-1', '1.5-1'])
+        self.assertEqual(self.index.requires[self.index.rows('app')[0]][-1][0], 'glibc')
+
+    def test_resolve(self):
+        """
+        Test transitive closure picks the best providers and skips what is installed
+        """
+        resolution = DependencyResolver(self.index, self.installed).resolve(['app'])
+        self.assertEqual([f"{package.name}.{package.arch} {package.version} {package.repo}"
+                          for package in resolution.packages],
+                         ['app.x86_64 1.0-1 base', 'bash.x86_64 4.2-46 base', 'config-tool.noarch 2.1-1 epel',
+                          'libfoo.x86_64 1.0-1 base', 'python.x86_64 2.7.5-90 epel'])
+        self.assertEqual(resolution.download_size, 1000 + 300 + 50 + 200 + 400)
+        self.assertEqual(resolution.installed_size, 3000 + 900 + 100 + 500 + 1200)
+        self.assertEqual(resolution.unresolved, {})
+        # Without glibc installed, nothing provides it
+        resolution = DependencyResolver(self.index).resolve(['app'])
+        self.assertEqual(resolution.unresolved, {'glibc >= 2.17': ['app.x86_64'], 'glibc': ['libfoo.x86_64']})
+
+    def test_requested(self):
+        """
+        Test requested packages may be names, name.arch, provides, files and wildcards
+        """
+        resolver = DependencyResolver(self.index, self.installed)
+        resolution = resolver.resolve(['glibc', 'libfoo.i686', '/bin/bash', 'config*', 'broken', 'no-such-package'])
+        self.assertEqual(resolution.installed, ['glibc'])
+        self.assertEqual([f"{package.name}.{package.arch}" for package in resolution.packages],
+                         ['bash.x86_64', 'broken.x86_64', 'config-tool.noarch', 'libfoo.i686', 'python.x86_64'])
+        self.assertEqual(resolution.packages.get('config-tool').version, '2.1-1')
+        self.assertEqual(resolution.unresolved, {'missing-lib >= 2': ['broken.x86_64'],
+                                                 'no-such-package': ['Packagefile']})
+        self.assertIn("Unresolved: /usr/lib/missing.so (only files of primary metadata are known)",
+                      str(resolver.resolve(['/usr/lib/missing.so'])))
+
+    def test_requested_installed(self):
+        """
+        Test name.arch is installed only if the package of that arch is, and wildcards matching only
+        installed packages are reported installed, not unresolved
+        """
+        installed = parse_installed_provides(['config-tool.noarch\t8\t2.1-1', 'config-tool\t8\t2.1-1',
+                                              'glibc.x86_64\t8\t2.17-317.el7', 'glibc\t8\t2.17-317.el7'])
+        resolution = DependencyResolver(self.index, installed).resolve(['glibc.x86_64', 'glibc.i686', 'config*'])
+        self.assertEqual(resolution.installed, ['glibc.x86_64', 'config*'])
+        self.assertEqual(resolution.unresolved, {'glibc.i686': ['Packagefile']})
+        self.assertEqual(len(resolution.packages), 0)
+
+    def test_requested_version(self):
+        """
+        Test name-version entries select that version, and a requirement is not satisfied by another
+        selected version of the same package
+        """
+        installed = parse_installed_provides(['glibc.x86_64\t8\t2.17-317.el7', 'glibc\t8\t2.17-317.el7',
+                                              'config-tool.noarch\t8\t1.5-1', 'config-tool\t8\t1.5-1'])
+        resolver = DependencyResolver(self.index, installed)
+        resolution = resolver.resolve(['config-tool-1.5', 'config-tool-2.1-1.noarch', 'python-2.7.5'])
+        self.assertEqual(resolution.installed, ['config-tool-1.5'])
+        self.assertEqual([f"{package.name} {package.version}" for package in resolution.packages],
+                         ['config-tool 2.1-1', 'python 2.7.5-90'])
+        self.assertEqual(resolution.unresolved, {})
+        resolution = DependencyResolver(self.index, self.installed).resolve(['config-tool-1.5-1', 'app'])
+        self.assertEqual(resolution.packages.get('config-tool').version, '1.5-1')
+        self.assertEqual(resolution.unresolved, {'config-tool >= 2.0': ['app.x86_64']})
+
+    def test_metadata_without_dependencies(self):
+        """
+        Test packages of metadata without dependencies and sizes provide their own names
+        """
+        create_sqlite_repo(os.path.join(self.temp_dir.name, 'plain', 'base'), BASE_PACKAGES)
+        create_xml_repo(os.path.join(self.temp_dir.name, 'plain', 'epel'), EPEL_PACKAGES)
+        index = DependencyIndex.from_repodata(RepodataReader([os.path.join(self.temp_dir.name, 'plain')]))
+        resolution = DependencyResolver(index).resolve(['mc.x86_64', 'python-smbc'])
+        self.assertEqual(resolution.packages.names, ['mc', 'python-smbc'])
+        self.assertEqual(resolution.packages.get('mc').version, '1:4.8.7-11.el7')
+        self.assertEqual(resolution.download_size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
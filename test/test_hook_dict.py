@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Append hook dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "hook")))
+import hook_dict
+from hook_dict import files_with_compare, merge_dictionaries, read_idea_dictionary, read_vassist_dictionary
+
+
+class TestHookDict(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, 'projects')
+        self.cache_file = os.path.join(self.temp_dir.name, 'cache', 'locations.json')
+        for path in ('one/.idea/dictionaries/user.xml', 'two/.idea/dictionaries/user.xml',
+                     'two/node_modules/pkg/user.xml', 'three/.git/user.xml', 'three/src/main.py'):
+            self.write(path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, path: str):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(path)
+
+    def find(self):
+        return files_with_compare(self.root, 'user.xml', cache_file=self.cache_file, workers=2)
+
+    def test_prune(self):
+        """
+        Test dictionaries are found outside pruned directories only
+        """
+        self.assertEqual(self.find(), [os.path.join(self.root, 'one/.idea/dictionaries/user.xml'),
+                                       os.path.join(self.root, 'two/.idea/dictionaries/user.xml')])
+
+    def test_cache(self):
+        """
+        Test unchanged directories are not scanned again, and changed ones are
+        """
+        found = self.find()
+        with mock.patch('hook_dict.os.scandir', wraps=os.scandir) as scandir:
+            self.assertEqual(self.find(), found)
+            self.assertEqual(scandir.call_count, 0)
+            self.write('three/src/user.xml')
+            self.assertEqual(self.find(), sorted(found + [os.path.join(self.root, 'three/src/user.xml')]))
+            self.assertEqual(scandir.call_count, 1)
+
+
+class TestMergeDictionaries(unittest.TestCase):
+
+    IDEA = """<component name="ProjectDictionaryState">
+  <dictionary name="{name}">
+    <words>
+{words}
+    </words>
+  </dictionary>
+</component>
+"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.state_file = os.path.join(self.temp_dir.name, 'state.json')
+        self.idea = [self.write('one.xml', self.IDEA.format(name='user', words='      <w>yum</w>\n      <w>rpm</w>')),
+                     self.write('two.xml', self.IDEA.format(name='user', words='      <w>dnf</w>'))]
+        self.vassist = [self.write('UserWords.txt', 'rpmdb\nyum\n')]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_merge(self):
+        """
+        Test every dictionary gets all words, and unchanged dictionaries are not merged again
+        """
+        self.assertEqual(merge_dictionaries(self.idea, self.vassist, state_file=self.state_file), 3)
+        words = {'dnf', 'rpm', 'rpmdb', 'yum'}
+        self.assertEqual(read_idea_dictionary(self.idea[0]), ('user', words))
+        self.assertEqual(read_idea_dictionary(self.idea[1]), ('user', words))
+        self.assertEqual(read_vassist_dictionary(self.vassist[0]), words)
+        mtime = os.stat(self.idea[0]).st_mtime_ns
+        with mock.patch('hook_dict.read_idea_dictionary') as read:
+            self.assertEqual(merge_dictionaries(self.idea, self.vassist, state_file=self.state_file), 0)
+            read.assert_not_called()
+        self.assertEqual(os.stat(self.idea[0]).st_mtime_ns, mtime)
+
+    def test_merge_changed(self):
+        """
+        Test only dictionaries with different content are written
+        """
+        merge_dictionaries(self.idea, self.vassist, state_file=self.state_file)
+        self.write('UserWords.txt', 'rpmdb\nyum\ncreaterepo\n')
+        self.assertEqual(merge_dictionaries(self.idea, self.vassist, state_file=self.state_file), 3)
+        self.assertIn('createrepo', read_idea_dictionary(self.idea[1])[1])
+        self.assertEqual(merge_dictionaries(self.idea, self.vassist, state_file=self.state_file), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper import instrumentation
+from yum_wrapper.instrumentation import Histogram, MetricsRecorder, add_hook, remove_hook, command_name, timed
+from yum_wrapper.package_helper import execute, execute_stream
+
+PRINT_LINES = [sys.executable, '-c', 'print("one"); print("two"); raise SystemExit(3)']
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = MetricsRecorder()
+        add_hook(self.recorder)
+
+    def tearDown(self):
+        remove_hook(self.recorder)
+
+    def test_command_name(self):
+        """
+        Test metric label drops sudo and options
+        """
+        self.assertEqual(command_name(['sudo', 'yum', 'install', '-y', 'mc']), 'yum install')
+        self.assertEqual(command_name(['yum', '-C', 'list', 'mc']), 'yum list')
+        self.assertEqual(command_name(['rpm', '-qa', '--qf', '%{NAME}']), 'rpm -qa')
+
+    def test_histogram(self):
+        """
+        Test values are counted in cumulative buckets
+        """
+        histogram = Histogram((1, 10))
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+        self.assertEqual(histogram.buckets(), [(1, 2), (10, 3), ('+Inf', 4)])
+        self.assertEqual(histogram.sum, 56.5)
+
+    def test_execute(self):
+        """
+        Test execute and execute_stream record output size, lines and exit code
+        """
+        execute(PRINT_LINES)
+        stream = execute_stream(PRINT_LINES)
+        self.assertEqual(list(stream), ['one', 'two'])
+        label = command_name(PRINT_LINES)
+        self.assertEqual(self.recorder.histograms['command_seconds'][label].count, 2)
+        self.assertEqual(self.recorder.histograms['command_lines'][label].sum, 4)
+        self.assertEqual(self.recorder.histograms['command_stdout_bytes'][label].sum, 16)
+        self.assertEqual(self.recorder.exit_codes, {(label, 3): 2})
+
+    def test_export(self):
+        """
+        Test metrics are written as Prometheus text and JSON
+        """
+        timed(lambda: None)()
+        execute(PRINT_LINES)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.recorder.write(os.path.join(temp_dir, 'metrics.prom'))
+            self.recorder.write(os.path.join(temp_dir, 'metrics.json'))
+            with open(os.path.join(temp_dir, 'metrics.prom')) as f:
+                prometheus = f.read()
+            with open(os.path.join(temp_dir, 'metrics.json')) as f:
+                metrics = json.load(f)
+        label = command_name(PRINT_LINES)
+        self.assertIn(f'yum_wrapper_command_lines_bucket{{command="{label}",le="+Inf"}} 1', prometheus)
+        self.assertIn(f'yum_wrapper_command_exit_total{{command="{label}",code="3"}} 1', prometheus)
+        self.assertIn('yum_wrapper_method_seconds_count{method="<lambda>"} 1', prometheus)
+        self.assertEqual(metrics['command_lines'][label]['sum'], 2)
+
+    def test_disabled(self):
+        """
+        Test nothing is measured without hooks
+        """
+        remove_hook(self.recorder)
+        try:
+            execute(PRINT_LINES)
+            self.assertFalse(instrumentation.HOOKS)
+            self.assertEqual(self.recorder.exit_codes, {})
+        finally:
+            add_hook(self.recorder)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.manifest import ManifestCache, compile_manifest, load_manifest
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.write('base.pkgs', "# Base packages\nmc\nrsync  # inline comment\ncurl\n")
+        self.write('roles/web.pkgs', "include ../base.pkgs\nnginx\ncurl\n")
+        self.write('Packagefile', "include base.pkgs\ninclude roles/*.pkgs\n\n[db-*]\npostgresql\n[*]\nvim mc\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name: str, content: str):
+        path = os.path.join(self.temp_dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_compile(self):
+        """
+        Test includes, host sections and dedupe
+        """
+        packages, files, globs = compile_manifest(self.path('Packagefile'), hostname='web-01')
+        self.assertEqual(packages, ['mc', 'rsync', 'curl', 'nginx', 'vim'])
+        self.assertEqual(sorted(files), sorted(self.path(name) for name in ('Packagefile', 'base.pkgs', 'roles/web.pkgs')))
+        self.assertEqual(globs, {self.path('roles/*.pkgs'): [self.path('roles/web.pkgs')]})
+        packages, _, _ = compile_manifest(self.path('Packagefile'), hostname='db-01')
+        self.assertEqual(packages, ['mc', 'rsync', 'curl', 'nginx', 'postgresql', 'vim'])
+
+    def test_include_cycle(self):
+        """
+        Test include cycle is reported
+        """
+        self.write('base.pkgs', "include Packagefile\n")
+        with self.assertRaises(ValueError):
+            compile_manifest(self.path('Packagefile'), hostname='web-01')
+
+    def test_cache(self):
+        """
+        Test cached manifest is reused until content of some included file is changed
+        """
+        cache = ManifestCache(os.path.join(self.temp_dir.name, 'cache'))
+        packages = load_manifest(self.path('Packagefile'), hostname='web-01', cache=cache)
+        with mock.patch('yum_wrapper.manifest.compile_manifest') as compile_mock:
+            self.assertEqual(load_manifest(self.path('Packagefile'), hostname='web-01', cache=cache), packages)
+            # Touched file with the same content
+            os.utime(self.path('base.pkgs'), ns=(0, 0))
+            self.assertEqual(load_manifest(self.path('Packagefile'), hostname='web-01', cache=cache), packages)
+            compile_mock.assert_not_called()
+        self.write('roles/web.pkgs', "nginx\nhttpd-tools\n")
+        self.assertEqual(load_manifest(self.path('Packagefile'), hostname='web-01', cache=cache),
+                         ['mc', 'rsync', 'curl', 'nginx', 'httpd-tools', 'vim'])
+
+    def test_cache_new_include(self):
+        """
+        Test cached manifest is invalidated when a new file matches an include wildcard, or a matched file is removed
+        """
+        cache = ManifestCache(os.path.join(self.temp_dir.name, 'cache'))
+        self.assertEqual(load_manifest(self.path('Packagefile'), hostname='web-01', cache=cache),
+                         ['mc', 'rsync', 'curl', 'nginx', 'vim'])
+        self.write('roles/db.pkgs', "postgresql\n")
+        self.assertIsNone(cache.get(self.path('Packagefile'), 'web-01'))
+        self.assertEqual(load_manifest(self.path('Packagefile'), hostname='web-01', cache=cache),
+                         ['mc', 'rsync', 'curl', 'postgresql', 'nginx', 'vim'])
+        os.remove(self.path('roles/db.pkgs'))
+        self.assertEqual(load_manifest(self.path('Packagefile'), hostname='web-01', cache=cache),
+                         ['mc', 'rsync', 'curl', 'nginx', 'vim'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,8 +4,8 @@ import unittest
 
 # Append package dir to sys.path
 PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
-sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR)))
-from package_helper import read_packagefile
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.package_helper import execute_stream, read_packagefile
 
 
 class TestPackageHelper(unittest.TestCase):
@@ -15,7 +15,7 @@ class TestPackageHelper(unittest.TestCase):
         Test apt packagefile
         """
         current_dir = os.path.dirname(os.path.abspath(__file__))
-        package_file = os.path.join(current_dir, "../test_data/packages", 'Packagefile')
+        package_file = os.path.join(current_dir, "test_data/packages", 'Packagefile')
         packages = read_packagefile(package_file)
         expected_packages = ['binutils',
                              'build-essential',
@@ -28,6 +28,15 @@ class TestPackageHelper(unittest.TestCase):
                              'wget']
         self.assertEqual(packages, expected_packages)
 
+    def test_execute_stream(self):
+        """
+        Test command output is yielded line by line, return code is the generator return value
+        """
+        def run():
+            ret_code = yield from execute_stream([sys.executable, '-c', 'print(" first ");print();print("second");exit(3)'])
+            self.assertEqual(ret_code, 3)
+        self.assertEqual(list(run()), ['first', 'second'])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.package import Package
+from yum_wrapper.package_table import PackageTable
+from yum_wrapper.package_matcher import PackageMatcher
+
+
+class TestPackageMatcher(unittest.TestCase):
+
+    def test_match(self):
+        """
+        Test literal and wildcard patterns against package name, name.arch and name-version spellings
+        """
+        matcher = PackageMatcher(['mc', 'firefox*.i686', 'grub2-2.02*', 'libx?b'])
+        self.assertTrue(matcher.match('mc', 'x86_64', '1:4.8.7-11.el7'))
+        self.assertTrue(matcher.match('firefox', 'i686', '91.10.0-1.el7.centos'))
+        self.assertFalse(matcher.match('firefox', 'x86_64', '91.10.0-1.el7.centos'))
+        self.assertTrue(matcher.match('grub2', 'x86_64', '1:2.02-0.87.el7.centos.7'))
+        self.assertTrue(matcher.match('libxcb', 'x86_64', '1.13-1.el7'))
+        self.assertFalse(matcher.match('libxcb-devel', 'x86_64', '1.13-1.el7'))
+
+    def test_matching_patterns(self):
+        """
+        Test all patterns matching the package are reported
+        """
+        matcher = PackageMatcher(['mc', 'm*', 'mc.x86_64', 'rsync'])
+        self.assertEqual(matcher.matching_patterns('mc', 'x86_64', '1:4.8.7-11.el7'), {0, 1, 2})
+
+    def test_select(self):
+        """
+        Test table rows are matched in one pass
+        """
+        table = PackageTable(Package(package_info) for package_info in
+                             ["libwpg.x86_64 0.3.0-1.el7 anaconda",
+                              "libwps.x86_64 0.4.7-1.el7 base",
+                              "libxcb.x86_64 1.13-1.el7 anaconda",
+                              "libxkbcommon.x86_64 0.7.1-3.el7 anaconda"])
+        self.assertEqual(PackageMatcher(['libwp*', 'libxkbcommon']).select(table), [0, 1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.package import Package
+from yum_wrapper.package_table import CodedColumn, PackageTable
+
+
+class TestPackageTable(unittest.TestCase):
+
+    @staticmethod
+    def make_table(packages_info):
+        return PackageTable(Package(package_info) for package_info in packages_info)
+
+    def test_lookup(self):
+        """
+        Test lookup by name and by (name, arch)
+        """
+        table = self.make_table(["firefox.x86_64 91.10.0-1.el7.centos @updates",
+                                 "firefox.i686 91.10.0-1.el7.centos updates",
+                                 "python3.11.x86_64 3.11.2-2.el9 appstream"])
+        self.assertEqual(len(table), 3)
+        self.assertIn('firefox', table)
+        self.assertIn(('firefox', 'i686'), table)
+        self.assertNotIn(('firefox', 'noarch'), table)
+        self.assertEqual(table.get('firefox', 'i686').repo, 'updates')
+        self.assertEqual(len(table.find('firefox')), 2)
+        self.assertEqual(table.get('python3.11').arch, 'x86_64')
+        self.assertIsNone(table.get('mc'))
+        self.assertEqual(table[-1].name, 'python3.11')
+
+    def test_lookup_after_add(self):
+        """
+        Test rows added after the first lookup are chained to the rows of the same name in order
+        """
+        table = self.make_table(["kernel.x86_64 3.10.0-1160.el7 @base"])
+        self.assertEqual(table.rows('kernel'), [0])
+        self.assertEqual(table.rows('kernel', 'x86_64'), [0])
+        self.assertEqual(table.rows('kernel', 'i686'), [])
+        table.add('mc', 'x86_64', '1:4.8.7-11.el7', 'base')
+        table.add('kernel', 'x86_64', '3.10.0-1160.2.1.el7', 'updates')
+        table.add('kernel', 'i686', '3.10.0-1160.2.1.el7', 'updates')
+        self.assertEqual(table.rows('kernel'), [0, 2, 3])
+        self.assertEqual(table.rows('kernel', 'x86_64'), [0, 2])
+        self.assertEqual([package.version for package in table.find('kernel', 'i686')], ['3.10.0-1160.2.1.el7'])
+        self.assertIn(('mc', 'x86_64'), table)
+        copy = table.select(range(len(table)))
+        self.assertEqual(copy.rows('kernel', 'i686'), [3])
+        copy.add('kernel', 'i686', '3.10.0-1160.6.1.el7', 'updates')
+        self.assertEqual(copy.rows('kernel'), [0, 2, 3, 4])
+        self.assertEqual(copy.rows('kernel', 'i686'), [3, 4])
+
+    def test_coded_column(self):
+        """
+        Test coded column keeps values in order beyond one-byte codes
+        """
+        values = [f"repo{i % 300}" for i in range(600)]
+        column = CodedColumn(values)
+        self.assertEqual(len(column), 600)
+        self.assertEqual(column[299], 'repo299')
+        self.assertEqual(column[-1], 'repo299')
+        self.assertEqual(column, values)
+        self.assertEqual(len(column.values), 300)
+        self.assertEqual(PackageTable.from_columns(self.make_table(["mc.x86_64 1:4.8.7-11.el7 @base"]).to_columns())
+                         .to_columns()['repos'], ['base'])
+
+    def test_group_by_repo(self):
+        """
+        Test packages are grouped by repo
+        """
+        table = self.make_table(["libwpg.x86_64 0.3.0-1.el7 anaconda",
+                                 "libwps.x86_64 0.4.7-1.el7 base",
+                                 "libxcb.x86_64 1.13-1.el7 anaconda"])
+        groups = table.group_by_repo()
+        self.assertEqual(sorted(groups), ['anaconda', 'base'])
+        self.assertEqual(groups['anaconda'].names, ['libwpg', 'libxcb'])
+
+    def test_set_operations(self):
+        """
+        Test union, intersection and difference by (name, arch, version)
+        """
+        old = self.make_table(["libwpg.x86_64 0.3.0-1.el7 @anaconda",
+                               "libwps.x86_64 0.4.7-1.el7 @base"])
+        new = self.make_table(["libwps.x86_64 0.4.7-1.el7 @base",
+                               "libwps.x86_64 0.4.8-1.el7 @base"])
+        self.assertEqual((old & new).names, ['libwps'])
+        self.assertEqual((old - new).names, ['libwpg'])
+        self.assertEqual((old | new).versions, ['0.3.0-1.el7', '0.4.7-1.el7', '0.4.8-1.el7'])
+        self.assertIn(new[1], old | new)
+        self.assertNotIn(new[1], old)
+
+
+if __name__ == "__main__":
+    unittest.main()
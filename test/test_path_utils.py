@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.path_utils import create_symlinks_recursive, sync_symlinks
+
+
+class TestPathUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.temp_dir.name, 'dotfiles')
+        self.dst = os.path.join(self.temp_dir.name, 'home')
+        os.makedirs(self.dst)
+        for name in ('.bashrc', 'vim/.vimrc', 'git/config/.gitconfig'):
+            path = os.path.join(self.src, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_sync(self):
+        """
+        Test tree is flattened into links, and re-run changes nothing
+        """
+        self.assertEqual(create_symlinks_recursive(self.src, self.dst), 0)
+        self.assertEqual(sorted(os.listdir(self.dst)), ['.bashrc', '.gitconfig', '.vimrc'])
+        self.assertEqual(os.readlink(os.path.join(self.dst, '.vimrc')), os.path.join(self.src, 'vim', '.vimrc'))
+        ctime = os.lstat(os.path.join(self.dst, '.bashrc')).st_ctime_ns
+        stats = sync_symlinks(self.src, self.dst)
+        self.assertEqual(stats, {'created': 0, 'updated': 0, 'unchanged': 3, 'removed': 0, 'skipped': 0})
+        self.assertEqual(os.lstat(os.path.join(self.dst, '.bashrc')).st_ctime_ns, ctime)
+
+    def test_update_and_prune(self):
+        """
+        Test wrong links and files are replaced, and stale links to src are pruned
+        """
+        sync_symlinks(self.src, self.dst)
+        os.remove(os.path.join(self.dst, '.vimrc'))
+        os.symlink('/nonexistent', os.path.join(self.dst, '.vimrc'))
+        os.remove(os.path.join(self.dst, '.bashrc'))
+        with open(os.path.join(self.dst, '.bashrc'), 'w') as f:
+            f.write('local')
+        os.remove(os.path.join(self.src, 'git', 'config', '.gitconfig'))
+        os.symlink('/etc/hosts', os.path.join(self.dst, 'hosts'))
+
+        dry_run = sync_symlinks(self.src, self.dst, prune=True, dry_run=True)
+        self.assertEqual(dry_run, {'created': 0, 'updated': 2, 'unchanged': 0, 'removed': 1, 'skipped': 0})
+        self.assertEqual(os.readlink(os.path.join(self.dst, '.vimrc')), '/nonexistent')
+
+        self.assertEqual(sync_symlinks(self.src, self.dst, prune=True), dry_run)
+        self.assertEqual(sorted(os.listdir(self.dst)), ['.bashrc', '.vimrc', 'hosts'])
+        self.assertEqual(os.readlink(os.path.join(self.dst, '.bashrc')), os.path.join(self.src, '.bashrc'))
+        self.assertEqual(os.readlink(os.path.join(self.dst, '.vimrc')), os.path.join(self.src, 'vim', '.vimrc'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import shutil
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.prefetch import Prefetcher, download_command, package_spec, parse_urls, resolve_command
+from yum_wrapper.rpm_installer import RpmInstaller
+
+RPM_FILES = ['mc-4.8.7-11.el7.x86_64.rpm', 'gpm-libs-1.20.7-6.el7.x86_64.rpm', 'slang-2.2.4-11.el7.x86_64.rpm']
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repo_dir = os.path.join(self.temp_dir.name, 'repo')
+        self.download_dir = os.path.join(self.temp_dir.name, 'download')
+        os.makedirs(self.repo_dir)
+        for file_name in RPM_FILES:
+            with open(os.path.join(self.repo_dir, file_name), 'wb') as f:
+                f.write(file_name.encode("utf-8") * 1000)
+        self.urls = [pathlib.Path(self.repo_dir, file_name).as_uri() for file_name in RPM_FILES]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def resolve_output(self):
+        return 0, ['Loaded plugins: fastestmirror', '--> Running transaction check'] + self.urls
+
+    def fake_execute(self, command: list):
+        """
+        Resolve like yumdownloader --urls, download like yumdownloader --destdir, packages missing in repo fail
+        """
+        if '--urls' in command:
+            return self.resolve_output()
+        download_dir = command[command.index('--destdir') + 1]
+        ret_code = 0
+        for spec in command[3:]:
+            source = os.path.join(self.repo_dir, f"{spec}.rpm")
+            if os.path.exists(source):
+                shutil.copy(source, download_dir)
+            else:
+                ret_code = 1
+        return ret_code, []
+
+    def test_parse_urls(self):
+        """
+        Test only RPM URLs are taken from the resolve output
+        """
+        self.assertEqual(parse_urls(self.resolve_output()[1] + self.urls[:1]), self.urls)
+        self.assertEqual(resolve_command('dnf', ['mc']), ['dnf', 'download', '--url', '--resolve', 'mc'])
+        self.assertEqual(package_spec(self.urls[0]), 'mc-4.8.7-11.el7.x86_64')
+        self.assertEqual(download_command('dnf', ['mc-4.8.7-11.el7.x86_64'], '/tmp/rpms', '/srv/image'),
+                         ['dnf', 'download', '--destdir', '/tmp/rpms', '--installroot', '/srv/image',
+                          'mc-4.8.7-11.el7.x86_64'])
+
+    def test_prefetch(self):
+        """
+        Test packages are downloaded by yumdownloader processes in parallel, in the order of resolved URLs
+        """
+        prefetcher = Prefetcher(download_dir=self.download_dir, workers=2)
+        with mock.patch('yum_wrapper.prefetch.execute', side_effect=self.fake_execute) as execute:
+            paths = prefetcher.prefetch(['mc'])
+        self.assertEqual(execute.call_args_list[0], mock.call(['yumdownloader', '--urls', '--resolve', 'mc']))
+        downloads = sorted(call.args[0] for call in execute.call_args_list[1:])
+        self.assertEqual(downloads, [
+            ['yumdownloader', '--destdir', self.download_dir, 'gpm-libs-1.20.7-6.el7.x86_64'],
+            ['yumdownloader', '--destdir', self.download_dir, 'mc-4.8.7-11.el7.x86_64', 'slang-2.2.4-11.el7.x86_64'],
+        ])
+        self.assertEqual(paths, [os.path.join(self.download_dir, file_name) for file_name in RPM_FILES])
+        for file_name, path in zip(RPM_FILES, paths):
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), file_name.encode("utf-8") * 1000)
+
+    def test_download_failed(self):
+        """
+        Test prefetch fails if the download tool fails or doesn't produce a file
+        """
+        prefetcher = Prefetcher(download_dir=self.download_dir, workers=2)
+        os.remove(os.path.join(self.repo_dir, RPM_FILES[1]))
+        with mock.patch('yum_wrapper.prefetch.execute', side_effect=self.fake_execute):
+            self.assertIsNone(prefetcher.prefetch(['mc']))
+        with mock.patch('yum_wrapper.prefetch.execute', return_value=(0, [])):
+            self.assertIsNone(prefetcher.download_all(self.urls[1:2]))
+
+    def test_install_list(self):
+        """
+        Test prefetched files are installed in a single transaction
+        """
+        installer = RpmInstaller('yum')
+        prefetcher = Prefetcher(download_dir=self.download_dir)
+        with mock.patch('yum_wrapper.prefetch.execute', side_effect=self.fake_execute), \
+                mock.patch('yum_wrapper.rpm_installer.execute', return_value=(0, [])) as execute:
+            report = installer.install_list(['mc'], prefetch=prefetcher)
+        self.assertEqual(report, {'mc': 0})
+        execute.assert_called_once_with(['sudo', 'yum', '--setopt=localpkg_gpgcheck=1', 'install', '-y'] +
+                                        [os.path.join(self.download_dir, file_name) for file_name in RPM_FILES])
+
+    def test_install_list_installed(self):
+        """
+        Test nothing is installed if the resolve finds no missing packages
+        """
+        installer = RpmInstaller('yum')
+        prefetcher = Prefetcher(download_dir=self.download_dir)
+        with mock.patch('yum_wrapper.prefetch.execute', return_value=(0, ['Loaded plugins: fastestmirror'])), \
+                mock.patch('yum_wrapper.rpm_installer.execute') as execute:
+            report = installer.install_list(['mc'], prefetch=prefetcher)
+        self.assertEqual(report, {'mc': 0})
+        execute.assert_not_called()
+
+    def test_install_list_fallback(self):
+        """
+        Test packages are installed by name if download fails
+        """
+        installer = RpmInstaller('yum')
+        prefetcher = Prefetcher(download_dir=self.download_dir)
+        os.remove(os.path.join(self.repo_dir, RPM_FILES[1]))
+        with mock.patch('yum_wrapper.prefetch.execute', side_effect=self.fake_execute), \
+                mock.patch('yum_wrapper.rpm_installer.execute', return_value=(0, [])) as execute:
+            report = installer.install_list(['mc', 'vim'], prefetch=prefetcher)
+        self.assertEqual(report, {'mc': 0, 'vim': 0})
+        execute.assert_called_once_with(['sudo', 'yum', 'install', '-y', 'mc', 'vim'])
+
+
+if __name__ == "__main__":
+    unittest.main()
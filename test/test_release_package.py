@@ -0,0 +1,74 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Append project dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(PROJECT_DIR)
+import release_package
+
+
+class TestReleasePackage(unittest.TestCase):
+
+    def setUp(self):
+        self.project_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.project_dir, "src", "yum_wrapper", "__pycache__"))
+        self._write("setup.py", "setup()")
+        self._write(os.path.join("src", "yum_wrapper", "module.py"), "VALUE = 1")
+
+    def tearDown(self):
+        shutil.rmtree(self.project_dir)
+
+    def _write(self, name, content):
+        with open(os.path.join(self.project_dir, name), "w") as f:
+            f.write(content)
+
+    def test_source_hash(self):
+        """
+        Hash is stable, changes with any build input, ignores bytecode
+        """
+        initial = release_package.source_hash(self.project_dir)
+        self.assertEqual(initial, release_package.source_hash(self.project_dir))
+        self._write(os.path.join("src", "yum_wrapper", "__pycache__", "module.cpython-38.pyc"), "bytecode")
+        self.assertEqual(initial, release_package.source_hash(self.project_dir))
+        self._write(os.path.join("src", "yum_wrapper", "module.py"), "VALUE = 2")
+        changed = release_package.source_hash(self.project_dir)
+        self.assertNotEqual(initial, changed)
+        self._write("setup.cfg", "[metadata]")
+        self.assertNotEqual(changed, release_package.source_hash(self.project_dir))
+
+    def test_source_hash_renamed_file(self):
+        """
+        Renaming a file without changing its content changes the hash
+        """
+        initial = release_package.source_hash(self.project_dir)
+        os.rename(os.path.join(self.project_dir, "src", "yum_wrapper", "module.py"),
+                  os.path.join(self.project_dir, "src", "yum_wrapper", "other.py"))
+        self.assertNotEqual(initial, release_package.source_hash(self.project_dir))
+
+    def test_is_built(self):
+        """
+        Artifacts are up to date only if both exist and their saved hash matches
+        """
+        original_dir = release_package.PROJECT_DIR
+        release_package.PROJECT_DIR = self.project_dir
+        try:
+            current_hash = release_package.source_hash(self.project_dir)
+            self.assertFalse(release_package.is_built(current_hash))
+            os.makedirs(os.path.join(self.project_dir, "dist"))
+            for path in (release_package.wheel_path(), release_package.targz_path()):
+                with open(path, "w") as f:
+                    f.write("artifact")
+            self.assertFalse(release_package.is_built(current_hash))
+            release_package.write_hash(release_package.build_hash_path(), current_hash)
+            self.assertTrue(release_package.is_built(current_hash))
+            self.assertFalse(release_package.is_built("other"))
+            self.assertFalse(release_package.is_installed("other"))
+        finally:
+            release_package.PROJECT_DIR = original_dir
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import gzip
+import sqlite3
+import tempfile
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.repodata import RepodataReader
+
+REPOMD = """<?xml version="1.0" encoding="UTF-8"?>
+<repomd xmlns="http://linux.duke.edu/metadata/repo" xmlns:rpm="http://linux.duke.edu/metadata/rpm">
+  <revision>1668000000</revision>
+  <data type="{data_type}">
+    <location href="repodata/{file_name}"/>
+  </data>
+</repomd>
+"""
+
+PRIMARY_PACKAGE = """<package type="rpm">
+  <name>{name}</name>
+  <arch>{arch}</arch>
+  <version epoch="{epoch}" ver="{version}" rel="{release}"/>
+  <summary>{summary}</summary>
+</package>
+"""
+
+# name, arch, epoch, version, release, summary
+BASE_PACKAGES = [('samba-client', 'x86_64', '0', '4.10.16', '25.el7_9', 'Samba client programs'),
+                 ('smbldap-tools', 'noarch', '0', '0.9.11', '6.el7', 'User and group administration tools for Samba'),
+                 ('mc', 'x86_64', '1', '4.8.7', '11.el7', 'User-friendly text console file manager')]
+EPEL_PACKAGES = [('python-smbc', 'x86_64', '0', '1.0.13', '8.el7', 'Python bindings for libsmbclient API'),
+                 ('firefox-noscript', 'noarch', '0', '11.0.3', '3.el7', 'JavaScript white list extension')]
+
+
+def create_xml_repo(repo_dir, packages):
+    """
+    Create dnf-like repository cache with gzipped primary XML
+    """
+    os.makedirs(os.path.join(repo_dir, 'repodata'))
+    with open(os.path.join(repo_dir, 'repodata', 'repomd.xml'), 'w') as f:
+        f.write(REPOMD.format(data_type='primary', file_name='0123-primary.xml.gz'))
+    with gzip.open(os.path.join(repo_dir, 'repodata', '0123-primary.xml.gz'), 'wt') as f:
+        f.write('<metadata xmlns="http://linux.duke.edu/metadata/common" packages="%d">\n' % len(packages))
+        for name, arch, epoch, version, release, summary in packages:
+            f.write(PRIMARY_PACKAGE.format(name=name, arch=arch, epoch=epoch, version=version, release=release,
+                                           summary=summary))
+        f.write('</metadata>\n')
+
+
+def create_sqlite_repo(repo_dir, packages):
+    """
+    Create yum-like repository cache with decompressed primary sqlite database next to repomd.xml
+    """
+    os.makedirs(repo_dir)
+    with open(os.path.join(repo_dir, 'repomd.xml'), 'w') as f:
+        f.write(REPOMD.format(data_type='primary_db', file_name='4567-primary.sqlite.bz2'))
+    connection = sqlite3.connect(os.path.join(repo_dir, '4567-primary.sqlite'))
+    connection.execute("CREATE TABLE packages (pkgKey INTEGER PRIMARY KEY, name TEXT, arch TEXT, epoch TEXT, "
+                       "version TEXT, release TEXT, summary TEXT)")
+    connection.executemany("INSERT INTO packages (name, arch, epoch, version, release, summary) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", packages)
+    connection.commit()
+    connection.close()
+
+
+class TestRepodata(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        create_sqlite_repo(os.path.join(self.temp_dir.name, 'yum', 'x86_64', '7', 'base'), BASE_PACKAGES)
+        create_xml_repo(os.path.join(self.temp_dir.name, 'dnf', 'epel-1a2b3c4d5e6f7a8b'), EPEL_PACKAGES)
+        self.reader = RepodataReader([os.path.join(self.temp_dir.name, 'dnf'),
+                                      os.path.join(self.temp_dir.name, 'yum')])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_repositories(self):
+        """
+        Test yum and dnf repositories are found in cache
+        """
+        self.assertEqual(sorted(repository.name for repository in self.reader.repositories()), ['base', 'epel'])
+
+    def test_list_available(self):
+        """
+        Test available packages are read from sqlite and XML metadata
+        """
+        available = self.reader.list_available()
+        self.assertEqual(len(available), 5)
+        self.assertEqual(available.get('mc').version, '1:4.8.7-11.el7')
+        self.assertEqual(available.get('python-smbc', 'x86_64').repo, 'epel')
+        self.assertEqual(self.reader.list_available(['samba*', 'firefox-noscript.noarch']).names,
+                         ['firefox-noscript', 'samba-client'])
+
+    def test_search(self):
+        """
+        Test packages matching more terms and matching by name go first
+        """
+        found = self.reader.search('samba smb')
+        self.assertEqual(found.names, ['smbldap-tools', 'python-smbc', 'samba-client'])
+        self.assertEqual(found.get('python-smbc').summary, 'Python bindings for libsmbclient API')
+
+
+if __name__ == "__main__":
+    unittest.main()
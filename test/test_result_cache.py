@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repomd = os.path.join(self.temp_dir.name, 'repo', 'repomd.xml')
+        os.makedirs(os.path.dirname(self.repomd))
+        with open(self.repomd, 'w') as f:
+            f.write('<repomd/>')
+        self.cache = ResultCache(cache_dir=os.path.join(self.temp_dir.name, 'cache'),
+                                 metadata_globs=[os.path.join(self.temp_dir.name, '*', 'repomd.xml')],
+                                 rpmdb_dirs=[])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_put(self):
+        """
+        Test cached output is returned for the same command only
+        """
+        self.assertIsNone(self.cache.get(['yum', 'list', 'mc']))
+        self.cache.put(['yum', 'list', 'mc'], ['Installed Packages', 'mc.x86_64 1:4.8.7-11.el7 @base'])
+        self.assertEqual(self.cache.get(['yum', 'list', 'mc']), ['Installed Packages', 'mc.x86_64 1:4.8.7-11.el7 @base'])
+        self.assertIsNone(self.cache.get(['yum', 'list', 'rsync']))
+
+    def test_metadata_change(self):
+        """
+        Test cached output is invalidated when repository metadata is changed
+        """
+        self.cache.put(['yum', 'search', 'mc'], ['mc.x86_64 : User-friendly text console file manager'])
+        stat = os.stat(self.repomd)
+        os.utime(self.repomd, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertIsNone(self.cache.get(['yum', 'search', 'mc']))
+
+    def test_ttl(self):
+        """
+        Test cached output is invalidated when TTL is expired
+        """
+        self.cache.ttl = 0
+        self.cache.put(['yum', 'list', 'mc'], ['Installed Packages'])
+        time.sleep(0.01)
+        self.assertIsNone(self.cache.get(['yum', 'list', 'mc']))
+
+    def test_eviction(self):
+        """
+        Test least recently used entries are evicted when cache exceeds its size
+        """
+        self.cache.put(['yum', 'list', 'first'], ['x' * 100])
+        self.cache.put(['yum', 'list', 'second'], ['x' * 100])
+        first_entry = self.cache._entry_path(['yum', 'list', 'first'])
+        os.utime(first_entry, (time.time() - 100, time.time() - 100))
+        self.cache.get(['yum', 'list', 'second'])
+        self.cache.max_size = os.path.getsize(first_entry) * 2 + 10
+        self.cache.put(['yum', 'list', 'third'], ['x' * 100])
+        self.assertIsNone(self.cache.get(['yum', 'list', 'first']))
+        self.assertIsNotNone(self.cache.get(['yum', 'list', 'second']))
+        self.assertIsNotNone(self.cache.get(['yum', 'list', 'third']))
+
+    def test_concurrent_put(self):
+        """
+        Test the same entry written by several threads at once is complete and no temporary files are left
+        """
+        command = ['yum', 'list', 'mc']
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: self.cache.put(command, [str(i)] * 1000), range(64)))
+        lines = self.cache.get(command)
+        self.assertEqual(len(lines), 1000)
+        self.assertEqual(len(set(lines)), 1)
+        self.assertEqual(os.listdir(self.cache.cache_dir), [os.path.basename(self.cache._entry_path(command))])
+
+    def test_outdated_entry_replaced(self):
+        """
+        Test outdated entry is not removed if another thread has replaced it after it was read
+        """
+        command = ['yum', 'list', 'mc']
+        self.cache.put(command, ['old'])
+        fingerprint = self.cache.fingerprint()
+
+        def replace_entry():
+            # Another thread writes the new entry while this one checks the old one
+            with mock.patch.object(self.cache, 'fingerprint', return_value=fingerprint):
+                self.cache.put(command, ['new'])
+            return 'outdated'
+
+        with mock.patch.object(self.cache, 'fingerprint', side_effect=replace_entry):
+            self.assertIsNone(self.cache.get(command))
+        self.assertEqual(self.cache.get(command), ['new'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,24 @@
 import os
 import sys
+import tempfile
 import unittest
+from unittest import mock
 
 # Append package dir to sys.path
 PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
-sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR)))
-from rpm_installer import Package
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.rpm_installer import Package, RpmInstaller, install_roots
+from yum_wrapper.package_table import PackageTable
+from yum_wrapper.result_cache import ResultCache
+from yum_wrapper.repodata import RepodataReader
+from yum_wrapper.prefetch import package_spec
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "benchmark")))
+from run_benchmarks import fake_environment
 
 
 class TestRpmInstaller(unittest.TestCase):
 
-    PACKAGE_TEST_DIR = os.path.expandvars("$HOME/Projects/HomeDir/Scripting/test_data/packages")
+    PACKAGE_TEST_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data", "packages")
 
     @staticmethod
     def read_packages(package_file):
@@ -25,13 +33,22 @@ class TestRpmInstaller(unittest.TestCase):
         packages_list = [Package(package) for package in packages_info_list]
         return packages_list
 
+    @staticmethod
+    def read_output(output_file):
+        """
+        Read recorded yum output the same way execute_stream() yields it
+        :param output_file: file with yum output
+        :return: generator of stripped non-empty lines, returning zero exit code
+        """
+        with open(os.path.join(TestRpmInstaller.PACKAGE_TEST_DIR, output_file), 'r') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        yield from lines
+        return 0
+
     @staticmethod
     def split_package_info(package_list):
-        package_names = [package.name for package in package_list]
-        package_architectures = [package.arch for package in package_list]
-        package_versions = [package.version for package in package_list]
-        package_repos = [package.repo for package in package_list]
-        return package_names, package_architectures, package_versions, package_repos
+        table = PackageTable(package_list)
+        return table.names, table.arches, table.versions, table.repos
 
     def test_installed_packages(self):
         """
@@ -63,6 +80,178 @@ class TestRpmInstaller(unittest.TestCase):
         self.assertEqual(package_versions, expected_versions)
         self.assertEqual(package_repos, expected_repos)
 
+    def test_list(self):
+        """
+        Test 'yum list' output is split to installed and available packages
+        """
+        with mock.patch('yum_wrapper.rpm_installer.execute_stream', return_value=self.read_output("test_yum_list.txt")):
+            installed, available = RpmInstaller('yum').list(['firefox*'])
+        self.assertEqual(installed.names, ['firefox'])
+        self.assertEqual(installed.repos, ['updates'])
+        self.assertEqual(available.names, ['firefox', 'firefox-noscript', 'firefox-pkcs11-loader'])
+        self.assertEqual(available.arches, ['i686', 'noarch', 'x86_64'])
+
+    def test_search(self):
+        """
+        Test 'yum search' output is parsed to packages with summaries
+        """
+        with mock.patch('yum_wrapper.rpm_installer.execute_stream', return_value=self.read_output("test_yum_search2.txt")):
+            packages = RpmInstaller('yum').search('samba smb')
+        self.assertEqual(packages.names, ['php-pear-File-SMBPasswd', 'python-smbc', 'smbldap-tools'])
+        self.assertEqual(packages[1].summary, 'Python bindings for libsmbclient API from Samba')
+
+    def test_list_cached(self):
+        """
+        Test repeated 'yum list' is served from cache, unless refresh is requested
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            installer = RpmInstaller('yum', cache=ResultCache(cache_dir, metadata_globs=[], rpmdb_dirs=[]))
+            with mock.patch('yum_wrapper.rpm_installer.execute_stream', return_value=self.read_output("test_yum_list.txt")) as stream:
+                installer.list(['firefox*'])
+                installed, available = installer.list(['firefox*'])
+                self.assertEqual(stream.call_count, 1)
+                stream.return_value = self.read_output("test_yum_list.txt")
+                installer.list(['firefox*'], refresh=True)
+                self.assertEqual(stream.call_count, 2)
+        self.assertEqual(installed.names, ['firefox'])
+        self.assertEqual(len(available), 3)
+
+    def test_list_local(self):
+        """
+        Test patterns are matched locally against installed set and repository metadata
+        """
+        sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+        from test_repodata import BASE_PACKAGES, create_sqlite_repo
+        installed_lines = ["mc\t1\t4.8.7\t11.el7\tx86_64\t1668000000\t5842378",
+                           "samba-client\t(none)\t4.10.16\t24.el7_9\tx86_64\t1668000000\t1200000"]
+        with tempfile.TemporaryDirectory() as repo_dir:
+            create_sqlite_repo(os.path.join(repo_dir, 'base'), BASE_PACKAGES)
+            installer = RpmInstaller('yum', repodata=RepodataReader([repo_dir]))
+            with mock.patch('yum_wrapper.rpm_installer.execute_stream', return_value=iter(installed_lines)) as stream:
+                installed, available = installer.list(['mc', 'samba*', 'smbldap-tools.noarch'])
+                installer.list(['mc'], selection='installed')
+        self.assertEqual(stream.call_count, 1)
+        self.assertEqual(installed.names, ['mc', 'samba-client'])
+        self.assertEqual(available.names, ['samba-client', 'smbldap-tools'])
+        self.assertEqual(available.get('samba-client').version, '4.10.16-25.el7_9')
+
+    def test_install_file_plan(self):
+        """
+        Test only packages which are not installed are passed to yum, in a single transaction
+        """
+        installed_lines = ["mc\t1\t4.8.7\t11.el7\tx86_64\t1668000000\t5842378",
+                           "rsync\t(none)\t3.1.2\t12.el7_9\tx86_64\t1668000000\t834618",
+                           "curl\t(none)\t7.29.0\t59.el7_9.1\tx86_64\t1668000000\t540164"]
+        installer = RpmInstaller('yum')
+        package_file = os.path.join(self.PACKAGE_TEST_DIR, 'Packagefile')
+        with mock.patch('yum_wrapper.rpm_installer.execute_stream', return_value=iter(installed_lines)), \
+                mock.patch('yum_wrapper.rpm_installer.execute', return_value=(0, [])) as execute:
+            self.assertEqual(installer.plan(['mc', 'rsync.x86_64', 'curl-7.29.0', 'wget']), ['wget'])
+            report = installer.install_file(package_file)
+        self.assertEqual(execute.call_count, 1)
+        self.assertEqual(sorted(report), ['binutils', 'build-essential', 'clang', 'net-tools', 'openssh-server', 'wget'])
+
+    def test_install_list_bisect(self):
+        """
+        Test failed batch is bisected down to the failed package, other packages are installed
+        """
+        transactions = []
+
+        def fake_execute(command):
+            packages = command[4:]
+            transactions.append(packages)
+            return (1, []) if 'broken' in packages else (0, [])
+
+        with mock.patch('yum_wrapper.rpm_installer.execute', side_effect=fake_execute):
+            report = RpmInstaller('yum').install_list(['mc', 'rsync', 'broken', 'curl'])
+        self.assertEqual(report, {'mc': 0, 'rsync': 0, 'broken': 1, 'curl': 0})
+        self.assertEqual(transactions[0], ['mc', 'rsync', 'broken', 'curl'])
+        self.assertIn(['mc', 'rsync'], transactions)
+        self.assertIn(['broken'], transactions)
+
+    def test_install_list_batch_size(self):
+        """
+        Test packages are installed in transactions of batch_size packages
+        """
+        with mock.patch('yum_wrapper.rpm_installer.execute', return_value=(0, [])) as execute:
+            report = RpmInstaller('yum').install_list(['mc', 'rsync', 'curl'], batch_size=2)
+        self.assertEqual(execute.call_count, 2)
+        self.assertEqual(report, {'mc': 0, 'rsync': 0, 'curl': 0})
+
+    def test_installroot(self):
+        """
+        Test yum and rpm commands target the install root
+        """
+        installer = RpmInstaller('yum', installroot='/srv/image')
+        with mock.patch('yum_wrapper.rpm_installer.execute', return_value=(0, [])) as execute:
+            installer.install_list(['mc'])
+        execute.assert_called_once_with(['sudo', 'yum', '--installroot', '/srv/image', 'install', '-y', 'mc'])
+        with mock.patch('yum_wrapper.rpm_installer.execute_stream', return_value=self.read_output('test_yum_list.txt')) as stream:
+            installer.list(['firefox*'])
+        stream.assert_called_once_with(['yum', '--installroot', '/srv/image', 'list', 'firefox*'])
+        with mock.patch('yum_wrapper.rpm_installer.execute_stream', return_value=iter([])) as stream:
+            installer.list(['mc'], selection='installed')
+        self.assertEqual(stream.call_args[0][0][-3:], ['--root', '/srv/image', 'mc'])
+
+    def test_install_roots(self):
+        """
+        Test package file is installed into every root by concurrent workers
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            package_file = os.path.join(temp_dir, 'Packagefile')
+            with open(package_file, 'w') as f:
+                f.write("# Packages\nxml1\nhttp2\nno-such-package\n")
+            roots = [os.path.join(temp_dir, f"root{i}") for i in range(3)]
+            for root in roots:
+                os.makedirs(root)
+            with fake_environment(100):
+                results = install_roots(package_file, roots, workers=2, batch_size=1)
+            for root in roots:
+                self.assertEqual(results[root]['xml1'], 0)
+                self.assertNotEqual(results[root]['no-such-package'], 0)
+                with open(os.path.join(root, 'fake_yum_installed')) as f:
+                    self.assertEqual(f.read().split(), ['xml1', 'http2'])
+
+    def test_install_roots_prefetch(self):
+        """
+        Test packages resolved for several roots are downloaded once, before the workers install them
+        """
+        prefetch = SharedPrefetcher()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            package_file = os.path.join(temp_dir, 'Packagefile')
+            with open(package_file, 'w') as f:
+                f.write("xml1\nhttp2\n")
+            roots = [os.path.join(temp_dir, f"root{i}") for i in range(3)]
+            for root in roots:
+                os.makedirs(root)
+            with fake_environment(100):
+                results = install_roots(package_file, roots, workers=2, prefetch=prefetch)
+            self.assertEqual(sorted(prefetch.resolved), sorted(roots))
+            self.assertEqual(sorted(prefetch.downloaded), ['http://repo/http2.rpm', 'http://repo/xml1.rpm'])
+            for root in roots:
+                self.assertEqual(results[root], {'xml1': 0, 'http2': 0})
+                with open(os.path.join(root, 'fake_yum_installed')) as f:
+                    self.assertEqual(f.read().split(), ['xml1', 'http2'])
+
+
+class SharedPrefetcher:
+    """
+    Prefetcher resolving every package to a repository URL, its downloaded "file" is the package name,
+    which fake yum installs like a file
+    """
+
+    def __init__(self):
+        self.resolved = []
+        self.downloaded = []
+
+    def resolve(self, packages: list, installroot: str = None) -> list:
+        self.resolved.append(installroot)
+        return [f"http://repo/{package}.rpm" for package in packages]
+
+    def download_all(self, urls: list, installroot: str = None) -> list:
+        self.downloaded += urls
+        return [package_spec(url) for url in urls]
+
 
 if __name__ == "__main__":
     unittest.main()
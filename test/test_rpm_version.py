@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.package import Package
+from yum_wrapper.package_table import PackageTable
+from yum_wrapper.rpm_version import compare_versions, evr_key, rpmvercmp, split_evr, upgrade_plan
+
+
+class TestRpmVersion(unittest.TestCase):
+
+    def test_rpmvercmp(self):
+        """
+        Test cases from rpm test suite
+        """
+        cases = [("1.0", "1.0", 0), ("1.0", "2.0", -1), ("2.0", "1.0", 1), ("2.0.1", "2.0.1", 0),
+                 ("2.0", "2.0.1", -1), ("2.0.1a", "2.0.1", 1), ("5.5p1", "5.5p2", -1), ("5.5p10", "5.5p1", 1),
+                 ("10xyz", "10.1xyz", -1), ("xyz10", "xyz10.1", -1), ("5.5p1", "5.5.p1", 0),
+                 ("10.0001", "10.1", 0), ("10.0001", "10.0039", -1), ("4.999.9", "5.0", -1),
+                 ("20101121", "20101122", -1), ("2_0", "2_0", 0), ("2.0", "2_0", 0), ("a+", "a_", 0),
+                 ("+", "_", 0), ("1.0~rc1", "1.0", -1), ("1.0", "1.0~rc1", 1), ("1.0~rc1", "1.0~rc2", -1),
+                 ("1.0~rc1~git123", "1.0~rc1", -1), ("1.0^", "1.0", 1), ("1.0^git1", "1.0", 1),
+                 ("1.0^git1", "1.01", -1), ("1.0^git1", "1.0^git2", -1), ("1.0^20160101", "1.0.1", -1),
+                 ("1.0~rc1^git1", "1.0~rc1", 1), ("1.0^git1~pre", "1.0^git1", -1), ("1b.fc17", "1.fc17", -1),
+                 ("1g.fc17", "1.fc17", 1)]
+        for first, second, expected in cases:
+            self.assertEqual(rpmvercmp(first, second), expected, f"{first} <=> {second}")
+
+    def test_evr_key(self):
+        """
+        Test versions sorted by their keys are in rpm order
+        """
+        versions = ["1:0.9-1", "1.0-1", "1.0~rc1-1", "1.0^git1-1", "1.0-1.el7", "1.0-1~beta", "1.0.1-1", "1.0a-1"]
+        self.assertEqual(sorted(versions, key=evr_key),
+                         ["1.0~rc1-1", "1.0-1~beta", "1.0-1", "1.0-1.el7", "1.0^git1-1", "1.0a-1", "1.0.1-1",
+                          "1:0.9-1"])
+
+    def test_compare_versions(self):
+        """
+        Test epoch takes precedence over version, and release is compared last
+        """
+        self.assertEqual(split_evr("1:2.02-0.87.el7"), (1, "2.02", "0.87.el7"))
+        self.assertEqual(split_evr("1.13"), (0, "1.13", ""))
+        self.assertEqual(compare_versions("1:1.0-1", "2.0-1"), 1)
+        self.assertEqual(compare_versions("2.9.1-6.el7_9.6", "2.9.1-6.el7_9.5"), 1)
+        self.assertEqual(compare_versions("0.1.4-11.el7_0", "0.1.4-11.el7_0"), 0)
+
+    def test_upgrade_plan(self):
+        """
+        Test only packages with newer available versions are reported, with the newest version
+        """
+        installed = PackageTable(Package(package_info) for package_info in
+                                 ["libxml2-python.x86_64 2.9.1-6.el7_9.6 @updates",
+                                  "libyaml.x86_64 0.1.4-11.el7_0 @anaconda",
+                                  "kernel.x86_64 3.10.0-1160.el7 @anaconda",
+                                  "kernel.x86_64 3.10.0-1160.80.1.el7 @updates"])
+        available = PackageTable(Package(package_info) for package_info in
+                                 ["libyaml.x86_64 0.1.4-11.el7_0 base",
+                                  "libyaml.i686 0.2.5-1.el7 base",
+                                  "kernel.x86_64 3.10.0-1160.76.1.el7 updates",
+                                  "libxml2-python.x86_64 2.9.1-6.el7_9.7 updates",
+                                  "libxml2-python.x86_64 2.9.1-6.el7_9.8 updates"])
+        upgrades = upgrade_plan(installed, available)
+        self.assertEqual(upgrades.names, ['libxml2-python'])
+        self.assertEqual(upgrades.versions, ['2.9.1-6.el7_9.8'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.rpmdb import parse_installed, query_installed_command
+from yum_wrapper.package_table import PackageTable
+
+
+class TestRpmdb(unittest.TestCase):
+
+    def test_query_command(self):
+        """
+        Test rpm query command includes query format and patterns
+        """
+        command = query_installed_command(['firefox*'])
+        self.assertEqual(command[:3], ['rpm', '-qa', '--queryformat'])
+        self.assertEqual(command[-1], 'firefox*')
+
+    def test_parse_installed(self):
+        """
+        Test rpm query output is parsed to installed packages
+        """
+        lines = ["mc\t1\t4.8.7\t11.el7\tx86_64\t1668000000\t5842378",
+                 "libyaml\t(none)\t0.1.4\t11.el7_0\tx86_64\t1668000100\t128350",
+                 "gpg-pubkey\t(none)\tf4a80eb5\t53a7ff4b\t(none)\t1668000200\t0",
+                 "broken line"]
+        installed = PackageTable(parse_installed(lines))
+        self.assertEqual(installed.names, ['mc', 'libyaml'])
+        self.assertEqual(installed.versions, ['1:4.8.7-11.el7', '0.1.4-11.el7_0'])
+        self.assertEqual(installed.repos, ['installed', 'installed'])
+        self.assertEqual(installed.get('mc').install_time, 1668000000)
+        self.assertEqual(installed.get('libyaml').size, 128350)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+import unittest
+from unittest import mock
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.rpm_installer import RpmInstaller
+from yum_wrapper.scheduler import HostLock, OperationScheduler, default_lock_path
+
+
+class BlockingInstaller(RpmInstaller):
+    """
+    Installer recording transactions, the first transaction waits until it's released
+    """
+
+    def __init__(self):
+        super().__init__('yum')
+        self.transactions = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def install_list(self, packages: list, batch_size: int = None, prefetch=None) -> dict:
+        self.transactions.append(packages)
+        self.started.set()
+        self.release.wait(10)
+        return {package: 1 if package == 'broken' else 0 for package in packages}
+
+
+def lock_free(path: str) -> bool:
+    """
+    :return: True if another process can take the lock file
+    """
+    statement = "import sys, fcntl; fcntl.flock(open(sys.argv[1]), fcntl.LOCK_EX | fcntl.LOCK_NB)"
+    return subprocess.run([sys.executable, '-c', statement, path], stderr=subprocess.DEVNULL).returncode == 0
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.lock = HostLock(os.path.join(self.temp_dir.name, 'yum_wrapper.lock'))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_coalesce_installs(self):
+        """
+        Test requests arriving during a transaction are installed in the next single transaction
+        """
+        installer = BlockingInstaller()
+        with OperationScheduler(installer, lock=self.lock) as scheduler:
+            first = scheduler.submit_install(['mc'])
+            installer.started.wait(10)
+            second = scheduler.submit_install(['rsync', 'mc'])
+            third = scheduler.submit_install(['broken', 'curl'])
+            installer.release.set()
+            self.assertEqual(first.result(10), {'mc': 0})
+            self.assertEqual(second.result(10), {'rsync': 0, 'mc': 0})
+            self.assertEqual(third.result(10), {'broken': 1, 'curl': 0})
+        self.assertEqual(installer.transactions, [['mc'], ['rsync', 'mc', 'broken', 'curl']])
+
+    def test_concurrent_queries(self):
+        """
+        Test queries run in cache-only mode concurrently
+        """
+        installer = RpmInstaller('yum')
+
+        def slow_stream(command):
+            time.sleep(0.3)
+            yield "=== N/S matched ==="
+            yield f"{command[-1]}.x86_64 : Summary"
+            return 0
+
+        with mock.patch('yum_wrapper.rpm_installer.execute_stream', side_effect=slow_stream) as stream, \
+                OperationScheduler(installer, query_workers=4, lock=self.lock) as scheduler:
+            started = time.monotonic()
+            futures = [scheduler.submit_search(name) for name in ('mc', 'rsync', 'curl', 'vim')]
+            results = [future.result(10) for future in futures]
+            elapsed = time.monotonic() - started
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual([result.names for result in results], [['mc'], ['rsync'], ['curl'], ['vim']])
+        self.assertTrue(all(call[0][0][:2] == ['yum', '-C'] for call in stream.call_args_list))
+
+    def test_host_lock(self):
+        """
+        Test transactions hold the lock shared with other processes
+        """
+        installer = BlockingInstaller()
+        with OperationScheduler(installer, lock=self.lock) as scheduler:
+            future = scheduler.submit_install(['mc'], batch_size=1)
+            installer.started.wait(10)
+            self.assertFalse(lock_free(self.lock.path))
+            installer.release.set()
+            self.assertEqual(future.result(10), {'mc': 0})
+        self.assertTrue(lock_free(self.lock.path))
+
+    def test_wait_host_lock(self):
+        """
+        Test transaction waits until another holder releases the lock
+        """
+        installer = BlockingInstaller()
+        installer.release.set()
+        with OperationScheduler(installer, lock=self.lock) as scheduler:
+            with HostLock(self.lock.path):
+                future = scheduler.submit_install(['mc'])
+                time.sleep(0.1)
+                self.assertEqual(installer.transactions, [])
+            self.assertEqual(future.result(10), {'mc': 0})
+        self.assertEqual(installer.transactions, [['mc']])
+
+    def test_default_lock_path(self):
+        """
+        Test every user gets the lock file in the first existing lock directory, unless YUM_WRAPPER_LOCK is set
+        """
+        lock_dirs = (os.path.join(self.temp_dir.name, 'missing'), self.temp_dir.name, '/tmp')
+        with mock.patch.dict(os.environ, {'YUM_WRAPPER_LOCK': ''}), \
+                mock.patch('yum_wrapper.scheduler.LOCK_DIRS', lock_dirs):
+            self.assertEqual(default_lock_path(), os.path.join(self.temp_dir.name, 'yum_wrapper.lock'))
+        with mock.patch.dict(os.environ, {'YUM_WRAPPER_LOCK': self.lock.path}):
+            self.assertEqual(default_lock_path(), self.lock.path)
+
+    def test_lock_file_permissions(self):
+        """
+        Test lock file is created writable by all users, and a lock file which can't be created is an error
+        """
+        umask = os.umask(0o022)
+        try:
+            with self.lock:
+                pass
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(self.lock.path).st_mode & 0o777, 0o666)
+        with self.assertRaises(RuntimeError):
+            HostLock(os.path.join(self.temp_dir.name, 'missing', 'yum_wrapper.lock')).acquire()
+
+
+if __name__ == "__main__":
+    unittest.main()
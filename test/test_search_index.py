@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from yum_wrapper.repodata import RepodataReader
+from yum_wrapper.search_index import SearchIndex
+from test_repodata import BASE_PACKAGES, EPEL_PACKAGES, create_sqlite_repo, create_xml_repo
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.epel_dir = os.path.join(self.temp_dir.name, 'epel')
+        create_sqlite_repo(os.path.join(self.temp_dir.name, 'base'), BASE_PACKAGES)
+        create_xml_repo(self.epel_dir, EPEL_PACKAGES)
+        self.index = SearchIndex(RepodataReader([self.temp_dir.name]), check_interval=0)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_search(self):
+        """
+        Test search by name and summary substrings, ranked like 'yum search'
+        """
+        self.assertEqual(self.index.search('samba smb').names, ['smbldap-tools', 'python-smbc', 'samba-client'])
+        self.assertEqual(self.index.search('CONSOLE').names, ['mc'])
+        self.assertEqual(self.index.search('sm').names, ['python-smbc', 'smbldap-tools'])
+        self.assertEqual(len(self.index.search('nothing-like-this')), 0)
+
+    def test_search_rows(self):
+        """
+        Test rows of found packages are returned from repository tables, and results are cached until refresh
+        """
+        rows = self.index.search_rows('smb SAMBA')
+        self.assertEqual([table.names[row] for table, row in rows], ['smbldap-tools', 'python-smbc', 'samba-client'])
+        self.assertIs(self.index.search_rows('samba smb'), rows)
+        self.index.refresh(force=True)
+        self.assertIs(self.index.search_rows('samba smb'), rows)
+        create_xml_repo(os.path.join(self.temp_dir.name, 'updates'), [])
+        self.index.refresh(force=True)
+        self.assertIsNot(self.index.search_rows('samba smb'), rows)
+
+    def test_search_speed(self):
+        """
+        Test search of a common term in a large repository doesn't scan or copy all packages
+        """
+        packages = [(f"lib{name}{i}", 'x86_64', '0', '1.0', '1.el7', f"{name.capitalize()} library for applications")
+                    for i in range(20000) for name in ['samba', 'http', 'xml', 'ssl'][i % 4:i % 4 + 1]]
+        create_sqlite_repo(os.path.join(self.temp_dir.name, 'large'), packages)
+        index = SearchIndex(RepodataReader([self.temp_dir.name]), check_interval=60, cache_size=0)
+        index.refresh()
+        for terms, found in ('samba', 5002), ('lib', 20001), ('http applications', 20000):
+            elapsed = []
+            for _ in range(3):
+                start = time.perf_counter()
+                self.assertEqual(len(index.search_rows(terms)), found)
+                elapsed.append(time.perf_counter() - start)
+            # Scanning and ranking all packages took 80 ms and more
+            self.assertLess(min(elapsed), 0.02, terms)
+
+    def test_incremental_refresh(self):
+        """
+        Test only segment of the changed repository is rebuilt
+        """
+        self.index.refresh()
+        segments = dict(self.index._segments)
+        updates = [('mc', 'x86_64', '1', '4.8.7', '12.el7', 'Console file manager')]
+        create_xml_repo(os.path.join(self.temp_dir.name, 'updates'), updates)
+        repomd = os.path.join(self.epel_dir, 'repodata', 'repomd.xml')
+        stat = os.stat(repomd)
+        os.utime(repomd, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.index.refresh()
+        self.assertEqual(len(self.index._segments), 3)
+        for repomd_path, segment in segments.items():
+            if repomd_path == repomd:
+                self.assertIsNot(self.index._segments[repomd_path], segment)
+            else:
+                self.assertIs(self.index._segments[repomd_path], segment)
+
+    def test_search_during_refresh(self):
+        """
+        Test searches of concurrent threads return complete results while segments are rebuilt
+        """
+        expected = ['smbldap-tools', 'python-smbc', 'samba-client']
+        repomd = os.path.join(self.epel_dir, 'repodata', 'repomd.xml')
+
+        def rebuild(_):
+            for _ in range(10):
+                stat = os.stat(repomd)
+                os.utime(repomd, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+                self.index.refresh(force=True)
+            return [expected]
+
+        def search(_):
+            return [self.index.search('samba smb').names for _ in range(50)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda task: task(None), [rebuild, search, search, search]))
+        for names in results:
+            self.assertEqual(names, [expected] * len(names))
+
+
+if __name__ == "__main__":
+    unittest.main()
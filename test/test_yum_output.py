@@ -0,0 +1,91 @@
+import os
+import sys
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.yum_output import parse_list, parse_search
+
+PACKAGE_TEST_DIR = os.path.join(PROJECT_DIR, "test", "test_data", "packages")
+
+WRAPPED_LIST = """Loaded plugins: fastestmirror
+Loading mirror speeds from cached hostfile
+Installed Packages
+mc.x86_64                          1:4.8.7-11.el7                   @base
+golang-github-cpuguy83-go-md2man.x86_64
+                                   1.0.7-1.el7                      @epel
+local-tool.noarch                  1.0-1
+Extra Packages
+orphan.x86_64                      0.1-1                            @commandline
+Obsoleting Packages
+python3-rpm.x86_64                 4.11.3-48.el7_9                  updates
+    rpm-python.x86_64              4.11.3-45.el7                    @base
+Updated Packages
+kernel-tools-libs-devel-very-long.x86_64
+                                   3.10.0-1160.119.1.el7
+                                                                    updates
+"""
+
+
+class TestYumOutput(unittest.TestCase):
+
+    def test_parse_list(self):
+        """
+        Test wrapped entries, repo-less entries and all sections
+        """
+        self.assertEqual(list(parse_list(WRAPPED_LIST.splitlines())), [
+            ('installed', 'mc', 'x86_64', '1:4.8.7-11.el7', 'base'),
+            ('installed', 'golang-github-cpuguy83-go-md2man', 'x86_64', '1.0.7-1.el7', 'epel'),
+            ('installed', 'local-tool', 'noarch', '1.0-1', None),
+            ('extra', 'orphan', 'x86_64', '0.1-1', 'commandline'),
+            ('obsoleting', 'python3-rpm', 'x86_64', '4.11.3-48.el7_9', 'updates'),
+            ('obsoleted', 'rpm-python', 'x86_64', '4.11.3-45.el7', 'base'),
+            ('updates', 'kernel-tools-libs-devel-very-long', 'x86_64', '3.10.0-1160.119.1.el7', 'updates'),
+        ])
+
+    def test_parse_list_stripped(self):
+        """
+        Test stripped lines, as produced by execute_stream, are parsed the same way
+        """
+        lines = [line.strip() for line in WRAPPED_LIST.splitlines() if line.strip()]
+        self.assertEqual(list(parse_list(lines)), list(parse_list(WRAPPED_LIST.splitlines())))
+
+    def test_parse_list_missing_section(self):
+        """
+        Test output with the Available section only
+        """
+        with open(os.path.join(PACKAGE_TEST_DIR, 'yum_list_available.txt')) as f:
+            lines = ['Available Packages'] + f.read().splitlines()
+        packages = list(parse_list(lines))
+        self.assertEqual(len(packages), len(lines) - 1)
+        self.assertEqual({package[0] for package in packages}, {'available'})
+        self.assertEqual(list(parse_list(['Loaded plugins: fastestmirror', 'Error: No matching Packages to list'])), [])
+
+    def test_parse_list_truncated_entry(self):
+        """
+        Test wrapped entry cut by the next section header is dropped, and the header is not taken for its version
+        """
+        lines = ['Installed Packages', 'very-long-package-name.x86_64', 'Available Packages',
+                 'mc.x86_64 1:4.8.7-11.el7 base']
+        self.assertEqual(list(parse_list(lines)), [('available', 'mc', 'x86_64', '1:4.8.7-11.el7', 'base')])
+
+    def test_parse_search(self):
+        """
+        Test search results with wrapped summaries
+        """
+        lines = ["Loaded plugins: fastestmirror",
+                 "==== N/S matched: samba ====",
+                 "samba-client.x86_64 : Samba client programs",
+                 "samba-common-tools.x86_64 : Tools for Samba servers and",
+                 "                          : clients",
+                 "",
+                 "  Name and summary matches only, use \"search all\" for everything."]
+        self.assertEqual(list(parse_search(lines)), [
+            ('samba-client', 'x86_64', 'Samba client programs'),
+            ('samba-common-tools', 'x86_64', 'Tools for Samba servers and clients'),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Append package dir to sys.path
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+sys.path.append(os.path.abspath(os.path.join(PROJECT_DIR, "src")))
+from yum_wrapper.yum_shell import YumShell, YumShellPool
+
+# Minimal 'yum shell': prints a prompt, answers 'list', 'pid', 'echo', 'install' and 'run',
+# reports unknown commands
+FAKE_SHELL = """
+import os
+import sys
+import shlex
+print("Loaded plugins: fastestmirror")
+transaction = []
+while True:
+    sys.stdout.write("> ")
+    line = sys.stdin.readline()
+    if not line or line.strip() == "exit":
+        break
+    command = shlex.split(line)
+    if not command:
+        continue
+    if command[0] == "list":
+        print("Installed Packages")
+        for name in command[1:]:
+            print(name + ".x86_64    1.0-1.el7    @base")
+    elif command[0] == "pid":
+        print(os.getpid())
+    elif command[0] == "fail":
+        print("Error: Nothing to do")
+    elif command[0] == "echo":
+        print(" ".join(command[1:]))
+    elif command[0] == "install":
+        for name in command[1:]:
+            if name.startswith("missing"):
+                print("No package %s available." % name)
+            else:
+                print("Marking %s to be installed" % name)
+                transaction.append(name)
+    elif command[0] == "run":
+        print("Running transaction")
+        if any(name.startswith("broken") for name in transaction):
+            print("Transaction check error:")
+            print("  file /usr/bin/broken conflicts between attempted installs")
+        elif any(name.startswith("partial") for name in transaction):
+            print("  Installing : partial-1.0-1.el7.x86_64")
+        else:
+            print("Complete!")
+        transaction = []
+    else:
+        print("No such command: %s. Please use yum --help" % command[0])
+"""
+
+
+class TestYumShell(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        fake_shell = os.path.join(self.temp_dir.name, 'fake_shell.py')
+        with open(fake_shell, 'w') as f:
+            f.write(FAKE_SHELL)
+        self.command = [sys.executable, fake_shell]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_execute(self):
+        """
+        Test output of every command is framed, and the process is reused
+        """
+        shell = YumShell(self.command)
+        try:
+            ret_code, lines = shell.execute(['list', 'mc', 'rsync'])
+            self.assertEqual(ret_code, 0)
+            self.assertEqual(lines, ['Installed Packages', 'mc.x86_64    1.0-1.el7    @base',
+                                     'rsync.x86_64    1.0-1.el7    @base'])
+            self.assertEqual(shell.execute(['fail'])[0], 1)
+            first_pid = shell.execute(['pid'])[1]
+            self.assertEqual(shell.execute(['pid'])[1], first_pid)
+        finally:
+            shell.close()
+        self.assertFalse(shell.alive())
+
+    def test_prompt(self):
+        """
+        Test only the shell prompt is removed, output starting with '>' is kept
+        """
+        shell = YumShell(self.command)
+        try:
+            self.assertEqual(shell.execute(['echo', '> quoted']), (0, ['> quoted']))
+            self.assertEqual(shell.execute(['echo', '>= 1.0']), (0, ['>= 1.0']))
+            self.assertEqual(shell.execute(['echo']), (0, []))
+        finally:
+            shell.close()
+
+    def test_failed_commands(self):
+        """
+        Test failures reported without 'Error' prefix and incomplete transactions are detected
+        """
+        shell = YumShell(self.command)
+        try:
+            self.assertEqual(shell.execute(['install', 'missing-package'])[0], 1)
+            self.assertEqual(shell.execute(['install', 'mc'])[0], 0)
+            self.assertEqual(shell.execute(['run']), (0, ['Running transaction', 'Complete!']))
+            shell.execute(['install', 'broken'])
+            self.assertEqual(shell.execute(['run'])[0], 1)
+            shell.execute(['install', 'partial'])
+            self.assertEqual(shell.execute(['run'])[0], 1)
+        finally:
+            shell.close()
+
+    def test_pool(self):
+        """
+        Test pool reuses idle session
+        """
+        pool = YumShellPool(self.command, size=2)
+        try:
+            self.assertEqual(pool.execute(['pid']), pool.execute(['pid']))
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()